@@ -2,119 +2,126 @@
 # -*- coding: utf-8 -*-
 """
 اسکریپت پیشرفته جمع‌آوری محتوا با Selenium برای سایت‌های JavaScript-heavy
+
+صفحات با یک pool از مرورگرهای headless (browser_pool.py) رندر می‌شوند؛ مقالات
+یک سایت همزمان بین مرورگرها پخش می‌شوند و HTML رندر شده با همان parse_page
+اسکرپر اصلی پردازش می‌شود.
 """
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from bs4 import BeautifulSoup
-import time
-import json
-from pathlib import Path
+import argparse
+from concurrent.futures import as_completed
+from typing import Dict, List, Optional
+
+from browser_pool import BrowserPool
 from content_scraper import ContentScraper
 
 
 class AdvancedScraper(ContentScraper):
     """اسکرپر پیشرفته با Selenium برای سایت‌های JavaScript-heavy"""
-    
-    def __init__(self, output_dir: str = "scraped_content", headless: bool = True):
-        super().__init__(output_dir)
+
+    def __init__(self, output_dir: str = "scraped_content", headless: bool = True,
+                 browsers: int = 2, max_pages_per_browser: int = 50, lean: bool = True):
+        # همه صفحات با مرورگر رندر می‌شوند؛ مسیریاب requests/مرورگر لازم نیست
+        super().__init__(output_dir, use_router=False)
         self.headless = headless
-        self.driver = None
-        self.setup_driver()
-    
-    def setup_driver(self):
-        """تنظیم ChromeDriver"""
-        chrome_options = Options()
-        if self.headless:
-            chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        chrome_options.add_argument('--lang=fa-IR')
-        
-        try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.driver.set_page_load_timeout(30)
-        except Exception as e:
-            print(f"⚠️  خطا در راه‌اندازی ChromeDriver: {e}")
-            print("💡 لطفاً ChromeDriver را نصب کنید یا از content_scraper.py استفاده کنید")
-            self.driver = None
-    
+        # lean: بدون تصاویر، فونت‌ها و اسکریپت‌های تبلیغاتی (قابل تغییر با lean_render هر سایت)
+        self.browser_pool = BrowserPool(size=browsers, max_pages=max_pages_per_browser, headless=headless,
+                                        rate_limiter=self.rate_limiter, lean=lean)
+        self.browser_pool.start()
+
+    def _handle_rendered(self, url: str, html: str) -> Optional[Dict]:
+        data = self.parse_page(url, html)
+        self.scraped_urls.add(url)
+        return data
+
     def scrape_page_selenium(self, url: str) -> Optional[Dict]:
         """اسکرپ صفحه با Selenium"""
-        if not self.driver:
+        if not self.browser_pool.running or url in self.scraped_urls:
             return None
-        
+
         try:
             print(f"در حال اسکرپ (Selenium): {url}")
-            self.driver.get(url)
-            
-            # منتظر بارگذاری صفحه
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # اسکرول برای بارگذاری محتوای lazy-loaded
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            
-            # دریافت HTML
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # استفاده از متدهای والد برای استخراج
-            meta_data = self.extract_meta_tags(soup)
-            content = self.extract_content(soup)
-            
-            # دانلود تصاویر
-            downloaded_images = []
-            for img_info in content['images'][:10]:
-                img_path = self.download_image(img_info['url'], url)
-                if img_path:
-                    downloaded_images.append({
-                        'path': img_path,
-                        'alt': img_info['alt'],
-                        'title': img_info['title']
-                    })
-            
-            title = meta_data['title'] or (content['headings'][0]['text'] if content['headings'] else 'بدون عنوان')
-            slug = self.create_slug(title)
-            full_text = ' '.join([p for p in content['paragraphs']])
-            
-            scraped_data = {
-                'id': hashlib.md5(url.encode()).hexdigest()[:12],
-                'url': url,
-                'slug': slug,
-                'title': title,
-                'meta_description': meta_data['description'],
-                'meta_keywords': meta_data['keywords'],
-                'content': full_text,
-                'excerpt': full_text[:300] + '...' if len(full_text) > 300 else full_text,
-                'headings': content['headings'],
-                'images': downloaded_images,
-                'scraped_at': datetime.now().isoformat(),
-                'source': urlparse(url).netloc,
-            }
-            
-            return scraped_data
-            
+            return self._handle_rendered(url, self.browser_pool.render(url))
         except Exception as e:
             print(f"خطا در اسکرپ {url}: {e}")
+            self.page_failed(url)
             return None
-    
+
+    def scrape_articles(self, article_urls: List[str], site_config: Optional[Dict] = None):
+        """رندر همزمان مقالات یک سایت روی pool مرورگرها
+
+        نوبت هر صفحه از rate_limiter میزبان گرفته می‌شود. اگر هیچ مرورگری
+        راه‌اندازی نشده باشد، صفحات با requests دریافت می‌شوند.
+        """
+        if not self.browser_pool.running:
+            super().scrape_articles(article_urls, site_config)
+            return
+        
+        site_config = site_config or {}
+        lean = site_config.get('lean_render')
+        block_domains = site_config.get('block_domains', ())
+
+        pending = {}
+        for url in article_urls:
+            if url in self.scraped_urls:
+                continue
+            print(f"در حال اسکرپ (Selenium): {url}")
+            pending[self.browser_pool.submit(url, lean, block_domains)] = url
+
+        for future in as_completed(pending):
+            url = pending[future]
+            try:
+                data = self._handle_rendered(url, future.result())
+            except Exception as e:
+                print(f"خطا در اسکرپ {url}: {e}")
+                self.page_failed(url)
+                continue
+            if data:
+                self.add_record(data)
+                print(f"✓ محتوا ذخیره شد: {data['title'][:50]}...")
+
+    def finish(self):
+        self.close_browsers()
+        super().finish()
+
+    def close_browsers(self):
+        """بستن همه مرورگرها و چاپ آمار pool"""
+        if not self.browser_pool.running:
+            return
+        self.browser_pool.close()
+        stats = self.browser_pool.stats()
+        print(f"🌐 مرورگرها: {stats['pages']} صفحه رندر شد ({stats['lean_pages']} در حالت lean)، "
+              f"{stats['failed']} ناموفق، {stats['recycled']} بار بازیافت "
+              f"({stats['crashes']} crash، {stats['killed']} گیر کرده)؛ میانگین رندر {stats['avg_render']:.1f} "
+              f"ثانیه که {stats['avg_settle']:.1f} ثانیه آن صبر برای ثابت شدن صفحه است")
+
     def __del__(self):
-        """بستن driver هنگام خروج"""
-        if self.driver:
-            self.driver.quit()
+        """بستن مرورگرها هنگام خروج"""
+        pool = getattr(self, 'browser_pool', None)
+        if pool is not None and pool.running:
+            pool.close()
 
 
-if __name__ == "__main__":
-    # استفاده از Selenium برای سایت‌های خاص
-    scraper = AdvancedScraper(headless=True)
+def main():
+    parser = argparse.ArgumentParser(description='جمع‌آوری محتوا با Selenium (pool مرورگرها)')
+    parser.add_argument('--output-dir', default='scraped_content', help='پوشه خروجی')
+    parser.add_argument('--browsers', type=int, default=2, help='تعداد مرورگرهای همزمان')
+    parser.add_argument('--max-pages-per-browser', type=int, default=50,
+                        help='بازیافت هر مرورگر پس از این تعداد صفحه')
+    parser.add_argument('--show-browser', action='store_true', help='اجرای Chrome بدون حالت headless')
+    parser.add_argument('--full-render', action='store_true',
+                        help='بارگذاری کامل صفحات (تصاویر، فونت‌ها، اسکریپت‌های تبلیغاتی) برای همه سایت‌ها')
+    parser.add_argument('--delay', type=float, default=None,
+                        help='فاصله اولیه (ثانیه) بین دو صفحه از یک میزبان')
+    args = parser.parse_args()
+
+    scraper = AdvancedScraper(output_dir=args.output_dir, headless=not args.show_browser,
+                              browsers=args.browsers, max_pages_per_browser=args.max_pages_per_browser,
+                              lean=not args.full_render)
+    if args.delay is not None:
+        scraper.delay = args.delay
     scraper.run()
 
+
+if __name__ == "__main__":
+    main()
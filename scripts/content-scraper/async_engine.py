@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+موتور جمع‌آوری همزمان (asyncio) برای ContentScraper
+
+همه سایت‌ها به صورت همزمان پیمایش می‌شوند؛ تعداد کل درخواست‌های همزمان و
+تعداد درخواست‌های همزمان به هر میزبان محدود است و نوبت درخواست‌های هر میزبان
+از rate_limiter اسکرپر (بدون اشغال thread) گرفته می‌شود. بنابراین زمان کل
+اجرا به کندترین سایت بستگی دارد، نه به مجموع همه سایت‌ها.
+
+درخواست‌ها از همان session و متد `fetch` اسکرپر عبور می‌کنند و پردازش HTML
+همچنان با `extract_meta_tags` / `extract_content` انجام می‌شود.
+"""
+
+import asyncio
+import functools
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+
+class AsyncCrawlEngine:
+    """اجرای همزمان مراحل کشف و اسکرپ مقالات برای چند سایت"""
+
+    def __init__(self, scraper, max_concurrency: int = 8, per_host_concurrency: int = 2):
+        self.scraper = scraper
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+        # اندازه pool اتصال session باید با همزمانی هر میزبان هماهنگ باشد؛
+        # worker های دانلود تصویر هم از همان pool استفاده می‌کنند
+        self.scraper.transport.configure(per_host=self.per_host_concurrency + self.scraper.image_workers,
+                                         hosts=max(self.max_concurrency, 32))
+
+    def _host(self, url: str, concurrency: Optional[int] = None) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(concurrency or self.per_host_concurrency)
+        return self._hosts[host]
+
+    async def _fetch(self, url: str, fetch=None):
+        """دریافت URL با رعایت محدودیت کلی، همزمانی و نرخ میزبان (پیش‌فرض: scraper.fetch)"""
+        async with self._global:
+            async with self._host(url):
+                wait = self.scraper.rate_limiter.reserve(url)
+                self.scraper.metrics.observe('throttle', wait)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                return await asyncio.to_thread(fetch or self.scraper.fetch, url, throttle=False)
+
+    async def _find_article_urls(self, site: Dict) -> List[str]:
+        """کشف مقالات از نقشه سایت و فیدها، یا دریافت همزمان صفحات فهرست و استخراج لینک‌ها"""
+        base_url = site['base_url']
+
+        # سندهای نقشه سایت پشت سر هم و stream خوانده می‌شوند (نوبت میزبان در rate_limiter)
+        found = await asyncio.to_thread(self.scraper.discover_article_urls, site)
+        if found is not None:
+            return await asyncio.to_thread(self.scraper.select_article_urls, site, *found)
+
+        # صفحات فهرست حتی بدون تغییر (304) لینک‌های خود را برمی‌گردانند
+        listing_fetch = functools.partial(self.scraper.fetch, skip_unchanged=False)
+
+        async def listing(path: str) -> List[str]:
+            try:
+                response = await self._fetch(urljoin(base_url, path), listing_fetch)
+                if response is None:
+                    return []
+                return await asyncio.to_thread(
+                    self.scraper.parse_listing, response.text, base_url, site['keywords']
+                )
+            except Exception as e:
+                print(f"خطا در پیدا کردن مقالات از {path}: {e}")
+                return []
+
+        paths = [path for path in site['search_paths'] if self.scraper.robots.allowed(urljoin(base_url, path))]
+        results = await asyncio.gather(*(listing(path) for path in paths))
+
+        article_urls = []
+        for urls in results:
+            for url in urls:
+                if url not in article_urls:
+                    article_urls.append(url)
+        return await asyncio.to_thread(self.scraper.select_article_urls, site, article_urls)
+
+    async def _scrape_page(self, url: str) -> Optional[Dict]:
+        if url in self.scraper.scraped_urls:
+            return None
+
+        try:
+            print(f"در حال اسکرپ: {url}")
+            html = await self._fetch(url, self.scraper.fetch_html)
+            if html is None:
+                return None
+
+            data = await asyncio.to_thread(self.scraper.parse_page, url, html)
+            self.scraper.scraped_urls.add(url)
+            return data
+        except Exception as e:
+            print(f"خطا در اسکرپ {url}: {e}")
+            self.scraper.page_failed(url)
+            return None
+
+    async def _scrape_site(self, site: Dict):
+        print(f"شروع اسکرپ سایت: {site['name']} ({site['base_url']})")
+        if self.scraper.fetch_router:
+            self.scraper.fetch_router.configure_site(site)
+        if 'max_connections' in site:
+            # max_connections سایت هم همزمانی و هم اندازه pool اتصال آن را تعیین می‌کند
+            self._host(site['base_url'], site['max_connections'])
+            self.scraper.transport.size_host(site['base_url'],
+                                             site['max_connections'] + self.scraper.image_workers)
+
+        if not await asyncio.to_thread(self.scraper.check_robots_txt, site['base_url']):
+            print(f"⚠️  robots.txt اجازه اسکرپ نمی‌دهد: {site['base_url']}")
+            return
+
+        article_urls = await self._find_article_urls(site)
+        print(f"تعداد مقالات پیدا شده در {site['name']}: {len(article_urls)}")
+
+        results = await asyncio.gather(*(self._scrape_page(url) for url in article_urls))
+        for data in results:
+            if data:
+                self.scraper.add_record(data)
+                print(f"✓ محتوا ذخیره شد: {data['title'][:50]}...")
+
+    async def crawl(self, sites: List[Dict]):
+        """پیمایش همزمان همه سایت‌ها"""
+        self._global = asyncio.Semaphore(self.max_concurrency)
+
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(self._scrape_site(site) for site in sites), return_exceptions=True
+        )
+        for site, result in zip(sites, results):
+            if isinstance(result, Exception):
+                print(f"❌ خطا در اسکرپ سایت {site['name']}: {result}")
+
+        print(f"⏱️  زمان پیمایش: {time.monotonic() - started:.1f} ثانیه")
+
+    def run(self, sites: List[Dict]):
+        """اجرای همگام (blocking) موتور async"""
+        asyncio.run(self.crawl(sites))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مقایسه سرعت رندر: یک مرورگر در برابر pool چند مرورگره، حالت lean در برابر کامل
+
+صفحات benchmarks/fixtures با یک http.server محلی سرو می‌شوند و هر صفحه
+`--repeat` بار (با query string متفاوت) با BrowserPool رندر می‌شود. برای
+صفحات واقعی با تصاویر و اسکریپت‌های تبلیغاتی `--url` را تکرار کنید.
+نیازمند Chrome و ChromeDriver است.
+
+    python benchmarks/bench_browser_pool.py --browsers 4 --repeat 10
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from browser_pool import BrowserPool  # noqa: E402
+from fixture_site import FIXTURES_DIR, serve_directory  # noqa: E402
+
+
+def render_all(size: int, urls: List[str], lean: bool) -> float:
+    """زمان رندر همه URL ها با pool به اندازه size (ثانیه)"""
+    pool = BrowserPool(size=size, lean=lean)
+    if not pool.start():
+        sys.exit(1)
+    try:
+        started = time.perf_counter()
+        futures = [pool.submit(url) for url in urls]
+        for future in futures:
+            future.result()
+        return time.perf_counter() - started
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='بنچمارک pool مرورگرها')
+    parser.add_argument('--browsers', type=int, default=4, help='تعداد مرورگرهای pool')
+    parser.add_argument('--repeat', type=int, default=10, help='تعداد رندر هر صفحه')
+    parser.add_argument('--fixtures', default=str(FIXTURES_DIR), help='پوشه صفحات HTML')
+    parser.add_argument('--url', action='append', default=[], help='URL واقعی به جای fixtures (قابل تکرار)')
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        urls = [url for _ in range(args.repeat) for url in args.url]
+    else:
+        pages = sorted(Path(args.fixtures).glob('*.html'))
+        if not pages:
+            print(f"❌ هیچ صفحه‌ای در {args.fixtures} یافت نشد!")
+            sys.exit(1)
+        server, base = serve_directory(Path(args.fixtures))
+        urls = [f"{base}/{page.name}?r={i}" for i in range(args.repeat) for page in pages]
+
+    try:
+        print(f"{'مرورگرها':<12}{'حالت':<8}{'ثانیه':>10}{'صفحه در ثانیه':>16}")
+        for size in sorted({1, args.browsers}):
+            for lean in (False, True):
+                seconds = render_all(size, urls, lean)
+                mode = 'lean' if lean else 'کامل'
+                print(f"{size:<12}{mode:<8}{seconds:>10.2f}{len(urls) / seconds:>16.1f}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مقایسه سرعت استخراج محتوا: BeautifulSoup (html.parser) در برابر lxml تک‌پیمایش
+
+روی صفحات ذخیره شده در benchmarks/fixtures اجرا می‌شود، ابتدا یکسان بودن
+خروجی دو موتور را بررسی می‌کند و سپس زمان parse+extract هر صفحه را گزارش می‌دهد.
+
+    python benchmarks/bench_extract.py --repeat 50
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from content_scraper import ContentScraper  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+
+def time_engine(scraper: ContentScraper, engine: str, html: str, repeat: int) -> float:
+    """میانه زمان (میلی‌ثانیه) parse+extract یک صفحه"""
+    scraper.html_parser = engine
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        scraper.extract_page(html)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='بنچمارک موتورهای استخراج HTML')
+    parser.add_argument('--repeat', type=int, default=20, help='تعداد تکرار برای هر صفحه')
+    parser.add_argument('--fixtures', default=str(FIXTURES_DIR), help='پوشه صفحات HTML')
+    args = parser.parse_args()
+
+    scraper = ContentScraper(output_dir='/tmp/bench_extract', use_cache=False, use_state=False)
+    pages = sorted(Path(args.fixtures).glob('*.html'))
+    if not pages:
+        print(f"❌ هیچ صفحه‌ای در {args.fixtures} یافت نشد!")
+        sys.exit(1)
+
+    print(f"{'صفحه':<22}{'KB':>8}{'html.parser (ms)':>20}{'lxml (ms)':>14}{'speedup':>10}  خروجی")
+    total_bs4 = total_lxml = 0.0
+    for page in pages:
+        html = page.read_text(encoding='utf-8')
+
+        scraper.html_parser = 'html.parser'
+        expected = scraper.extract_page(html)
+        scraper.html_parser = 'lxml'
+        actual = scraper.extract_page(html)
+        same = 'یکسان' if expected == actual else 'متفاوت'
+
+        bs4_ms = time_engine(scraper, 'html.parser', html, args.repeat)
+        lxml_ms = time_engine(scraper, 'lxml', html, args.repeat)
+        total_bs4 += bs4_ms
+        total_lxml += lxml_ms
+
+        print(f"{page.stem:<22}{len(html.encode()) / 1024:>8.1f}{bs4_ms:>20.2f}{lxml_ms:>14.2f}"
+              f"{bs4_ms / lxml_ms:>9.1f}x  {same}")
+
+    print(f"\n{'مجموع':<30}{total_bs4:>20.2f}{total_lxml:>14.2f}{total_bs4 / total_lxml:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
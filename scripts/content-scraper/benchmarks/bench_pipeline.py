@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+بنچمارک کامل و تکرارپذیر زنجیره اسکرپ → اعتبارسنجی → import روی سایت محلی
+
+مقالات و تصاویر با seed ثابت از benchmarks/fixtures ساخته و با fixture_site
+(در یک پردازه جداگانه، با تاخیر و درصد خطای قابل تنظیم) سرو می‌شوند. سپس
+ContentScraper همه مقالات را دریافت می‌کند، ContentValidator خروجی را
+اعتبارسنجی می‌کند و رکوردهای معتبر import می‌شوند: با `--postgres` در یک
+schema موقت PostgreSQL با bulk_import، وگرنه در یک SQLite با همان جداول و
+همان `ON CONFLICT (slug) DO NOTHING`.
+
+برای هر مرحله زمان، صفحه/رکورد در ثانیه، MB در ثانیه، p50/p99 زمان دریافت
+صفحات و بیشترین RSS گزارش می‌شود. نتیجه با `--save-baseline` ذخیره و با
+`--baseline` مقایسه می‌شود؛ اگر معیاری بیش از `--tolerance` بدتر شده باشد
+خروجی برنامه 1 است.
+
+    python benchmarks/bench_pipeline.py --pages 300 --latency-ms 20 --save-baseline baseline.json
+    python benchmarks/bench_pipeline.py --pages 300 --latency-ms 20 --baseline baseline.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from content_scraper import ContentScraper  # noqa: E402
+from fixture_site import FIXTURES_DIR, SITE_KEYWORD, FixtureServer, build_corpus, corpus_bytes  # noqa: E402
+from import_to_database import bulk_import, image_values  # noqa: E402
+from records_io import iter_records, open_writer  # noqa: E402
+from sql_export import AUTHOR_ID, CATEGORY_ID, POST_COLUMNS, post_values  # noqa: E402
+from validate_content import ContentValidator, chunks  # noqa: E402
+
+# (مرحله، معیار، 1 اگر بیشتر بهتر است / -1 اگر کمتر بهتر است)
+COMPARED = (
+    ('scrape', 'pages_per_second', 1),
+    ('scrape', 'mb_per_second', 1),
+    ('scrape', 'fetch_p50_ms', -1),
+    ('scrape', 'fetch_p99_ms', -1),
+    ('validate', 'records_per_second', 1),
+    ('import', 'records_per_second', 1),
+    ('total', 'seconds', -1),
+    ('total', 'peak_rss_mb', -1),
+)
+
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS blog_posts (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        slug TEXT NOT NULL UNIQUE,
+        excerpt TEXT,
+        content TEXT NOT NULL,
+        featured_image TEXT,
+        meta_description TEXT,
+        meta_keywords TEXT,
+        author_id INTEGER,
+        category_id INTEGER,
+        is_published BOOLEAN,
+        published_at TEXT,
+        created_at TEXT,
+        updated_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS blog_post_images (
+        id INTEGER PRIMARY KEY,
+        post_id INTEGER NOT NULL REFERENCES blog_posts (id),
+        image_url TEXT,
+        alt_text TEXT,
+        title TEXT
+    );
+"""
+
+POSTGRES_SCHEMA = """
+    CREATE TABLE blog_posts (
+        id SERIAL PRIMARY KEY,
+        title TEXT NOT NULL,
+        slug TEXT NOT NULL UNIQUE,
+        excerpt TEXT,
+        content TEXT NOT NULL,
+        featured_image TEXT,
+        meta_description TEXT,
+        meta_keywords TEXT,
+        author_id INTEGER,
+        category_id INTEGER,
+        is_published BOOLEAN,
+        published_at TIMESTAMPTZ,
+        created_at TIMESTAMPTZ,
+        updated_at TIMESTAMPTZ
+    );
+    CREATE TABLE blog_post_images (
+        id SERIAL PRIMARY KEY,
+        post_id INTEGER NOT NULL REFERENCES blog_posts (id),
+        image_url TEXT,
+        alt_text TEXT,
+        title TEXT
+    );
+"""
+
+
+def peak_rss_mb() -> float:
+    """بیشترین RSS این پردازه تا این لحظه (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # لینوکس کیلوبایت و macOS بایت گزارش می‌دهد
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def children_peak_rss_mb() -> float:
+    """بیشترین RSS پردازه‌های فرزند پایان یافته (process pool ها)"""
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_scrape(base_url: str, work_dir: Path, args) -> Dict:
+    site = {
+        'name': 'fixture',
+        'base_url': base_url,
+        'search_paths': ['/articles/'],
+        'keywords': [SITE_KEYWORD],
+    }
+    scraper = ContentScraper(output_dir=str(work_dir / 'scraped'), image_workers=args.image_workers,
+                             use_router=False)
+    scraper.target_sites = [site]
+    scraper.delay = args.delay
+    scraper.rate_limiter.min_delay = args.delay
+    scraper.max_articles_per_site = args.pages
+    scraper.keep_records = False
+    scraper.output_format = 'jsonl'
+    scraper.image_variants = not args.no_variants
+
+    started = time.perf_counter()
+    if args.engine == 'async':
+        scraper.run_async(max_concurrency=args.concurrency, per_host_concurrency=args.per_host)
+    else:
+        scraper.run()
+    seconds = time.perf_counter() - started
+
+    report = json.loads(scraper.report_path.read_text(encoding='utf-8'))
+    fetch = report['stages'].get('fetch', {})
+    total_bytes = sum(host['bytes'] for host in report['hosts'].values())
+    return {
+        'seconds': round(seconds, 3),
+        'pages': scraper.scraped_count,
+        'pages_per_second': round(scraper.scraped_count / seconds, 2),
+        'mb_per_second': round(total_bytes / (1024 * 1024) / seconds, 3),
+        'fetch_p50_ms': round(fetch.get('p50_seconds', 0) * 1000, 2),
+        'fetch_p99_ms': round(fetch.get('p99_seconds', 0) * 1000, 2),
+        'stage_seconds': {stage: summary['total_seconds'] for stage, summary in report['stages'].items()},
+        'peak_rss_mb': peak_rss_mb(),
+        'records_path': str(scraper.records_path),
+    }
+
+
+def run_validate(records_path: Path, output_path: Path, processes: int) -> Dict:
+    validator = ContentValidator()
+    writer = open_writer(output_path, flush=False)
+    records = 0
+
+    def on_invalid(content: Dict):
+        nonlocal records
+        records += 1
+
+    started = time.perf_counter()
+    try:
+        for content in validator.iter_valid(iter_records(records_path), on_invalid, processes=processes):
+            writer.write(content)
+            records += 1
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - started
+    return {
+        'seconds': round(seconds, 3),
+        'records': records,
+        'valid': writer.count,
+        'records_per_second': round(records / seconds, 1) if seconds else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def sqlite_import(db_path: Path, items: Iterable[Dict], batch_size: int = 5000) -> Dict:
+    """معادل bulk_import روی SQLite: هر دسته در یک تراکنش با ON CONFLICT (slug) DO NOTHING"""
+    stats = {'imported': 0, 'skipped': 0, 'failed': 0}
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(SQLITE_SCHEMA)
+    insert_post = (
+        f"INSERT INTO blog_posts ({', '.join(POST_COLUMNS)}, author_id, category_id, is_published, "
+        f"published_at, created_at) VALUES ({', '.join('?' * len(POST_COLUMNS))}, ?, ?, 1, "
+        f"datetime('now'), datetime('now')) ON CONFLICT (slug) DO NOTHING"
+    )
+    try:
+        for batch in chunks(items, batch_size):
+            with conn:
+                for item in batch:
+                    try:
+                        values = post_values(item)
+                    except (KeyError, TypeError, ValueError):
+                        stats['failed'] += 1
+                        continue
+                    cursor = conn.execute(insert_post, values + (AUTHOR_ID, CATEGORY_ID))
+                    if not cursor.rowcount:
+                        stats['skipped'] += 1
+                        continue
+                    stats['imported'] += 1
+                    conn.executemany(
+                        "INSERT INTO blog_post_images (post_id, image_url, alt_text, title) VALUES (?, ?, ?, ?)",
+                        [(cursor.lastrowid,) + image for image in image_values(item)],
+                    )
+    finally:
+        conn.close()
+    return stats
+
+
+def postgres_import(dsn: str, items: Iterable[Dict]) -> Dict:
+    """bulk_import در یک schema موقت که در پایان حذف می‌شود"""
+    import psycopg2
+
+    schema = f"bench_pipeline_{os.getpid()}"
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {schema}")
+            cur.execute(f"SET search_path TO {schema}")
+            cur.execute(POSTGRES_SCHEMA)
+        conn.commit()
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            stats = bulk_import(conn, items)
+        return {'imported': stats['imported'], 'skipped': stats['skipped'], 'failed': len(stats['failed'])}
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+def run_import(records_path: Path, work_dir: Path, postgres: Optional[str]) -> Dict:
+    started = time.perf_counter()
+    if postgres:
+        stats = postgres_import(postgres, iter_records(records_path))
+    else:
+        stats = sqlite_import(work_dir / 'import.sqlite3', iter_records(records_path))
+    seconds = time.perf_counter() - started
+    records = stats['imported'] + stats['skipped'] + stats['failed']
+    return {
+        'backend': 'postgres' if postgres else 'sqlite',
+        'seconds': round(seconds, 3),
+        **stats,
+        'records_per_second': round(records / seconds, 1) if seconds else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> bool:
+    """چاپ مقایسه با baseline؛ False اگر معیاری بیش از tolerance بدتر شده باشد"""
+    if baseline.get('config') != results['config']:
+        print("⚠️  تنظیمات baseline با این اجرا متفاوت است؛ مقایسه ممکن است معنادار نباشد")
+    ok = True
+    print(f"\n{'معیار':<34}{'baseline':>12}{'فعلی':>12}{'تغییر':>10}")
+    for stage, metric, direction in COMPARED:
+        old = baseline.get(stage, {}).get(metric)
+        new = results.get(stage, {}).get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        regressed = change * direction < -tolerance
+        ok = ok and not regressed
+        mark = '❌' if regressed else '✓'
+        print(f"{stage + '.' + metric:<34}{old:>12}{new:>12}{change:>+10.1%} {mark}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='بنچمارک کامل اسکرپ، اعتبارسنجی و import روی سایت محلی')
+    parser.add_argument('--pages', type=int, default=200, help='تعداد مقالات سایت آزمایشی')
+    parser.add_argument('--images', type=int, default=20, help='تعداد تصاویر متفاوت سایت')
+    parser.add_argument('--seed', type=int, default=42, help='seed ساخت سایت و تاخیرها')
+    parser.add_argument('--fixtures', default=str(FIXTURES_DIR), help='پوشه صفحات HTML منبع متن‌ها')
+    parser.add_argument('--latency-ms', type=float, default=20, help='تاخیر هر پاسخ سرور (میلی‌ثانیه)')
+    parser.add_argument('--jitter-ms', type=float, default=5, help='نوسان تصادفی تاخیر (میلی‌ثانیه)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='نسبت پاسخ‌های خطا (0 تا 1)')
+    parser.add_argument('--error-status', type=int, default=503, help='کد وضعیت پاسخ‌های خطا')
+    parser.add_argument('--engine', choices=['sync', 'async'], default='async', help='موتور اسکرپر')
+    parser.add_argument('--concurrency', type=int, default=8, help='همزمانی کل (موتور async)')
+    parser.add_argument('--per-host', type=int, default=4, help='همزمانی هر میزبان (موتور async)')
+    parser.add_argument('--delay', type=float, default=0.0, help='فاصله درخواست‌ها به میزبان (ثانیه)')
+    parser.add_argument('--image-workers', type=int, default=4, help='worker های دانلود تصویر')
+    parser.add_argument('--no-variants', action='store_true', help='بدون ساخت نسخه‌های WebP تصاویر')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='پردازه‌های اعتبارسنجی')
+    parser.add_argument('--postgres', default=None,
+                        help='DSN پایگاه PostgreSQL محلی برای import (پیش‌فرض: SQLite)')
+    parser.add_argument('--output', default=None, help='ذخیره نتایج این اجرا در فایل JSON')
+    parser.add_argument('--save-baseline', default=None, help='ذخیره نتایج به عنوان baseline')
+    parser.add_argument('--baseline', default=None, help='مقایسه با baseline ذخیره شده')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='حداکثر بدتر شدن مجاز هر معیار نسبت به baseline (0.10 یعنی 10٪)')
+    parser.add_argument('--verbose', action='store_true', help='نمایش خروجی اسکرپر و اعتبارسنجی')
+    parser.add_argument('--keep', action='store_true', help='نگه داشتن پوشه کاری')
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in (
+        'pages', 'images', 'seed', 'latency_ms', 'jitter_ms', 'error_rate', 'error_status', 'engine',
+        'concurrency', 'per_host', 'delay', 'image_workers', 'no_variants', 'processes',
+    )}
+    config['import_backend'] = 'postgres' if args.postgres else 'sqlite'
+
+    corpus = build_corpus(args.pages, args.images, Path(args.fixtures), args.seed)
+    print(f"🏗️  سایت آزمایشی: {args.pages} مقاله، {args.images} تصویر "
+          f"({corpus_bytes(corpus) / (1024 * 1024):.1f} MB)، تاخیر {args.latency_ms}±{args.jitter_ms} ms، "
+          f"خطا {args.error_rate:.0%}")
+
+    work_dir = Path(tempfile.mkdtemp(prefix='bench_pipeline_'))
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    server = FixtureServer(corpus, args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate,
+                           args.error_status, args.seed)
+    started = time.perf_counter()
+    try:
+        with server, quiet:
+            scrape = run_scrape(server.base_url, work_dir, args)
+            validate = run_validate(Path(scrape.pop('records_path')), work_dir / 'validated.jsonl',
+                                    args.processes)
+            imported = run_import(work_dir / 'validated.jsonl', work_dir, args.postgres)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        'config': config,
+        'scrape': scrape,
+        'validate': validate,
+        'import': imported,
+        'total': {
+            'seconds': round(time.perf_counter() - started, 3),
+            'peak_rss_mb': peak_rss_mb(),
+            # شامل پردازه‌های pool تصاویر و اعتبارسنجی و سرور سایت آزمایشی
+            'children_peak_rss_mb': children_peak_rss_mb(),
+        },
+    }
+
+    print(f"🕷️  اسکرپ: {scrape['pages']} صفحه در {scrape['seconds']:.2f} ثانیه "
+          f"({scrape['pages_per_second']} صفحه/ثانیه، {scrape['mb_per_second']} MB/ثانیه)؛ "
+          f"دریافت صفحه p50 {scrape['fetch_p50_ms']} ms، p99 {scrape['fetch_p99_ms']} ms")
+    print(f"🔍 اعتبارسنجی: {validate['records']} رکورد، {validate['valid']} معتبر "
+          f"({validate['records_per_second']} رکورد/ثانیه)")
+    print(f"🗄️  import ({imported['backend']}): {imported['imported']} درج، {imported['skipped']} رد شده "
+          f"({imported['records_per_second']} رکورد/ثانیه)")
+    print(f"⏱️  کل: {results['total']['seconds']:.2f} ثانیه؛ بیشترین RSS {results['total']['peak_rss_mb']} MB "
+          f"(فرزندان {results['total']['children_peak_rss_mb']} MB)")
+    if args.keep:
+        print(f"📁 پوشه کاری: {work_dir}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+            print(f"💾 نتایج در {path} ذخیره شد")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        if not compare(results, baseline, args.tolerance):
+            print(f"\n❌ کاهش کارایی بیش از {args.tolerance:.0%} نسبت به baseline")
+            sys.exit(1)
+        print("\n✅ بدون کاهش کارایی نسبت به baseline")
+
+
+if __name__ == '__main__':
+    main()
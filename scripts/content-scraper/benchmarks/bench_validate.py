@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مقایسه سرعت اعتبارسنجی: پیاده‌سازی قبلی در برابر KeywordMatcher
+
+رکوردهای مصنوعی از پاراگراف‌های صفحات benchmarks/fixtures ساخته می‌شوند.
+ابتدا یکسان بودن نتیجه معتبر/نامعتبر دو روش بررسی و سپس سرعت روش قبلی،
+ContentValidator تک‌پردازه و ContentValidator روی process pool گزارش می‌شود.
+
+    python benchmarks/bench_validate.py --records 100000 --processes 4
+"""
+
+import argparse
+import copy
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fast_extract import FastExtractor  # noqa: E402
+from text_normalizer import clean_text, clean_texts  # noqa: E402
+from validate_content import ContentValidator  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+
+def legacy_validate(validator: ContentValidator, content: Dict) -> bool:
+    """پیاده‌سازی قبلی: چهار regex پاکسازی و یک اسکن `in` برای هر کلمه کلیدی"""
+    content['content'] = re.sub(r'<[^>]+>', '', content.get('content', ''))
+    content['excerpt'] = re.sub(r'<[^>]+>', '', content.get('excerpt', ''))
+    content['content'] = re.sub(r'\s+', ' ', content['content']).strip()
+    content['excerpt'] = re.sub(r'\s+', ' ', content['excerpt']).strip()
+
+    title = content.get('title', '')
+    if not title or len(title) < validator.min_title_length:
+        return False
+    if not any(keyword in title.lower() for keyword in validator.required_keywords):
+        return False
+
+    text = content['content']
+    if not text or len(text) < validator.min_content_length or len(text) > validator.max_content_length:
+        return False
+    text_lower = text.lower()
+    if sum(1 for keyword in validator.required_keywords if keyword in text_lower) < 2:
+        return False
+    return bool(content.get('slug')) and bool(content.get('url'))
+
+
+def make_records(count: int, fixtures: Path) -> List[Dict]:
+    extractor = FastExtractor(clean_text, clean_batch=clean_texts)
+    paragraphs: List[str] = []
+    titles: List[str] = []
+    for page in sorted(fixtures.glob('*.html')):
+        meta, content = extractor.extract(page.read_text(encoding='utf-8'))
+        paragraphs.extend(content['paragraphs'])
+        titles.extend(heading['text'] for heading in content['headings'])
+    if not paragraphs:
+        print(f"❌ هیچ پاراگرافی در {fixtures} یافت نشد!")
+        sys.exit(1)
+
+    rng = random.Random(42)
+    records = []
+    for i in range(count):
+        text = ' '.join(rng.choice(paragraphs) for _ in range(rng.randint(1, 12)))
+        records.append({
+            'url': f'https://example.com/articles/{i}',
+            'slug': f'article-{i}',
+            'title': rng.choice(titles or ['مقاله درباره اسب']),
+            'content': text,
+            'excerpt': text[:300],
+        })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='بنچمارک اعتبارسنجی محتوا')
+    parser.add_argument('--records', type=int, default=100000, help='تعداد رکوردهای مصنوعی')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='تعداد پردازه‌ها')
+    parser.add_argument('--fixtures', default=str(FIXTURES_DIR), help='پوشه صفحات HTML')
+    args = parser.parse_args()
+
+    records = make_records(args.records, Path(args.fixtures))
+    validator = ContentValidator()
+    validator.check_duplicates = False
+
+    legacy_input = copy.deepcopy(records)
+    started = time.perf_counter()
+    expected = [legacy_validate(validator, record) for record in legacy_input]
+    legacy_seconds = time.perf_counter() - started
+
+    single_input = copy.deepcopy(records)
+    started = time.perf_counter()
+    actual = ['validation_errors' not in record for record in validator.iter_checked(single_input)]
+    single_seconds = time.perf_counter() - started
+
+    pool_input = copy.deepcopy(records)
+    started = time.perf_counter()
+    pooled = ['validation_errors' not in record
+              for record in validator.iter_checked(pool_input, processes=args.processes)]
+    pool_seconds = time.perf_counter() - started
+
+    same = 'یکسان' if expected == actual == pooled else 'متفاوت'
+    print(f"📊 {args.records} رکورد، {sum(actual)} معتبر؛ نتیجه دو روش: {same}")
+    print(f"{'روش':<28}{'ثانیه':>10}{'رکورد در ثانیه':>18}")
+    for name, seconds in (('روش قبلی', legacy_seconds),
+                          ('KeywordMatcher', single_seconds),
+                          (f'KeywordMatcher + {args.processes} پردازه', pool_seconds)):
+        print(f"{name:<28}{seconds:>10.2f}{args.records / seconds:>18.0f}")
+
+
+if __name__ == '__main__':
+    main()
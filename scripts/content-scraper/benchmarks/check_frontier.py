@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+بررسی تخلیه صف frontier در چند اجرای پشت سر هم روی سایت آزمایشی
+
+سایت آزمایشی (fixture_site) با `--pages` مقاله فقط از صفحه فهرست پیمایش
+می‌شود (بدون نقشه سایت) و هر اجرا حداکثر `--per-run` مقاله دریافت می‌کند.
+URL هایی که به سقف یک اجرا نرسیده‌اند در frontier می‌مانند و باید در اجراهای
+بعدی دریافت شوند، حتی وقتی صفحه فهرست تغییر نکرده است. پس از
+ceil(pages / per_run) اجرا همه مقالات باید دریافت شده باشند؛ در غیر این صورت
+خروجی برنامه 1 است.
+
+    python benchmarks/check_frontier.py --pages 30 --per-run 10
+    python benchmarks/check_frontier.py --engine async
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from content_scraper import ContentScraper  # noqa: E402
+from crawl_state import FETCHED, CrawlState  # noqa: E402
+from fixture_site import SITE_KEYWORD, FixtureServer, build_corpus  # noqa: E402
+
+
+def run_once(base_url: str, output_dir: Path, per_run: int, engine: str) -> int:
+    scraper = ContentScraper(output_dir=str(output_dir), use_router=False)
+    scraper.target_sites = [{
+        'name': 'fixture',
+        'base_url': base_url,
+        'search_paths': ['/articles/'],
+        'keywords': [SITE_KEYWORD],
+    }]
+    scraper.delay = 0
+    scraper.rate_limiter.min_delay = 0
+    scraper.max_articles_per_site = per_run
+    scraper.use_discovery = False
+    scraper.image_variants = False
+    with contextlib.redirect_stdout(io.StringIO()):
+        if engine == 'async':
+            scraper.run_async()
+        else:
+            scraper.run()
+    return scraper.scraped_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='بررسی تخلیه صف frontier در چند اجرا')
+    parser.add_argument('--pages', type=int, default=30, help='تعداد مقالات سایت آزمایشی')
+    parser.add_argument('--per-run', type=int, default=10, help='حداکثر مقاله در هر اجرا')
+    parser.add_argument('--engine', choices=['sync', 'async'], default='sync')
+    args = parser.parse_args()
+
+    runs = math.ceil(args.pages / args.per_run)
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(build_corpus(args.pages, 1)) as server:
+        output_dir = Path(tmp)
+        for run in range(1, runs + 1):
+            print(f"اجرای {run}: {run_once(server.base_url, output_dir, args.per_run, args.engine)} صفحه")
+        state = CrawlState(output_dir / 'data' / 'crawl_state.sqlite3')
+        stats = state.stats()
+        state.close()
+
+    print(f"وضعیت frontier: {stats}")
+    done = sum(stats.get(status, 0) for status in FETCHED)
+    if done < args.pages:
+        print(f"❌ پس از {runs} اجرا فقط {done} از {args.pages} URL دریافت شد")
+        sys.exit(1)
+    print(f"✅ هر {args.pages} URL در {runs} اجرا دریافت شد")
+
+
+if __name__ == '__main__':
+    main()
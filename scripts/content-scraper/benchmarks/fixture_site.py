@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+سایت آزمایشی محلی برای بنچمارک‌ها
+
+`build_corpus` از پاراگراف‌ها و عنوان‌های صفحات benchmarks/fixtures با seed
+ثابت یک مجموعه تکرارپذیر از مقالات، یک صفحه فهرست، تصاویر JPEG و نقشه سایت
+(sitemap index با یک نقشه فرزند gzip شده که در robots.txt اعلام شده) می‌سازد.
+`FixtureServer` این مجموعه را در یک پردازه جداگانه (تا هزینه سرور در زمان و
+حافظه بنچمارک حساب نشود) با HTTP/1.1 و keep-alive سرو می‌کند؛ تاخیر هر پاسخ،
+نوسان آن و درصد پاسخ‌های خطا قابل تنظیم است و صفحات HTML در صورت درخواست
+با gzip ارسال می‌شوند.
+"""
+
+import functools
+import gzip
+import html
+import io
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fast_extract import FastExtractor  # noqa: E402
+from text_normalizer import clean_text, clean_texts  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+# مسیر -> (content-type، بدنه)
+Corpus = Dict[str, Tuple[str, bytes]]
+
+SITE_KEYWORD = 'اسب'
+
+# در robots.txt و نقشه‌های سایت با آدرس سرور (از هدر Host) جایگزین می‌شود
+ORIGIN = '{origin}'
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """سرو فایل‌های یک پوشه بدون چاپ log هر درخواست"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: Path) -> Tuple[ThreadingHTTPServer, str]:
+    """سرو یک پوشه روی پورت آزاد در همین پردازه؛ (server، base_url)"""
+    handler = functools.partial(QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def fixture_texts(fixtures: Path) -> Tuple[List[str], List[str]]:
+    """(پاراگراف‌ها، عنوان‌ها) همه صفحات پوشه fixtures"""
+    extractor = FastExtractor(clean_text, clean_batch=clean_texts)
+    paragraphs: List[str] = []
+    titles: List[str] = []
+    for page in sorted(fixtures.glob('*.html')):
+        _, content = extractor.extract(page.read_text(encoding='utf-8'))
+        paragraphs.extend(content['paragraphs'])
+        titles.extend(heading['text'] for heading in content['headings'])
+    return paragraphs, titles
+
+
+def make_image(rng: random.Random, width: int, height: int) -> bytes:
+    """یک JPEG تصادفی (شکل‌های رنگی روی پس‌زمینه) با اندازه داده شده"""
+    img = Image.new('RGB', (width, height), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        w, h = rng.randrange(20, width // 2), rng.randrange(20, height // 2)
+        draw.ellipse((x, y, x + w, y + h), fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def build_corpus(pages: int = 200, images: int = 20, fixtures: Path = FIXTURES_DIR, seed: int = 42,
+                 image_size: Tuple[int, int] = (1280, 960)) -> Corpus:
+    """ساخت مقالات /articles/<n>.html، فهرست /articles/، تصاویر /images/<n>.jpg و robots.txt"""
+    paragraphs, titles = fixture_texts(fixtures)
+    if not paragraphs:
+        raise ValueError(f"هیچ پاراگرافی در {fixtures} یافت نشد")
+    titles = titles or [f'مقاله درباره {SITE_KEYWORD}']
+
+    rng = random.Random(seed)
+    corpus: Corpus = {
+        '/robots.txt': ('text/plain; charset=utf-8',
+                        f'User-agent: *\nAllow: /\nSitemap: {ORIGIN}/sitemap.xml\n'.encode('utf-8')),
+    }
+    for n in range(images):
+        corpus[f'/images/{n}.jpg'] = ('image/jpeg', make_image(rng, *image_size))
+
+    links = []
+    urls = []
+    updated = datetime(2024, 1, 1)
+    for n in range(pages):
+        # شماره در عنوان تا slug هر مقاله یکتا باشد
+        title = f"{SITE_KEYWORD} {rng.choice(titles).rstrip('.')} {n}"
+        body = ''.join(f'<p>{html.escape(text)}</p>'
+                       for text in rng.sample(paragraphs, min(len(paragraphs), rng.randint(4, 12))))
+        figures = ''.join(
+            f'<figure><img src="/images/{rng.randrange(images)}.jpg" alt="{html.escape(title)}"></figure>'
+            for _ in range(rng.randint(1, 3) if images else 0)
+        )
+        page = (
+            '<!DOCTYPE html><html lang="fa" dir="rtl"><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title>'
+            f'<meta name="description" content="{html.escape(body[3:160])}">'
+            f'<meta name="keywords" content="{SITE_KEYWORD}، سوارکاری">'
+            f'</head><body><article><h1>{html.escape(title)}</h1>{body}{figures}</article></body></html>'
+        )
+        corpus[f'/articles/{n}.html'] = ('text/html; charset=utf-8', page.encode('utf-8'))
+        links.append(f'<li><a href="/articles/{n}.html">{html.escape(title)}</a></li>')
+        updated += timedelta(hours=rng.randint(1, 48))
+        urls.append(f'<url><loc>{ORIGIN}/articles/{n}.html</loc><lastmod>{updated.date()}</lastmod></url>')
+
+    listing = (
+        '<!DOCTYPE html><html lang="fa" dir="rtl"><head><meta charset="utf-8"><title>مقالات</title></head>'
+        f'<body><ul>{"".join(links)}</ul></body></html>'
+    )
+    corpus['/articles/'] = ('text/html; charset=utf-8', listing.encode('utf-8'))
+
+    sitemap = ('<?xml version="1.0" encoding="UTF-8"?>'
+               f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{"".join(urls)}</urlset>')
+    index = ('<?xml version="1.0" encoding="UTF-8"?>'
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+             f'<sitemap><loc>{ORIGIN}/sitemaps/articles.xml.gz</loc><lastmod>{updated.date()}</lastmod></sitemap>'
+             '</sitemapindex>')
+    corpus['/sitemap.xml'] = ('application/xml', index.encode('utf-8'))
+    corpus['/sitemaps/articles.xml.gz'] = ('application/gzip', sitemap.encode('utf-8'))
+    return corpus
+
+
+def corpus_bytes(corpus: Corpus) -> int:
+    return sum(len(body) for _, body in corpus.values())
+
+
+def _make_handler(corpus: Corpus, latency: float, jitter: float, error_rate: float, error_status: int,
+                  seed: int):
+    # نسخه gzip صفحات متنی یک بار ساخته می‌شود؛ سندهای شامل ORIGIN هنگام پاسخ ساخته می‌شوند
+    templated = {path for path, (_, body) in corpus.items() if ORIGIN.encode() in body}
+    compressed = {path: gzip.compress(body, 6) for path, (content_type, body) in corpus.items()
+                  if content_type.startswith('text/') and path not in templated}
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                delay = max(0.0, latency + rng.uniform(-jitter, jitter))
+                failed = rng.random() < error_rate
+            if delay:
+                time.sleep(delay)
+
+            path = self.path.split('?', 1)[0]
+            if failed:
+                self._send(error_status, 'text/plain', b'', {'Retry-After': '0'} if error_status in (429, 503) else {})
+                return
+            entry = corpus.get(path)
+            if entry is None:
+                self._send(404, 'text/plain', b'not found')
+                return
+            content_type, body = entry
+            headers = {}
+            if path in templated:
+                body = body.replace(ORIGIN.encode(), f"http://{self.headers['Host']}".encode())
+                if content_type == 'application/gzip':
+                    body = gzip.compress(body, 6)
+            if path in compressed and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = compressed[path]
+                headers['Content-Encoding'] = 'gzip'
+            self._send(200, content_type, body, headers)
+
+        def _send(self, status: int, content_type: str, body: bytes, headers: Optional[Dict] = None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return FixtureHandler
+
+
+def _serve(corpus: Corpus, latency: float, jitter: float, error_rate: float, error_status: int, seed: int,
+           ready):
+    handler = _make_handler(corpus, latency, jitter, error_rate, error_status, seed)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    ready.send(server.server_address[1])
+    server.serve_forever()
+
+
+class FixtureServer:
+    """سرو corpus در یک پردازه جداگانه؛ latency و jitter به ثانیه"""
+
+    def __init__(self, corpus: Corpus, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, seed: int = 42):
+        self.corpus = corpus
+        self.options = (latency, jitter, error_rate, error_status, seed)
+        self.process: Optional[multiprocessing.Process] = None
+        self.base_url = ''
+
+    def start(self) -> str:
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(target=_serve, args=(self.corpus, *self.options, sender),
+                                               daemon=True)
+        self.process.start()
+        self.base_url = f"http://127.0.0.1:{receiver.recv()}"
+        return self.base_url
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self) -> 'FixtureServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
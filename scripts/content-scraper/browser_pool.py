@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool مرورگرهای headless (Chrome) برای رندر صفحات JavaScript-heavy
+
+N مرورگر هر کدام در thread خودش کار می‌کنند و URL ها را از یک صف مشترک
+برمی‌دارند؛ نتیجه هر درخواست یک Future با HTML نهایی صفحه است. هر مرورگر پس
+از `max_pages` صفحه یا پس از خطای WebDriver (crash، قطع session، timeout)
+بسته و با یک نمونه تازه جایگزین می‌شود تا حافظه Chrome بی‌حد رشد نکند.
+
+به جای sleep ثابت، پس از اسکرول تا انتهای صفحه صبر می‌شود تا DOM و
+درخواست‌های شبکه (resource timing) به مدت `quiet_ms` تغییری نکنند
+(حداکثر `settle_timeout` ثانیه). یک watchdog مرورگری را که بیش از حد روی یک
+صفحه مانده متوقف می‌کند تا یک صفحه گیر کرده کل اجرا را متوقف نکند.
+
+حالت lean (پیش‌فرض): فقط page_source خوانده می‌شود و تصاویر جداگانه دانلود
+می‌شوند، پس تصاویر، ویدیو/صدا، فونت‌ها و دامنه‌های تبلیغات و آمار با CDP
+`Network.setBlockedURLs` مسدود می‌شوند و منتظر رویداد load نمی‌مانیم
+(`pageLoadStrategy=eager`). حالت برای هر صفحه جداگانه قابل انتخاب است.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# الگوهای URL مسدود در حالت lean (تصویر، ویدیو/صدا، فونت)؛ پسوند در انتهای
+# مسیر یا پیش از query string، تا نام دامنه‌ای مثل png.example.com مسدود نشود
+LEAN_BLOCKED_PATTERNS = tuple(
+    pattern
+    for ext in (
+        'jpg', 'jpeg', 'png', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp',
+        'mp4', 'webm', 'mp3', 'ogg', 'wav', 'm3u8',
+        'woff', 'woff2', 'ttf', 'otf', 'eot',
+    )
+    for pattern in (f'*.{ext}', f'*.{ext}?*')
+)
+
+# دامنه‌های تبلیغات، آمار و شبکه‌های اجتماعی که در حالت lean بارگذاری نمی‌شوند
+DEFAULT_BLOCKED_DOMAINS = (
+    'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com', 'doubleclick.net',
+    'facebook.net', 'connect.facebook.net', 'hotjar.com', 'clarity.ms', 'yandex.ru',
+    'yektanet.com', 'mediaad.org', 'addthis.com', 'sharethis.com', 'disqus.com',
+)
+
+# صبر تا ثابت شدن DOM و شبکه: هر تغییر DOM یا پایان دریافت یک resource
+# شمارنده سکوت را از نو شروع می‌کند؛ در حالت کامل منتظر رویداد load هم
+# می‌ماند. خروجی: مدت صبر (میلی‌ثانیه)
+_SETTLE_SCRIPT = """
+var quietMs = arguments[0], maxMs = arguments[1], waitLoad = arguments[2];
+var done = arguments[arguments.length - 1];
+var start = Date.now(), last = start;
+if (performance.setResourceTimingBufferSize) { performance.setResourceTimingBufferSize(10000); }
+var resources = performance.getEntriesByType('resource').length;
+var observer = new MutationObserver(function () { last = Date.now(); });
+observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+(function check() {
+    var now = Date.now();
+    var count = performance.getEntriesByType('resource').length;
+    if (count !== resources) { resources = count; last = now; }
+    var loaded = !waitLoad || document.readyState === 'complete';
+    if ((loaded && now - last >= quietMs) || now - start >= maxMs) {
+        observer.disconnect();
+        done(now - start);
+        return;
+    }
+    setTimeout(check, 100);
+})();
+"""
+
+_STOP = object()
+
+
+def chrome_options(headless: bool = True) -> Options:
+    """تنظیمات پیش‌فرض Chrome برای اسکرپ"""
+    options = Options()
+    # driver.get پس از DOMContentLoaded برمی‌گردد؛ صبر بیشتر در _SETTLE_SCRIPT انجام می‌شود
+    options.page_load_strategy = 'eager'
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument(f'user-agent={USER_AGENT}')
+    options.add_argument('--lang=fa-IR')
+    options.add_argument('--mute-audio')
+    options.add_experimental_option('prefs', {
+        'profile.default_content_setting_values.notifications': 2,
+        'profile.default_content_setting_values.geolocation': 2,
+        'profile.managed_default_content_settings.media_stream': 2,
+    })
+    return options
+
+
+def blocked_patterns(lean: bool, domains: Iterable[str] = ()) -> Tuple[str, ...]:
+    """الگوهای Network.setBlockedURLs برای یک صفحه"""
+    if not lean:
+        return ()
+    return LEAN_BLOCKED_PATTERNS + tuple(f'*://*{domain}/*' for domain in domains)
+
+
+class BrowserPool:
+    """N مرورگر قابل استفاده مجدد با صف کار، بازیافت مرورگر و watchdog"""
+
+    def __init__(self, size: int = 2, max_pages: int = 50, headless: bool = True,
+                 page_timeout: float = 30, settle_timeout: float = 10, quiet_ms: int = 500,
+                 rate_limiter=None, lean: bool = True,
+                 blocked_domains: Iterable[str] = DEFAULT_BLOCKED_DOMAINS,
+                 options_factory: Optional[Callable[[], Options]] = None):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.page_timeout = page_timeout
+        self.settle_timeout = settle_timeout
+        self.quiet_ms = quiet_ms
+        # RateLimiter اختیاری؛ هر مرورگر پیش از باز کردن صفحه نوبت میزبان را می‌گیرد
+        self.rate_limiter = rate_limiter
+        # حالت پیش‌فرض صفحات و دامنه‌های مسدود در حالت lean
+        self.lean = lean
+        self.blocked_domains = tuple(blocked_domains)
+        self.options_factory = options_factory or (lambda: chrome_options(headless))
+        # سقف کل زمان یک صفحه؛ پس از آن watchdog مرورگر را متوقف می‌کند
+        self.hard_timeout = page_timeout + settle_timeout + 15
+
+        self._queue: queue.Queue = queue.Queue(maxsize=self.size * 2)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        # مرورگر در حال کار هر worker و زمان شروع صفحه فعلی آن
+        self._busy: Dict[int, tuple] = {}
+        # worker هایی که مرورگرشان توسط watchdog متوقف شده (صفحه دوباره تلاش نمی‌شود)
+        self._killed: set = set()
+        self._stopping = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+        self.pages = 0
+        self.failed = 0
+        self.recycled = 0
+        self.crashes = 0
+        self.killed = 0
+        self.settle_seconds = 0.0
+        self.render_seconds = 0.0
+        self.lean_pages = 0
+
+    def new_driver(self) -> webdriver.Chrome:
+        """راه‌اندازی یک مرورگر تازه"""
+        driver = webdriver.Chrome(options=self.options_factory())
+        driver.set_page_load_timeout(self.page_timeout)
+        driver.set_script_timeout(self.settle_timeout + 5)
+        # setBlockedURLs فقط با فعال بودن دامنه Network اعمال می‌شود
+        driver.execute_cdp_cmd('Network.enable', {})
+        return driver
+
+    def _try_new_driver(self) -> Optional[webdriver.Chrome]:
+        try:
+            return self.new_driver()
+        except Exception as e:
+            print(f"⚠️  خطا در راه‌اندازی ChromeDriver: {e}")
+            return None
+
+    def start(self) -> bool:
+        """راه‌اندازی همزمان مرورگرها؛ اگر هیچ مرورگری بالا نیاید False"""
+        if self._threads:
+            return True
+        with ThreadPoolExecutor(self.size) as executor:
+            drivers = [driver for driver in executor.map(lambda _: self._try_new_driver(), range(self.size))
+                       if driver is not None]
+        if not drivers:
+            print("💡 لطفاً ChromeDriver را نصب کنید یا از content_scraper.py استفاده کنید")
+            return False
+
+        for i, driver in enumerate(drivers):
+            thread = threading.Thread(target=self._worker, args=(i, driver), name=f'browser-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._watchdog = threading.Thread(target=self._watch, name='browser-watchdog', daemon=True)
+        self._watchdog.start()
+        print(f"🌐 {len(drivers)} مرورگر آماده است")
+        return True
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def submit(self, url: str, lean: Optional[bool] = None, block_domains: Iterable[str] = (),
+               throttle: bool = True) -> Future:
+        """قرار دادن URL در صف؛ Future نتیجه HTML رندر شده را برمی‌گرداند
+
+        lean=None یعنی حالت پیش‌فرض pool؛ block_domains به فهرست دامنه‌های
+        مسدود همین صفحه اضافه می‌شود. اگر صف پر باشد، فراخواننده تا آزاد
+        شدن جا منتظر می‌ماند. throttle=False یعنی فراخواننده نوبت میزبان را
+        از rate_limiter گرفته است.
+        """
+        lean = self.lean if lean is None else lean
+        patterns = blocked_patterns(lean, self.blocked_domains + tuple(block_domains))
+        future: Future = Future()
+        self._queue.put((url, lean, patterns, throttle, future))
+        return future
+
+    def render(self, url: str, lean: Optional[bool] = None, block_domains: Iterable[str] = (),
+               throttle: bool = True) -> str:
+        """رندر یک صفحه (blocking)"""
+        return self.submit(url, lean, block_domains, throttle).result()
+
+    def _render(self, driver: webdriver.Chrome, url: str, lean: bool) -> str:
+        started = time.monotonic()
+        driver.get(url)
+        # اسکرول برای بارگذاری محتوای lazy-loaded و سپس صبر تا ثابت شدن صفحه
+        driver.execute_script("window.scrollTo(0, document.body ? document.body.scrollHeight : 0);")
+        waited = driver.execute_async_script(_SETTLE_SCRIPT, self.quiet_ms, int(self.settle_timeout * 1000),
+                                             not lean)
+        html = driver.page_source
+        with self._lock:
+            self.settle_seconds += (waited or 0) / 1000
+            self.render_seconds += time.monotonic() - started
+            self.lean_pages += lean
+        return html
+
+    def _recycle(self, driver: Optional[webdriver.Chrome]) -> Optional[webdriver.Chrome]:
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        with self._lock:
+            self.recycled += 1
+        return self._try_new_driver()
+
+    def _worker(self, worker_id: int, driver: Optional[webdriver.Chrome]):
+        pages = 0
+        # الگوهای مسدود اعمال شده روی مرورگر فعلی (None: هنوز اعمال نشده)
+        applied: Optional[Tuple[str, ...]] = None
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            url, lean, patterns, throttle, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            html = None
+            error: Optional[BaseException] = None
+            try:
+                if throttle and self.rate_limiter is not None:
+                    self.rate_limiter.acquire(url)
+
+                # پس از crash یک بار با مرورگر تازه دوباره تلاش می‌شود؛ timeout و صفحه
+                # گیر کرده تکرار نمی‌شوند
+                for attempt in range(2):
+                    if driver is None or pages >= self.max_pages:
+                        driver = self._recycle(driver)
+                        pages = 0
+                        applied = None
+                    if driver is None:
+                        error = RuntimeError('مرورگر در دسترس نیست')
+                        break
+
+                    with self._lock:
+                        self._busy[worker_id] = (driver, time.monotonic())
+                    try:
+                        if patterns != applied:
+                            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+                            applied = patterns
+                        html = self._render(driver, url, lean)
+                        pages += 1
+                        error = None
+                        break
+                    except TimeoutException as e:
+                        error = e
+                        driver = self._recycle(driver)
+                        pages = 0
+                        applied = None
+                        break
+                    except WebDriverException as e:
+                        error = e
+                        with self._lock:
+                            killed = worker_id in self._killed
+                            self._killed.discard(worker_id)
+                            if not killed:
+                                self.crashes += 1
+                        driver = self._recycle(driver)
+                        pages = 0
+                        applied = None
+                        if killed:
+                            break
+                    except Exception as e:
+                        # مثلاً خطای اتصال urllib3 پس از متوقف شدن مرورگر توسط watchdog
+                        error = e
+                        with self._lock:
+                            self._killed.discard(worker_id)
+                        driver = self._recycle(driver)
+                        pages = 0
+                        applied = None
+                        break
+                    finally:
+                        with self._lock:
+                            self._busy.pop(worker_id, None)
+            except Exception as e:
+                error = e
+            finally:
+                # Future همیشه تعیین تکلیف می‌شود تا render() و صف pool گیر نکنند
+                with self._lock:
+                    if error is None:
+                        self.pages += 1
+                    else:
+                        self.failed += 1
+                if error is None:
+                    future.set_result(html)
+                else:
+                    future.set_exception(error)
+
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def _watch(self):
+        """متوقف کردن مرورگری که بیش از hard_timeout روی یک صفحه مانده است"""
+        while not self._stopping.wait(1.0):
+            now = time.monotonic()
+            with self._lock:
+                stuck = [(worker_id, driver) for worker_id, (driver, started) in self._busy.items()
+                         if now - started > self.hard_timeout and worker_id not in self._killed]
+                self._killed.update(worker_id for worker_id, _ in stuck)
+            for _, driver in stuck:
+                print("⏱️  مرورگر روی یک صفحه گیر کرده است؛ بازیافت می‌شود")
+                with self._lock:
+                    self.killed += 1
+                try:
+                    # با توقف chromedriver دستور در حال اجرای worker خطا می‌دهد و مرورگر بازیافت می‌شود
+                    driver.service.stop()
+                except Exception:
+                    pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'browsers': self.size,
+                'pages': self.pages,
+                'failed': self.failed,
+                'recycled': self.recycled,
+                'crashes': self.crashes,
+                'killed': self.killed,
+                'lean_pages': self.lean_pages,
+                'avg_settle': self.settle_seconds / self.pages if self.pages else 0.0,
+                'avg_render': self.render_seconds / self.pages if self.pages else 0.0,
+            }
+
+    def close(self):
+        """پایان کارهای صف و بستن همه مرورگرها"""
+        if not self._threads:
+            return
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._stopping.set()
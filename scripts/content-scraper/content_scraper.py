@@ -6,21 +6,37 @@
 """
 
 import os
-import re
-import json
-import time
+import argparse
+import tempfile
 import requests
 from urllib.parse import urljoin, urlparse
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from bs4 import BeautifulSoup
 import hashlib
 from PIL import Image
-import io
+from image_pipeline import ImageDownloadPipeline, pending_refs
+from image_processor import ImageProcessor
+from image_store import ImageStore
+from http_cache import HttpCache
+from fast_extract import FastExtractor, parse_html
+import main_content
+import text_normalizer
+from crawl_state import CrawlState, DUPLICATE, FAILED, NOT_MODIFIED
+from discovery import SitemapDiscovery, is_article
+from fetch_router import FetchRouter
+from metrics import STAGES, Metrics, wire_bytes
+from near_duplicates import NearDuplicateIndex
+from rate_limiter import RateLimiter
+from robots import RobotsCache
+from records_io import JsonlWriter, iter_records, write_records
+from sql_export import SQL_FORMATS, write_sql
+from transport import Transport
 
 class ContentScraper:
-    def __init__(self, output_dir: str = "scraped_content"):
+    def __init__(self, output_dir: str = "scraped_content", image_workers: int = 4, use_cache: bool = True,
+                 use_state: bool = True, use_dedup: bool = True, use_router: bool = True):
         self.output_dir = Path(output_dir)
         self.images_dir = self.output_dir / "images"
         self.data_dir = self.output_dir / "data"
@@ -34,12 +50,17 @@ class ContentScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'fa-IR,fa;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
         }
         
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # session با pool اتصال صریح برای هر میزبان، retry با backoff و Retry-After
+        # و Accept-Encoding متناسب با decoder های نصب شده (transport.py)؛
+        # هر میزبان به اندازه یک صفحه و worker های دانلود تصویر اتصال دارد
+        self.metrics = Metrics()
+        self.report_path = self.data_dir / 'run_report.json'
+        self.prometheus_path: Optional[Path] = None
+        self.transport = Transport(self.headers, per_host=1 + image_workers, metrics=self.metrics)
+        self.session = self.transport.session
         
         # لیست سایت‌های فارسی مرتبط با اسب
         self.target_sites = [
@@ -55,36 +76,135 @@ class ContentScraper:
                 'search_paths': ['/news', '/articles'],
                 'keywords': ['اسب', 'سوارکاری', 'مسابقات']
             },
-            # می‌توانید سایت‌های بیشتری اضافه کنید
+            # می‌توانید سایت‌های بیشتری اضافه کنید؛ کلیدهای اختیاری کشف مقالات:
+            # 'sitemaps': [...] (به جای Sitemap های robots.txt)، 'feeds': [...] (فیدهای RSS/Atom)
+            # و 'article_paths': [...] (مسیر مقالات در نقشه سایت؛ پیش‌فرض search_paths)؛
+            # کلیدهای اختیاری رندر با مرورگر:
+            # 'use_selenium': True/False، 'lean_render': False (بارگذاری کامل تصاویر و فونت‌ها)
+            # و 'block_domains': [...] (دامنه‌های مسدود اضافه در حالت lean)؛
+            # 'max_connections': N حداکثر درخواست همزمان صفحات این سایت (اندازه pool اتصال)
         ]
         
+        # موتور استخراج: 'lxml' (یک پیمایش درخت) یا 'html.parser' (BeautifulSoup)
+        self.html_parser = 'lxml'
+        self.fast_extractor = FastExtractor(self.clean_text, clean_batch=self.clean_texts)
+        # فقط بدنه اصلی مقاله (بدون منو، فوتر، ستون کناری و ویجت‌ها)؛ اطمینان تشخیص
+        # در فیلد content_confidence رکورد ثبت می‌شود
+        self.main_content = True
+        
+        # نرخ درخواست هر میزبان: از فاصله اولیه `delay` ثانیه شروع می‌شود و با
+        # پاسخ‌های سالم، 429/503، افزایش زمان پاسخ و Crawl-delay تنظیم می‌شود
+        self.rate_limiter = RateLimiter(delay=2.0)
+        self.session.hooks['response'].append(self.rate_limiter.on_response)
+        
+        # قوانین robots.txt هر میزبان (ذخیره شده با TTL در data/robots.sqlite3)؛
+        # URL های ممنوع به frontier اضافه و دریافت نمی‌شوند
+        self.robots = RobotsCache(self.data_dir / 'robots.sqlite3', self.session, self.headers['User-Agent'])
+        
+        # حداکثر تعداد مقاله‌ای که در هر اجرا از هر سایت دریافت می‌شود
+        self.max_articles_per_site = 20
+        
         self.scraped_urls = set()
         self.scraped_content = []
+        self.scraped_count = 0
+        
+        # رکوردها در طول اجرا به scraped_content.jsonl اضافه و flush می‌شوند؛
+        # output_format='json' در پایان آرایه scraped_content.json را هم می‌سازد.
+        # با keep_records=False رکوردها در حافظه نگه داشته نمی‌شوند.
+        self.output_format = 'json'
+        self.keep_records = True
+        self.records_writer: Optional[JsonlWriter] = None
+        
+        # قالب فایل SQL: copy (COPY FROM stdin) یا insert (INSERT چند ردیفی با sql_batch_size ردیف)
+        self.sql_format = 'copy'
+        self.sql_batch_size = 500
+        
+        # وضعیت پایدار پیمایش (frontier)؛ در حالت delta فقط URL های جدید یا
+        # URL هایی که از آخرین دریافتشان بیش از refresh_after گذشته دریافت می‌شوند
+        self.crawl_state: Optional[CrawlState] = None
+        if use_state:
+            self.crawl_state = CrawlState(self.data_dir / 'crawl_state.sqlite3')
+        self.delta = False
+        self.refresh_after = timedelta(days=7)
+        
+        # کش HTTP پایدار برای درخواست‌های شرطی (ETag / Last-Modified)
+        self.http_cache: Optional[HttpCache] = None
+        if use_cache:
+            self.http_cache = HttpCache(self.data_dir / 'http_cache.sqlite3')
+        
+        # index پایدار SimHash برای رد کردن محتوای تقریباً تکراری (قبل از دانلود تصاویر)
+        self.near_duplicates: Optional[NearDuplicateIndex] = None
+        if use_dedup:
+            self.near_duplicates = NearDuplicateIndex(self.data_dir / 'near_duplicates.sqlite3')
+        
+        # کشف مقالات از نقشه سایت و فیدها؛ صفحات فهرست (search_paths) فقط وقتی
+        # خوانده می‌شوند که سایت نقشه یا فید مرتبطی نداشته باشد
+        self.use_discovery = True
+        self.discovery = SitemapDiscovery(self.session, rate_limiter=self.rate_limiter, metrics=self.metrics,
+                                          crawl_state=self.crawl_state)
+        
+        # دریافت با requests و رندر با مرورگر فقط برای سایت‌هایی که بدون JavaScript محتوا ندارند
+        self.fetch_router: Optional[FetchRouter] = None
+        if use_router:
+            self.fetch_router = FetchRouter(self.data_dir / 'fetch_router.sqlite3', rate_limiter=self.rate_limiter,
+                                            metrics=self.metrics)
         
+        # مخزن تصاویر بر اساس SHA-256 محتوا (images/<sha[:2]>/<sha>.<ext>) با تشخیص نسخه‌های مشابه
+        self.image_store = ImageStore(self.images_dir, self.data_dir / 'image_store.sqlite3')
+        
+        # محدودیت‌های دانلود تصویر
+        self.max_image_bytes = 15 * 1024 * 1024
+        self.max_image_size = 1920
+        
+        # صف دانلود تصاویر؛ تا زمان start_image_pipeline تصاویر درجا دانلود می‌شوند
+        self.image_workers = image_workers
+        self.image_pipeline: Optional[ImageDownloadPipeline] = None
+        
+        # مرحله ساخت نسخه‌های WebP/AVIF (thumb/card/full) روی process pool
+        self.image_variants = True
+        self.image_avif = False
+        self.image_processes: Optional[int] = None
+        self.image_processor: Optional[ImageProcessor] = None
+        
+    @property
+    def delay(self) -> float:
+        """فاصله اولیه (ثانیه) بین دو درخواست متوالی به یک میزبان"""
+        return self.rate_limiter.delay
+    
+    @delay.setter
+    def delay(self, value: float):
+        self.rate_limiter.delay = value
+    
     def check_robots_txt(self, base_url: str) -> bool:
-        """بررسی robots.txt برای رعایت قوانین"""
-        try:
-            robots_url = urljoin(base_url, '/robots.txt')
-            response = self.session.get(robots_url, timeout=10)
-            if response.status_code == 200:
-                # بررسی ساده - در production باید کامل‌تر باشد
-                return True
-        except:
-            pass
-        return True  # در صورت عدم دسترسی، ادامه می‌دهیم
+        """بررسی robots.txt سایت؛ False اگر کل سایت ممنوع باشد
+
+        Crawl-delay حداقل فاصله درخواست‌های این میزبان می‌شود.
+        """
+        rules = self.robots.rules(base_url)
+        self.rate_limiter.set_crawl_delay(base_url, rules.crawl_delay)
+        return not rules.blocks_site()
     
     def clean_text(self, text: str) -> str:
         """پاکسازی و نرمال‌سازی متن فارسی"""
-        if not text:
-            return ""
+        return text_normalizer.clean_text(text)
+    
+    def clean_texts(self, texts: List[str]) -> List[str]:
+        """پاکسازی دسته‌ای چند متن در یک فراخوانی"""
+        return text_normalizer.clean_texts(texts)
+    
+    def extract_page(self, html: str) -> Tuple[Dict, Dict]:
+        """استخراج (meta_data, content) از HTML با موتور انتخاب شده"""
+        if self.html_parser == 'lxml':
+            with self.metrics.span('parse'):
+                root = parse_html(html)
+            with self.metrics.span('extract'):
+                self.fast_extractor.main_content = self.main_content
+                return self.fast_extractor.extract_tree(root)
         
-        # حذف فاصله‌های اضافی
-        text = re.sub(r'\s+', ' ', text)
-        # حذف کاراکترهای خاص
-        text = re.sub(r'[^\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFFa-zA-Z0-9\s.,!?;:()\-]', '', text)
-        # نرمال‌سازی فاصله‌ها
-        text = text.strip()
-        return text
+        with self.metrics.span('parse'):
+            soup = BeautifulSoup(html, self.html_parser)
+        with self.metrics.span('extract'):
+            return self.extract_meta_tags(soup), self.extract_content(soup)
     
     def extract_meta_tags(self, soup: BeautifulSoup) -> Dict:
         """استخراج Meta Tags برای SEO"""
@@ -134,11 +254,20 @@ class ContentScraper:
             'paragraphs': [],
             'images': [],
             'links': [],
+            'confidence': None,
         }
         
+        # فقط عناصر بدنه اصلی مقاله (main_content.py)
+        if self.main_content:
+            nodes = main_content.soup_nodes(soup)
+            body, pruned, content['confidence'] = main_content.find_main_content(nodes, main_content.soup_text)
+            tags = list(main_content.iter_soup(body, pruned))
+        else:
+            tags = soup.find_all(True)
+        
         # استخراج headings (H1-H6)
         for i in range(1, 7):
-            headings = soup.find_all(f'h{i}')
+            headings = [tag for tag in tags if tag.name == f'h{i}']
             for heading in headings:
                 text = self.clean_text(heading.get_text())
                 if text:
@@ -148,17 +277,17 @@ class ContentScraper:
                     })
         
         # استخراج paragraphs
-        paragraphs = soup.find_all('p')
+        paragraphs = [tag for tag in tags if tag.name == 'p']
         for p in paragraphs:
             text = self.clean_text(p.get_text())
             if text and len(text) > 20:  # فقط پاراگراف‌های با محتوا
                 content['paragraphs'].append(text)
         
-        # استخراج تصاویر
-        images = soup.find_all('img')
+        # استخراج تصاویر (بدون آیکون‌ها و پیکسل‌های ردیابی)
+        images = [tag for tag in tags if tag.name == 'img']
         for img in images:
             src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-            if src:
+            if src and not main_content.is_tiny_image(img.get('width'), img.get('height')):
                 alt = img.get('alt', '')
                 content['images'].append({
                     'url': src,
@@ -167,7 +296,7 @@ class ContentScraper:
                 })
         
         # استخراج لینک‌ها
-        links = soup.find_all('a', href=True)
+        links = [tag for tag in tags if tag.name == 'a' and tag.get('href')]
         for link in links:
             href = link.get('href')
             text = self.clean_text(link.get_text())
@@ -179,77 +308,180 @@ class ContentScraper:
         
         return content
     
+    def optimize_image(self, image_path: Path) -> None:
+        """کوچک کردن تصاویر بزرگ‌تر از max_image_size بدون decode کامل
+
+        برای JPEG با draft() تصویر مستقیماً در مقیاس کوچک‌تر (1/2، 1/4، 1/8)
+        decode می‌شود، بنابراین عکس‌های خیلی بزرگ هرگز با رزولوشن کامل در حافظه قرار نمی‌گیرند.
+        """
+        with self.metrics.span('image_resize'):
+            max_size = (self.max_image_size, self.max_image_size)
+        
+            with Image.open(image_path) as img:
+                if img.width <= self.max_image_size and img.height <= self.max_image_size:
+                    return
+            
+                image_format = img.format
+                if image_format == 'JPEG':
+                    img.draft('RGB', max_size)
+                img.thumbnail(max_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+            
+                tmp_path = image_path.with_name(image_path.name + '.resized')
+                img.save(tmp_path, format=image_format, optimize=True, quality=85)
+        
+            os.replace(tmp_path, image_path)
+    
     def download_image(self, image_url: str, base_url: str) -> Optional[str]:
-        """دانلود و ذخیره تصویر"""
+        """دانلود و ذخیره تصویر به صورت stream (بدون نگه‌داشتن کل فایل در حافظه)
+
+        فایل با SHA-256 محتوایش در image_store ذخیره می‌شود؛ تصویری که قبلاً از
+        همین URL، با همین بایت‌ها یا به صورت نسخه مشابه ذخیره شده دوباره ذخیره نمی‌شود.
+        """
+        tmp_path = None
         try:
             # تبدیل URL نسبی به مطلق
             if not image_url.startswith('http'):
                 image_url = urljoin(base_url, image_url)
             
             # بررسی اینکه قبلاً دانلود نشده باشد
-            url_hash = hashlib.md5(image_url.encode()).hexdigest()
-            image_ext = Path(urlparse(image_url).path).suffix or '.jpg'
-            image_filename = f"{url_hash}{image_ext}"
-            image_path = self.images_dir / image_filename
-            
-            if image_path.exists():
-                return str(image_path.relative_to(self.output_dir))
+            stored_path = self.image_store.lookup_url(image_url)
+            if stored_path:
+                self.metrics.count(image_url, 'cache_hits')
+                return stored_path
             
             # دانلود تصویر
-            response = self.session.get(image_url, timeout=30, stream=True)
-            if response.status_code == 200:
+            with self.metrics.span('image_download'), \
+                    self.session.get(image_url, timeout=30, stream=True) as response:
+                if response.status_code != 200:
+                    return None
+                
                 # بررسی نوع فایل
                 content_type = response.headers.get('content-type', '')
                 if 'image' not in content_type:
                     return None
                 
-                # ذخیره تصویر
-                image_data = response.content
-                with open(image_path, 'wb') as f:
-                    f.write(image_data)
-                
-                # بررسی و بهینه‌سازی تصویر
-                try:
-                    img = Image.open(io.BytesIO(image_data))
-                    # اگر تصویر خیلی بزرگ است، resize کنیم
-                    if img.width > 1920 or img.height > 1920:
-                        img.thumbnail((1920, 1920), Image.Resampling.LANCZOS)
-                        img.save(image_path, optimize=True, quality=85)
-                except:
-                    pass
+                # رد کردن فایل‌های خیلی بزرگ قبل از دانلود
+                content_length = response.headers.get('content-length')
+                if content_length and content_length.isdigit() and int(content_length) > self.max_image_bytes:
+                    print(f"⚠️  تصویر خیلی بزرگ است ({content_length} بایت): {image_url}")
+                    return None
                 
-                return str(image_path.relative_to(self.output_dir))
+                # نوشتن تکه‌تکه در فایل موقت
+                fd, tmp_name = tempfile.mkstemp(dir=self.images_dir, suffix='.part')
+                tmp_path = Path(tmp_name)
+                received = 0
+                digest = hashlib.sha256()
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        received += len(chunk)
+                        if received > self.max_image_bytes:
+                            print(f"⚠️  تصویر از حداکثر حجم مجاز بزرگ‌تر است: {image_url}")
+                            return None
+                        digest.update(chunk)
+                        f.write(chunk)
+                self.metrics.count(image_url, 'bytes', wire_bytes(response, received))
+            
+            # انتقال به مخزن؛ بهینه‌سازی فقط برای تصاویر جدید انجام می‌شود
+            stored_path = self.image_store.add(image_url, tmp_path, digest.hexdigest(), prepare=self.optimize_image)
+            tmp_path = None
+            return stored_path
         except Exception as e:
             print(f"خطا در دانلود تصویر {image_url}: {e}")
+        finally:
+            if tmp_path is not None and tmp_path.exists():
+                tmp_path.unlink()
         
         return None
     
-    def scrape_page(self, url: str) -> Optional[Dict]:
-        """اسکرپ یک صفحه"""
-        if url in self.scraped_urls:
-            return None
+    def fetch(self, url: str, timeout: int = 30, throttle: bool = True,
+              skip_unchanged: bool = True) -> Optional[requests.Response]:
+        """دریافت یک URL؛ تمام درخواست‌های صفحه از این نقطه عبور می‌کنند
+
+        اگر صفحه از اجرای قبلی تغییر نکرده باشد (304 یا بدنه یکسان) None برمی‌گرداند.
+        با skip_unchanged=False (صفحات فهرست) بدنه پاسخ در کش ذخیره می‌شود و صفحه
+        تغییر نکرده هم با همان بدنه برگردانده می‌شود.
+        با throttle=False نوبت میزبان قبلاً توسط فراخواننده گرفته شده است.
+        """
+        if throttle:
+            self.metrics.observe('throttle', self.rate_limiter.acquire(url))
         
-        try:
-            print(f"در حال اسکرپ: {url}")
-            response = self.session.get(url, timeout=30)
-            
-            if response.status_code != 200:
+        # URL هایی که هنوز رکوردی ندارند باید کامل دریافت شوند
+        force = skip_unchanged and self.crawl_state is not None and self.crawl_state.needs_body(url)
+        # درخواست شرطی صفحه فهرست فقط وقتی بدنه آن در کش هست (برای پاسخ 304)
+        cached = self.http_cache.cached_body(url) if self.http_cache and not skip_unchanged else None
+        
+        headers = {}
+        if self.http_cache and not force and (skip_unchanged or cached is not None):
+            headers = self.http_cache.conditional_headers(url)
+        with self.metrics.span('fetch'):
+            response = self.session.get(url, timeout=timeout, headers=headers)
+        self.metrics.count(url, 'bytes', wire_bytes(response, len(response.content)))
+        
+        if response.status_code == 304 and self.http_cache:
+            self.metrics.count(url, 'cache_hits')
+            self.http_cache.mark_not_modified(url)
+            if cached is None:
+                if self.crawl_state:
+                    self.crawl_state.mark(url, NOT_MODIFIED)
                 return None
-            
-            # بررسی encoding
+            response.status_code = 200
+            response._content = cached
+        elif response.status_code != 200:
+            if self.crawl_state:
+                self.crawl_state.mark(url, FAILED)
+            return None
+        elif (self.http_cache and not self.http_cache.store(url, response, keep_body=not skip_unchanged)
+                and skip_unchanged and not force):
+            self.metrics.count(url, 'cache_hits')
+            if self.crawl_state:
+                self.crawl_state.mark(url, NOT_MODIFIED)
+            return None
+        
+        # بررسی encoding
+        with self.metrics.span('decode'):
             response.encoding = response.apparent_encoding or 'utf-8'
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # استخراج Meta Tags
-            meta_data = self.extract_meta_tags(soup)
-            
-            # استخراج محتوا
-            content = self.extract_content(soup)
-            
-            # دانلود تصاویر
+        return response
+    
+    def fetch_html(self, url: str, throttle: bool = True) -> Optional[str]:
+        """HTML یک مقاله: با requests، یا با مرورگر اگر سایت بدون JavaScript محتوایی ندارد"""
+        if self.fetch_router and self.fetch_router.use_browser(url):
+            # pool مرورگرها نوبت میزبان را از rate_limiter می‌گیرد، مگر فراخواننده
+            # (مثلاً AsyncCrawlEngine) آن را گرفته باشد
+            return self.fetch_router.render(url, throttle=throttle)
+        
+        response = self.fetch(url, throttle=throttle)
+        if response is None:
+            return None
+        if self.fetch_router:
+            return self.fetch_router.route(url, response.text)
+        return response.text
+    
+    def parse_page(self, url: str, html: str) -> Optional[Dict]:
+        """تبدیل HTML یک مقاله به رکورد خروجی (مرحله پردازش، بدون شبکه به جز تصاویر)
+
+        برای محتوای تقریباً تکراری None برمی‌گرداند.
+        """
+        meta_data, content = self.extract_page(html)
+        
+        # ترکیب محتوا
+        full_text = ' '.join([p for p in content['paragraphs']])
+        
+        if self.near_duplicates is not None:
+            with self.metrics.span('dedup'):
+                duplicate_of = self.near_duplicates.check_and_add(url, full_text)
+            if duplicate_of:
+                print(f"⏭️  محتوای تکراری (مشابه {duplicate_of}): {url}")
+                if self.crawl_state:
+                    self.crawl_state.mark(url, DUPLICATE)
+                return None
+        
+        # دانلود تصاویر (حداکثر 10 تصویر)
+        if self.image_pipeline:
+            # فقط ارجاع pending ثبت می‌شود؛ دانلود در صف تصاویر انجام می‌شود
+            downloaded_images = pending_refs(content['images'], limit=10)
+        else:
             downloaded_images = []
-            for img_info in content['images'][:10]:  # حداکثر 10 تصویر
+            for img_info in content['images'][:10]:
                 img_path = self.download_image(img_info['url'], url)
                 if img_path:
                     downloaded_images.append({
@@ -257,90 +489,196 @@ class ContentScraper:
                         'alt': img_info['alt'],
                         'title': img_info['title']
                     })
+        
+        # ایجاد slug از title
+        title = meta_data['title'] or (content['headings'][0]['text'] if content['headings'] else 'بدون عنوان')
+        slug = self.create_slug(title)
+        
+        record = {
+            'id': hashlib.md5(url.encode()).hexdigest()[:12],
+            'url': url,
+            'slug': slug,
+            'title': title,
+            'meta_description': meta_data['description'],
+            'meta_keywords': meta_data['keywords'],
+            'content': full_text,
+            'excerpt': full_text[:300] + '...' if len(full_text) > 300 else full_text,
+            'headings': content['headings'],
+            'images': downloaded_images,
+            'content_confidence': content['confidence'],
+            'scraped_at': datetime.now().isoformat(),
+            'source': urlparse(url).netloc,
+        }
+        
+        if self.image_pipeline:
+            # record_done پس از پایان دانلود و پردازش تصاویر صدا زده می‌شود
+            self.image_pipeline.submit(record, url)
+        else:
+            self.record_done(record)
+        
+        return record
+    
+    def record_done(self, record: Dict):
+        """رکورد کامل شد (تصاویر آن دانلود و پردازش شده‌اند)"""
+        with self.metrics.span('write'):
+            if self.crawl_state:
+                self.crawl_state.save_record(record)
+            if self.records_writer:
+                self.records_writer.write(record)
+    
+    def add_record(self, record: Dict):
+        """ثبت یک رکورد اسکرپ شده در نتایج اجرا"""
+        self.scraped_count += 1
+        if self.keep_records:
+            self.scraped_content.append(record)
+    
+    def scrape_page(self, url: str) -> Optional[Dict]:
+        """اسکرپ یک صفحه"""
+        if url in self.scraped_urls:
+            return None
+        
+        try:
+            print(f"در حال اسکرپ: {url}")
+            html = self.fetch_html(url)
             
-            # ایجاد slug از title
-            title = meta_data['title'] or content['headings'][0]['text'] if content['headings'] else 'بدون عنوان'
-            slug = self.create_slug(title)
-            
-            # ترکیب محتوا
-            full_text = ' '.join([p for p in content['paragraphs']])
+            if html is None:
+                return None
             
-            scraped_data = {
-                'id': hashlib.md5(url.encode()).hexdigest()[:12],
-                'url': url,
-                'slug': slug,
-                'title': title,
-                'meta_description': meta_data['description'],
-                'meta_keywords': meta_data['keywords'],
-                'content': full_text,
-                'excerpt': full_text[:300] + '...' if len(full_text) > 300 else full_text,
-                'headings': content['headings'],
-                'images': downloaded_images,
-                'scraped_at': datetime.now().isoformat(),
-                'source': urlparse(url).netloc,
-            }
+            scraped_data = self.parse_page(url, html)
             
             self.scraped_urls.add(url)
             return scraped_data
             
         except Exception as e:
             print(f"خطا در اسکرپ {url}: {e}")
+            self.page_failed(url)
             return None
     
+    def page_failed(self, url: str):
+        """ثبت شکست پردازش یک صفحه تا در اجرای بعدی دوباره تلاش شود"""
+        self.metrics.count(url, 'errors')
+        if self.http_cache:
+            self.http_cache.forget(url)
+        if self.crawl_state:
+            self.crawl_state.mark(url, FAILED)
+    
     def create_slug(self, text: str) -> str:
         """ایجاد slug از متن فارسی"""
-        # تبدیل به لاتین برای slug
-        persian_to_latin = {
-            'ا': 'a', 'ب': 'b', 'پ': 'p', 'ت': 't', 'ث': 's',
-            'ج': 'j', 'چ': 'ch', 'ح': 'h', 'خ': 'kh', 'د': 'd',
-            'ذ': 'z', 'ر': 'r', 'ز': 'z', 'ژ': 'zh', 'س': 's',
-            'ش': 'sh', 'ص': 's', 'ض': 'z', 'ط': 't', 'ظ': 'z',
-            'ع': 'a', 'غ': 'gh', 'ف': 'f', 'ق': 'gh', 'ک': 'k',
-            'گ': 'g', 'ل': 'l', 'م': 'm', 'ن': 'n', 'و': 'v',
-            'ه': 'h', 'ی': 'y', ' ': '-'
-        }
+        return text_normalizer.create_slug(text, max_length=100)
+    
+    def parse_listing(self, html: str, base_url: str, keywords: List[str]) -> List[str]:
+        """استخراج لینک‌های مقالات مرتبط از HTML یک صفحه فهرست"""
+        article_urls = []
         
-        slug = text.lower()
-        for persian, latin in persian_to_latin.items():
-            slug = slug.replace(persian, latin)
+        # پیدا کردن لینک‌های مقالات
+        if self.html_parser == 'lxml':
+            links = self.fast_extractor.listing_links(html)
+        else:
+            soup = BeautifulSoup(html, self.html_parser)
+            links = [(link.get('href'), link.get_text().lower()) for link in soup.find_all('a', href=True)]
         
-        # حذف کاراکترهای غیرمجاز
-        slug = re.sub(r'[^a-z0-9\-]', '', slug)
-        slug = re.sub(r'-+', '-', slug)
-        slug = slug.strip('-')
+        for href, text in links:
+            # بررسی اینکه آیا لینک مرتبط با اسب است
+            if any(keyword in text for keyword in keywords):
+                full_url = urljoin(base_url, href)
+                if full_url not in article_urls:
+                    article_urls.append(full_url)
         
-        return slug[:100]  # محدود کردن طول
+        return article_urls
     
-    def find_article_urls(self, base_url: str, search_paths: List[str], keywords: List[str]) -> List[str]:
+    def find_article_urls(self, base_url: str, search_paths: List[str], keywords: List[str],
+                          limit: Optional[int] = 20) -> List[str]:
         """پیدا کردن URL های مقالات"""
         article_urls = []
         
         for path in search_paths:
             try:
                 url = urljoin(base_url, path)
-                response = self.session.get(url, timeout=30)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # پیدا کردن لینک‌های مقالات
-                    links = soup.find_all('a', href=True)
-                    for link in links:
-                        href = link.get('href')
-                        text = link.get_text().lower()
-                        
-                        # بررسی اینکه آیا لینک مرتبط با اسب است
-                        if any(keyword in text for keyword in keywords):
-                            full_url = urljoin(base_url, href)
-                            if full_url not in article_urls:
-                                article_urls.append(full_url)
+                if not self.robots.allowed(url):
+                    continue
+                response = self.fetch(url, skip_unchanged=False)
                 
-                time.sleep(self.delay)  # تاخیر برای رعایت اخلاقی
+                if response is not None:
+                    for full_url in self.parse_listing(response.text, base_url, keywords):
+                        if full_url not in article_urls:
+                            article_urls.append(full_url)
                 
             except Exception as e:
                 print(f"خطا در پیدا کردن مقالات از {path}: {e}")
         
-        return article_urls[:20]  # حداکثر 20 مقاله از هر سایت
+        return article_urls[:limit]  # حداکثر limit مقاله از هر سایت (None: همه)
+    
+    def discover_article_urls(self, site_config: Dict) -> Optional[Tuple[List[str], Dict[str, datetime]]]:
+        """URL مقالات از نقشه سایت و فیدها (جدیدترین اول) و lastmod آن‌ها
+
+        اگر سایت نقشه یا فید مرتبطی نداشته باشد None برمی‌گرداند تا صفحات فهرست
+        خوانده شوند؛ نقشه‌های بدون تغییر (حالت delta) URL جدیدی ندارند.
+        """
+        if not self.use_discovery:
+            return None
+        base_url = site_config['base_url']
+        documents = (site_config.get('sitemaps')
+                     or self.robots.rules(base_url).sitemaps
+                     or ['/sitemap.xml'])
+        entries, skipped = self.discovery.discover(
+            base_url, list(documents) + list(site_config.get('feeds', [])), skip_unchanged=self.delta
+        )
+        article_paths = site_config.get('article_paths', site_config['search_paths'])
+        entries = [entry for entry in entries
+                   if is_article(entry, base_url, article_paths, site_config['keywords'])]
+        if not entries and not skipped:
+            return None
+        print(f"🗺️  {len(entries)} مقاله در نقشه سایت و فیدها پیدا شد"
+              + (f" ({skipped} نقشه بدون تغییر)" if skipped else ''))
+        return [entry['url'] for entry in entries], {entry['url']: entry['lastmod'] for entry in entries}
+    
+    def select_article_urls(self, site_config: Dict, discovered: List[str],
+                            lastmods: Optional[Dict[str, datetime]] = None) -> List[str]:
+        """انتخاب URL هایی که در این اجرا دریافت می‌شوند
+
+        همه URL های کشف شده به frontier اضافه می‌شوند تا محدودیت هر اجرا باعث
+        از دست رفتن آن‌ها نشود. در حالت delta انتخاب از frontier انجام می‌شود؛
+        در غیر این صورت ابتدا URL های کشف شده‌ای که هنوز دریافت نشده‌اند، سپس
+        صف باقی‌مانده frontier از اجراهای قبلی (URL های جدید و ناموفق) و در پایان
+        URL های کشف شده قبلاً دریافت شده (برای بررسی تغییر) انتخاب می‌شوند.
+        URL هایی که lastmod آن‌ها از آخرین دریافت جدیدتر نیست دریافت نمی‌شوند.
+        URL هایی که robots.txt ممنوع کرده است کنار گذاشته می‌شوند.
+        """
+        allowed = self.robots.filter(discovered)
+        if len(allowed) < len(discovered):
+            print(f"🤖 {len(discovered) - len(allowed)} URL توسط robots.txt ممنوع است")
+        discovered = allowed
+        if not self.crawl_state:
+            return discovered[:self.max_articles_per_site]
+        
+        site = urlparse(site_config['base_url']).netloc
+        new_count = self.crawl_state.add_urls(site, discovered, lastmods)
+        if new_count:
+            print(f"🆕 {new_count} URL جدید به frontier اضافه شد")
+        
+        if self.delta:
+            # قوانین robots.txt ممکن است پس از افزودن URL ها به frontier تغییر کرده باشند
+            due = self.crawl_state.due(site, limit=self.max_articles_per_site,
+                                       refresh_after=self.refresh_after)
+            return self.robots.filter(due)
+        
+        pending = self.crawl_state.due(site)
+        pending_set = set(pending)
+        fresh = [url for url in discovered if url in pending_set]
+        revisit = [url for url in discovered if url not in pending_set]
+        if lastmods:
+            unchanged = self.crawl_state.unchanged(revisit)
+            if unchanged:
+                print(f"⏭️  {len(unchanged)} مقاله از آخرین دریافت تغییر نکرده است")
+                revisit = [url for url in revisit if url not in unchanged]
+        
+        discovered_set = set(discovered)
+        backlog = self.robots.filter(url for url in pending if url not in discovered_set)
+        limit = self.max_articles_per_site
+        queued = len(backlog) if limit is None else min(len(backlog), max(0, limit - len(fresh)))
+        if queued:
+            print(f"📥 {queued} URL از صف frontier اجراهای قبلی")
+        return (fresh + backlog + revisit)[:limit]
     
     def scrape_site(self, site_config: Dict):
         """اسکرپ یک سایت کامل"""
@@ -349,85 +687,239 @@ class ContentScraper:
         print(f"URL: {site_config['base_url']}")
         print(f"{'='*60}\n")
         
+        if self.fetch_router:
+            self.fetch_router.configure_site(site_config)
+        if 'max_connections' in site_config:
+            self.transport.size_host(site_config['base_url'], site_config['max_connections'] + self.image_workers)
+        
         # بررسی robots.txt
         if not self.check_robots_txt(site_config['base_url']):
             print(f"⚠️  robots.txt اجازه اسکرپ نمی‌دهد: {site_config['base_url']}")
             return
         
-        # پیدا کردن URL های مقالات
-        article_urls = self.find_article_urls(
-            site_config['base_url'],
-            site_config['search_paths'],
-            site_config['keywords']
-        )
+        # پیدا کردن URL های مقالات: نقشه سایت و فیدها، در غیر این صورت صفحات فهرست
+        found = self.discover_article_urls(site_config)
+        if found is not None:
+            discovered, lastmods = found
+        else:
+            discovered, lastmods = self.find_article_urls(
+                site_config['base_url'],
+                site_config['search_paths'],
+                site_config['keywords'],
+                limit=None
+            ), None
+        article_urls = self.select_article_urls(site_config, discovered, lastmods)
         
         print(f"تعداد مقالات پیدا شده: {len(article_urls)}")
         
-        # اسکرپ هر مقاله
+        self.scrape_articles(article_urls, site_config)
+    
+    def scrape_articles(self, article_urls: List[str], site_config: Optional[Dict] = None):
+        """اسکرپ مقالات یک سایت"""
         for url in article_urls:
             data = self.scrape_page(url)
             if data:
-                self.scraped_content.append(data)
+                self.add_record(data)
                 print(f"✓ محتوا ذخیره شد: {data['title'][:50]}...")
-            
-            time.sleep(self.delay)  # تاخیر بین درخواست‌ها
+    
+    @property
+    def records_path(self) -> Path:
+        """فایل JSON Lines رکوردهای اجرای جاری"""
+        return self.data_dir / 'scraped_content.jsonl'
+    
+    def iter_scraped(self):
+        """رکوردهای اجرای جاری به صورت generator"""
+        if self.records_writer or (not self.keep_records and self.records_path.exists()):
+            return iter_records(self.records_path)
+        return iter(self.scraped_content)
     
     def save_to_json(self, filename: str = 'scraped_content.json'):
-        """ذخیره داده‌ها در فایل JSON"""
+        """ذخیره داده‌ها در فایل JSON (یا JSON Lines برای نام‌های .jsonl)"""
         output_file = self.data_dir / filename
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.scraped_content, f, ensure_ascii=False, indent=2)
+        with self.metrics.span('write'):
+            count = write_records(output_file, self.iter_scraped())
         
         print(f"\n✓ داده‌ها در {output_file} ذخیره شدند")
-        print(f"تعداد کل محتواهای جمع‌آوری شده: {len(self.scraped_content)}")
+        print(f"تعداد کل محتواهای جمع‌آوری شده: {count}")
     
     def save_to_sql(self, filename: str = 'scraped_content.sql'):
-        """ذخیره داده‌ها در فایل SQL برای import به دیتابیس"""
+        """ذخیره داده‌ها در فایل SQL برای import به دیتابیس (قالب sql_format)"""
         output_file = self.data_dir / filename
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("-- محتوای جمع‌آوری شده از سایت‌های فارسی\n")
-            f.write("-- تاریخ تولید: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
+        with self.metrics.span('write'), open(output_file, 'w', encoding='utf-8') as f:
+            stats = write_sql(f, self.iter_scraped(), sql_format=self.sql_format,
+                              batch_size=self.sql_batch_size)
+        
+        print(f"\n✓ فایل SQL ({self.sql_format}، {stats['written']} رکورد) در {output_file} ایجاد شد")
+    
+    def start_image_pipeline(self):
+        """راه‌اندازی صف دانلود تصاویر جدا از اسکرپ صفحات"""
+        if self.image_pipeline is None:
+            on_record_done = self.record_done
+            if self.image_variants:
+                self.image_processor = ImageProcessor(
+                    self.output_dir, workers=self.image_processes, avif=self.image_avif, metrics=self.metrics
+                )
+                on_record_done = lambda record: self.image_processor.submit_record(record, self.record_done)
             
-            for item in self.scraped_content:
-                # Escape برای SQL
-                title = item['title'].replace("'", "''")
-                content = item['content'].replace("'", "''")
-                excerpt = item['excerpt'].replace("'", "''")
-                meta_desc = item['meta_description'].replace("'", "''")
-                
-                # تصویر اصلی
-                main_image = item['images'][0]['path'] if item['images'] else None
-                
-                f.write(f"""
-INSERT INTO blog_posts (
-    title, slug, excerpt, content, featured_image,
-    meta_description, meta_keywords, author_id, category_id,
-    is_published, published_at, created_at
-) VALUES (
-    '{title}',
-    '{item['slug']}',
-    '{excerpt}',
-    '{content}',
-    {f"'{main_image}'" if main_image else 'NULL'},
-    '{meta_desc}',
-    '{item['meta_keywords']}',
-    1, -- author_id (باید تغییر دهید)
-    1, -- category_id (باید تغییر دهید)
-    true,
-    NOW(),
-    NOW()
-);
-""")
-        
-        print(f"\n✓ فایل SQL در {output_file} ایجاد شد")
-    
-    def run(self):
+            self.image_pipeline = ImageDownloadPipeline(
+                self.download_image, workers=self.image_workers, on_record_done=on_record_done
+            )
+            self.image_pipeline.start()
+    
+    def finish_image_pipeline(self):
+        """صبر تا پایان دانلود تصاویر و گزارش آمار صف"""
+        if self.image_pipeline is None:
+            return
+        
+        if self.image_pipeline.depth:
+            print(f"\n⏳ در انتظار دانلود {self.image_pipeline.depth} تصویر باقی‌مانده...")
+        self.image_pipeline.join()
+        
+        stats = self.image_pipeline.stats()
+        print(f"🖼️  صف تصاویر: {stats['downloaded']} موفق، {stats['failed']} ناموفق، "
+              f"بیشترین عمق صف {stats['max_queue_depth']}، "
+              f"{stats['images_per_second']} تصویر در ثانیه")
+        self.image_pipeline = None
+        
+        if self.image_processor is not None:
+            self.image_processor.join()
+            stats = self.image_processor.stats()
+            print(f"🗜️  نسخه‌های تصویر ({', '.join(stats['formats'])}): "
+                  f"{stats['processed']} پردازش شده، {stats['failed']} ناموفق")
+            self.image_processor = None
+    
+    def start_run(self, resume: bool = False):
+        """شروع اجرا در crawl state؛ با resume رکوردهای اجرای ناتمام قبلی بازیابی می‌شوند"""
+        resumed = False
+        if self.crawl_state:
+            resumed = self.crawl_state.start_run(resume=resume)
+            if resumed:
+                restored = 0
+                for record in self.crawl_state.run_records():
+                    if record['url'] not in self.scraped_urls:
+                        self.scraped_urls.add(record['url'])
+                        self.add_record(record)
+                        restored += 1
+                print(f"♻️  ادامه اجرای قبلی: {restored} رکورد بازیابی شد\n")
+            elif resume:
+                print("ℹ️  اجرای ناتمامی برای ادامه وجود ندارد؛ اجرای جدید شروع شد\n")
+        
+        # رکوردهای بازیابی شده قبلاً در فایل JSON Lines اجرای ناتمام نوشته شده‌اند
+        if resumed and self.records_path.exists():
+            self.records_writer = JsonlWriter(self.records_path, append=True)
+        else:
+            self.records_writer = JsonlWriter(self.records_path)
+            for record in self.scraped_content:
+                self.records_writer.write(record)
+    
+    def finish_records(self):
+        """بستن فایل JSON Lines"""
+        if self.records_writer:
+            self.records_writer.close()
+    
+    def finish(self):
+        """ذخیره نتایج و چاپ خلاصه اجرا"""
+        self.finish_image_pipeline()
+        
+        if self.http_cache:
+            stats = self.http_cache.stats()
+            print(f"💾 کش HTTP: {stats['not_modified']} پاسخ 304، "
+                  f"{stats['unchanged_body']} صفحه بدون تغییر، {stats['misses']} URL جدید")
+        
+        if self.crawl_state:
+            self.crawl_state.finish_run()
+            stats = self.crawl_state.stats()
+            print("🗂️  وضعیت frontier: " + '، '.join(f"{status}: {count}" for status, count in stats.items()))
+        
+        stats = self.robots.stats()
+        if stats['hosts']:
+            print(f"🤖 robots.txt: {stats['hosts']} میزبان ({stats['fetched']} دریافت، {stats['cached']} از کش، "
+                  f"{stats['unavailable']} در دسترس نبود)، {stats['blocked_urls']} URL ممنوع")
+        
+        stats = self.discovery.stats()
+        if stats['documents']:
+            print(f"🗺️  نقشه سایت و فیدها: {stats['urls']} URL از {stats['documents']} سند "
+                  f"({stats['skipped_sitemaps']} نقشه بدون تغییر دریافت نشد)")
+        
+        if self.fetch_router:
+            stats = self.fetch_router.stats()
+            print(f"🌐 موتور دریافت: {stats['http_pages']} صفحه با requests، {stats['browser_pages']} صفحه با مرورگر "
+                  f"({stats['escalations']} ارجاع به مرورگر، {stats['browser_hosts']} سایت JavaScript)")
+            self.fetch_router.close()
+        
+        stats = self.rate_limiter.stats()
+        if stats['hosts']:
+            delays = '، '.join(f"{host}: {delay:.2f}s" for host, delay in stats['delays'].items())
+            print(f"🚦 نرخ درخواست: {stats['throttled']} پاسخ 429/503، {stats['slowdowns']} کاهش سرعت، "
+                  f"{stats['waited']:.1f} ثانیه صبر؛ فاصله نهایی {delays}")
+        
+        stats = self.transport.stats()
+        if stats['requests']:
+            http2 = f"، {stats['http2_requests']} با HTTP/2" if self.transport.http2 else ''
+            print(f"🔌 اتصال‌ها: {stats['requests']} درخواست روی {stats['connections']} اتصال "
+                  f"({stats['reused']} استفاده مجدد{http2})، {stats['retries']} تلاش دوباره")
+        
+        if self.near_duplicates is not None:
+            print(f"🧬 محتوای تکراری: {self.near_duplicates.duplicates} صفحه از "
+                  f"{self.near_duplicates.checked} رد شد ({len(self.near_duplicates)} اثر انگشت در index)")
+        
+        if self.scraped_count:
+            print(f"\n✓ رکوردها در {self.records_path} ذخیره شدند")
+            if self.output_format == 'json':
+                self.save_to_json()
+            self.save_to_sql()
+            self.finish_records()
+            
+            # خلاصه
+            print(f"\n{'='*60}")
+            print("✅ جمع‌آوری محتوا با موفقیت انجام شد!")
+            print(f"📊 تعداد کل محتواها: {self.scraped_count}")
+            stats = self.image_store.stats()
+            print(f"🖼️  تعداد تصاویر: {stats['images']} ({stats['bytes'] / (1024 * 1024):.1f} MB، "
+                  f"{stats['urls']} URL)؛ در این اجرا {stats['stored']} تصویر جدید، "
+                  f"{stats['exact_duplicates']} تکراری و {stats['perceptual_duplicates']} مشابه")
+            print(f"{'='*60}\n")
+        else:
+            self.finish_records()
+            print("⚠️  هیچ محتوایی جمع‌آوری نشد!")
+        
+        self.write_report()
+    
+    def write_report(self) -> Dict:
+        """ذخیره گزارش JSON اجرا و در صورت فعال بودن فایل Prometheus و profile مراحل"""
+        extra = {
+            'records': self.scraped_count,
+            'transport': self.transport.stats(),
+            'rate_limiter': self.rate_limiter.stats(),
+            'images': self.image_store.stats(),
+            'discovery': self.discovery.stats(),
+            'robots': self.robots.stats(),
+        }
+        if self.fetch_router:
+            extra['fetch_router'] = self.fetch_router.stats()
+        report = self.metrics.write_json(self.report_path, **extra)
+        if self.prometheus_path:
+            self.metrics.write_prometheus(self.prometheus_path)
+        
+        stages = sorted(report['stages'].items(), key=lambda item: -item[1]['total_seconds'])
+        if stages:
+            print("⏱️  زمان مراحل: " + '، '.join(
+                f"{stage} {summary['total_seconds']:.2f}s ({summary['count']})" for stage, summary in stages
+            ))
+        print(f"📈 گزارش اجرا: {self.report_path}")
+        for path in self.metrics.dump_profiles(self.data_dir / 'profiles'):
+            print(f"🔬 profile: {path}")
+        return report
+    
+    def run(self, resume: bool = False):
         """اجرای اسکرپر"""
         print("🚀 شروع جمع‌آوری محتوا...")
         print(f"📁 پوشه خروجی: {self.output_dir}\n")
         
+        self.start_run(resume)
+        self.start_image_pipeline()
         for site in self.target_sites:
             try:
                 self.scrape_site(site)
@@ -435,25 +927,139 @@ INSERT INTO blog_posts (
                 print(f"❌ خطا در اسکرپ سایت {site['name']}: {e}")
         
         # ذخیره نتایج
-        if self.scraped_content:
-            self.save_to_json()
-            self.save_to_sql()
-            
-            # خلاصه
-            print(f"\n{'='*60}")
-            print("✅ جمع‌آوری محتوا با موفقیت انجام شد!")
-            print(f"📊 تعداد کل محتواها: {len(self.scraped_content)}")
-            print(f"🖼️  تعداد تصاویر دانلود شده: {len(list(self.images_dir.glob('*')))}")
-            print(f"{'='*60}\n")
-        else:
-            print("⚠️  هیچ محتوایی جمع‌آوری نشد!")
+        self.finish()
+    
+    def run_async(self, max_concurrency: int = 8, per_host_concurrency: int = 2,
+                  delay: Optional[float] = None, resume: bool = False):
+        """اجرای اسکرپر به صورت همزمان روی همه سایت‌ها (asyncio)"""
+        from async_engine import AsyncCrawlEngine
+        
+        print("🚀 شروع جمع‌آوری محتوا (موتور async)...")
+        print(f"📁 پوشه خروجی: {self.output_dir}\n")
+        
+        self.start_run(resume)
+        
+        if delay is not None:
+            self.delay = delay
+        engine = AsyncCrawlEngine(
+            self,
+            max_concurrency=max_concurrency,
+            per_host_concurrency=per_host_concurrency,
+        )
+        self.start_image_pipeline()
+        engine.run(self.target_sites)
+        
+        # ذخیره نتایج
+        self.finish()
 
 
 def main():
-    scraper = ContentScraper(output_dir="scraped_content")
-    scraper.run()
+    parser = argparse.ArgumentParser(description='جمع‌آوری محتوای مرتبط با اسب')
+    parser.add_argument('--output-dir', default='scraped_content', help='پوشه خروجی')
+    parser.add_argument('--engine', choices=['sync', 'async'], default='sync',
+                        help='موتور اجرا: sync (ترتیبی) یا async (همزمان روی همه سایت‌ها)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='حداکثر درخواست همزمان در کل (فقط موتور async)')
+    parser.add_argument('--per-host', type=int, default=2,
+                        help='حداکثر درخواست همزمان به هر میزبان (فقط موتور async)')
+    parser.add_argument('--delay', type=float, default=None,
+                        help='فاصله اولیه (ثانیه) بین درخواست‌ها به یک میزبان؛ با پاسخ‌های سرور تنظیم می‌شود')
+    parser.add_argument('--min-delay', type=float, default=0.25,
+                        help='کمترین فاصله (ثانیه) بین درخواست‌ها به یک میزبان سریع')
+    parser.add_argument('--max-delay', type=float, default=60.0,
+                        help='بیشترین فاصله (ثانیه) پس از backoff برای میزبان‌های تحت فشار')
+    parser.add_argument('--parser', choices=['lxml', 'html.parser'], default='lxml',
+                        help='موتور استخراج HTML')
+    parser.add_argument('--image-workers', type=int, default=4,
+                        help='تعداد worker های دانلود تصاویر')
+    parser.add_argument('--image-processes', type=int, default=None,
+                        help='تعداد پردازه‌های ساخت نسخه‌های تصویر (پیش‌فرض: تعداد هسته‌ها)')
+    parser.add_argument('--no-variants', action='store_true',
+                        help='عدم ساخت نسخه‌های thumb/card/full')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='غیرفعال کردن کش HTTP (دریافت دوباره همه صفحات)')
+    parser.add_argument('--resume', action='store_true',
+                        help='ادامه آخرین اجرای ناتمام (بدون دریافت دوباره صفحات انجام شده)')
+    parser.add_argument('--delta', action='store_true',
+                        help='فقط URL های جدید یا URL هایی که زمان تازه‌سازی آن‌ها رسیده')
+    parser.add_argument('--refresh-days', type=float, default=7,
+                        help='فاصله تازه‌سازی صفحات در حالت delta (روز)')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='غیرفعال کردن تشخیص محتوای تقریباً تکراری')
+    parser.add_argument('--dedup-distance', type=int, default=7,
+                        help='حداکثر فاصله همینگ SimHash برای تکراری شمردن دو محتوا')
+    parser.add_argument('--no-browser', action='store_true',
+                        help='عدم استفاده از مرورگر برای صفحات JavaScript (فقط requests)')
+    parser.add_argument('--browsers', type=int, default=2,
+                        help='تعداد مرورگرهای headless برای صفحات JavaScript')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='تعداد تلاش دوباره برای خطای اتصال و پاسخ‌های 429/5xx')
+    parser.add_argument('--http2', action='store_true',
+                        help="استفاده از HTTP/2 در صورت پشتیبانی سرور (نیازمند httpx[http2])")
+    parser.add_argument('--full-page', action='store_true',
+                        help='استخراج متن و تصاویر کل صفحه (بدون تشخیص بدنه اصلی مقاله)')
+    parser.add_argument('--no-discovery', action='store_true',
+                        help='کشف مقالات فقط از صفحات فهرست (بدون نقشه سایت و فید)')
+    parser.add_argument('--robots-ttl', type=float, default=24,
+                        help='مدت اعتبار robots.txt ذخیره شده هر میزبان (ساعت)')
+    parser.add_argument('--max-articles', type=int, default=20,
+                        help='حداکثر مقاله دریافتی از هر سایت در هر اجرا')
+    parser.add_argument('--format', choices=['json', 'jsonl'], default='json',
+                        help='خروجی نهایی: json (آرایه، علاوه بر jsonl) یا فقط jsonl')
+    parser.add_argument('--sql-format', choices=SQL_FORMATS, default='copy',
+                        help='قالب scraped_content.sql: copy (سریع‌ترین) یا insert چند ردیفی')
+    parser.add_argument('--sql-batch-size', type=int, default=500,
+                        help='تعداد ردیف هر دستور INSERT در قالب insert')
+    parser.add_argument('--report', default=None,
+                        help='مسیر گزارش JSON اجرا (پیش‌فرض: data/run_report.json)')
+    parser.add_argument('--prometheus', default=None,
+                        help='نوشتن معیارها در قالب متنی Prometheus در این مسیر')
+    parser.add_argument('--profile', action='append', choices=STAGES, default=[],
+                        help='cProfile برای این مرحله (قابل تکرار)؛ خروجی در data/profiles')
+    parser.add_argument('--avif', action='store_true',
+                        help='ساخت نسخه AVIF علاوه بر WebP (در صورت پشتیبانی Pillow)')
+    args = parser.parse_args()
+    
+    scraper = ContentScraper(output_dir=args.output_dir, image_workers=args.image_workers,
+                             use_cache=not args.no_cache, use_dedup=False, use_router=not args.no_browser)
+    if not args.no_dedup:
+        scraper.near_duplicates = NearDuplicateIndex(scraper.data_dir / 'near_duplicates.sqlite3',
+                                                     max_distance=args.dedup_distance)
+    if scraper.fetch_router:
+        scraper.fetch_router.browsers = args.browsers
+    if args.retries != 3 or args.http2:
+        scraper.transport.configure(retries=args.retries, http2=args.http2)
+    scraper.image_variants = not args.no_variants
+    scraper.image_avif = args.avif
+    scraper.image_processes = args.image_processes
+    scraper.html_parser = args.parser
+    scraper.main_content = not args.full_page
+    scraper.delta = args.delta
+    scraper.refresh_after = timedelta(days=args.refresh_days)
+    scraper.max_articles_per_site = args.max_articles
+    scraper.use_discovery = not args.no_discovery
+    scraper.robots.ttl = timedelta(hours=args.robots_ttl)
+    scraper.output_format = args.format
+    scraper.sql_format = args.sql_format
+    scraper.sql_batch_size = args.sql_batch_size
+    # رکوردها از فایل JSON Lines خوانده می‌شوند؛ نگه‌داری در حافظه لازم نیست
+    scraper.keep_records = False
+    if args.delay is not None:
+        scraper.delay = args.delay
+    if args.report:
+        scraper.report_path = Path(args.report)
+    if args.prometheus:
+        scraper.prometheus_path = Path(args.prometheus)
+    scraper.metrics.profile_stages.update(args.profile)
+    scraper.rate_limiter.min_delay = args.min_delay
+    scraper.rate_limiter.max_delay = args.max_delay
+    
+    if args.engine == 'async':
+        scraper.run_async(max_concurrency=args.concurrency, per_host_concurrency=args.per_host,
+                          resume=args.resume)
+    else:
+        scraper.run(resume=args.resume)
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+وضعیت پایدار پیمایش (frontier) برای ادامه اجرا و پیمایش افزایشی
+
+برای هر URL مقاله، سایت، وضعیت (queued / done / failed / not_modified / duplicate)،
+تعداد تلاش، زمان آخرین دریافت و رکورد استخراج شده در SQLite نگه‌داری می‌شود.
+
+- با `--resume` اجرای ناتمام قبلی ادامه پیدا می‌کند: رکوردهای ذخیره شده
+  بازیابی و URL های انجام شده دوباره دریافت نمی‌شوند.
+- با `--delta` فقط URL های جدید یا URL هایی که زمان تازه‌سازی آن‌ها رسیده
+  دریافت می‌شوند، پس هزینه هر اجرا متناسب با محتوای جدید است.
+- `lastmod` نقشه سایت یا فید برای هر URL ذخیره می‌شود: URL هایی که پس از
+  آخرین دریافت تغییر کرده‌اند دوباره و URL های بدون تغییر دیگر دریافت نمی‌شوند.
+  زمان آخرین خواندن هر نقشه سایت هم نگه‌داری می‌شود.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+QUEUED = 'queued'
+DONE = 'done'
+FAILED = 'failed'
+NOT_MODIFIED = 'not_modified'
+DUPLICATE = 'duplicate'
+
+# وضعیت URL هایی که دریافت شده‌اند و فقط در صورت تغییر دوباره دریافت می‌شوند
+FETCHED = (DONE, NOT_MODIFIED, DUPLICATE)
+
+
+class CrawlState:
+    """ذخیره frontier، مجموعه URL های بازدید شده و رکوردهای هر اجرا"""
+
+    def __init__(self, db_path: Path, max_attempts: int = 3):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT NOT NULL,
+                finished_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                discovered_at TEXT NOT NULL,
+                last_fetched TEXT,
+                run_id INTEGER,
+                record TEXT,
+                lastmod TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_urls_site_status ON urls (site, status);
+            CREATE INDEX IF NOT EXISTS idx_urls_run ON urls (run_id);
+            CREATE TABLE IF NOT EXISTS sitemaps (
+                url TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                read_at TEXT NOT NULL
+            );
+        """)
+        # پایگاه‌های ساخته شده پیش از ستون lastmod
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(urls)")}
+        if 'lastmod' not in columns:
+            self._conn.execute("ALTER TABLE urls ADD COLUMN lastmod TEXT")
+        self._conn.commit()
+        self.run_id: Optional[int] = None
+
+    def start_run(self, resume: bool = False) -> bool:
+        """شروع اجرای جدید یا ادامه آخرین اجرای ناتمام
+
+        اگر اجرای ناتمامی برای ادامه وجود داشته باشد True برمی‌گرداند.
+        """
+        with self._lock:
+            if resume:
+                row = self._conn.execute(
+                    "SELECT id FROM runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1"
+                ).fetchone()
+                if row:
+                    self.run_id = row[0]
+                    return True
+
+            cur = self._conn.execute("INSERT INTO runs (started_at) VALUES (?)", (_now(),))
+            self._conn.commit()
+            self.run_id = cur.lastrowid
+            return False
+
+    def finish_run(self):
+        if self.run_id is None:
+            return
+        with self._lock:
+            self._conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (_now(), self.run_id))
+            self._conn.commit()
+
+    def add_urls(self, site: str, urls: List[str], lastmods: Optional[Dict[str, datetime]] = None) -> int:
+        """افزودن URL های کشف شده به frontier؛ تعداد URL های جدید را برمی‌گرداند
+
+        lastmods (زمان آخرین تغییر از نقشه سایت یا فید) برای URL های جدید و قبلی ذخیره می‌شود.
+        """
+        now = _now()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, site, discovered_at) VALUES (?, ?, ?)",
+                [(url, site, now) for url in urls],
+            )
+            added = self._conn.total_changes - before
+            if lastmods:
+                self._conn.executemany(
+                    "UPDATE urls SET lastmod = ? WHERE url = ?",
+                    [(lastmod.isoformat(), url) for url, lastmod in lastmods.items() if lastmod is not None],
+                )
+            self._conn.commit()
+            return added
+
+    def unchanged(self, urls: Iterable[str]) -> Set[str]:
+        """URL هایی که دریافت شده‌اند و lastmod آن‌ها از آخرین دریافت جدیدتر نیست"""
+        urls = list(urls)
+        found: Set[str] = set()
+        with self._lock:
+            # محدودیت تعداد پارامترهای SQLite
+            for start in range(0, len(urls), 500):
+                batch = urls[start:start + 500]
+                rows = self._conn.execute(
+                    f"""
+                    SELECT url FROM urls
+                    WHERE url IN ({', '.join('?' * len(batch))})
+                        AND status IN (?, ?, ?) AND lastmod IS NOT NULL AND lastmod <= last_fetched
+                    """,
+                    batch + list(FETCHED),
+                )
+                found.update(row[0] for row in rows)
+        return found
+
+    def due(self, site: str, limit: Optional[int] = None, refresh_after: Optional[timedelta] = None) -> List[str]:
+        """URL هایی از یک سایت که باید دریافت شوند
+
+        URL های جدید، URL های ناموفق با تلاش کمتر از max_attempts، URL هایی که
+        lastmod آن‌ها از آخرین دریافت جدیدتر است و (در صورت تعیین refresh_after)
+        URL های بدون lastmod که آخرین دریافتشان قدیمی‌تر است.
+        """
+        query = """
+            SELECT url FROM urls
+            WHERE site = ? AND (
+                status = ?
+                OR (status = ? AND attempts < ?)
+                OR (status IN (?, ?, ?) AND lastmod > last_fetched)
+        """
+        params: list = [site, QUEUED, FAILED, self.max_attempts, *FETCHED]
+        if refresh_after is not None:
+            query += " OR (status IN (?, ?, ?) AND lastmod IS NULL AND last_fetched < ?)"
+            params += [*FETCHED, (datetime.now() - refresh_after).isoformat()]
+        query += ") ORDER BY discovered_at, url"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            return [row[0] for row in self._conn.execute(query, params)]
+
+    def needs_body(self, url: str) -> bool:
+        """آیا URL در frontier است و هنوز رکوردی برای آن ذخیره نشده
+
+        برای چنین URL هایی نباید از درخواست شرطی استفاده کرد، چون پاسخ 304
+        محتوایی برای ساخت رکورد ندارد.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM urls WHERE url = ?", (url,)).fetchone()
+        return row is not None and row[0] in (QUEUED, FAILED)
+
+    def mark(self, url: str, status: str):
+        """ثبت نتیجه دریافت یک URL (فقط برای URL های موجود در frontier)"""
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE urls SET status = ?, attempts = attempts + 1, last_fetched = ?, run_id = ?
+                WHERE url = ?
+                """,
+                (status, _now(), self.run_id, url),
+            )
+            self._conn.commit()
+
+    def save_record(self, record: Dict):
+        """ذخیره رکورد نهایی یک صفحه و علامت‌گذاری آن به عنوان انجام شده"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO urls (url, site, status, attempts, discovered_at, last_fetched, run_id, record)
+                VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    status = excluded.status,
+                    last_fetched = excluded.last_fetched,
+                    run_id = excluded.run_id,
+                    record = excluded.record
+                """,
+                (record['url'], record.get('source', ''), DONE, _now(), _now(), self.run_id,
+                 json.dumps(record, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def sitemap_unchanged(self, url: str, lastmod: Optional[datetime]) -> bool:
+        """آیا نقشه سایت پس از آخرین خواندن کامل آن تغییر نکرده است (بدون lastmod: نامعلوم)"""
+        if lastmod is None:
+            return False
+        with self._lock:
+            row = self._conn.execute("SELECT read_at FROM sitemaps WHERE url = ?", (url,)).fetchone()
+        return row is not None and lastmod.isoformat() <= row[0]
+
+    def sitemap_read(self, site: str, url: str):
+        """ثبت خواندن کامل یک نقشه سایت یا فید"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sitemaps (url, site, read_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET read_at = excluded.read_at",
+                (url, site, _now()),
+            )
+            self._conn.commit()
+
+    def run_records(self) -> Iterator[Dict]:
+        """رکوردهای ذخیره شده در اجرای جاری (برای ادامه اجرای ناتمام)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record FROM urls WHERE run_id = ? AND status = ? AND record IS NOT NULL ORDER BY last_fetched",
+                (self.run_id, DONE),
+            ).fetchall()
+        for row in rows:
+            yield json.loads(row[0])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+کشف مقالات از نقشه سایت (sitemap) و فیدهای RSS/Atom
+
+به جای دریافت صفحات فهرست و جستجوی کلمات کلیدی در متن لینک‌ها، URL مقالات از
+سندهای زیر خوانده می‌شود:
+
+- خطوط `Sitemap:` در robots.txt (یا /sitemap.xml اگر robots.txt چیزی اعلام نکند)
+  و کلید `sitemaps` تنظیمات سایت؛
+- sitemap index ها (نقشه‌های فرزند، از جمله فایل‌های .xml.gz)؛
+- فیدهای RSS و Atom در کلید `feeds` تنظیمات سایت.
+
+هر سند به صورت stream با iterparse خوانده می‌شود و عناصر پردازش شده بلافاصله
+آزاد می‌شوند، پس حافظه به اندازه سند بستگی ندارد. برای هر URL تاریخ آخرین
+تغییر (`lastmod`، `updated` یا `pubDate`) و در صورت وجود عنوان برگردانده
+می‌شود تا با وضعیت پیمایش مقایسه و فقط صفحات تغییر کرده دریافت شوند.
+"""
+
+import gzip
+import io
+import time
+from collections import deque
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote, urljoin, urlparse
+
+from lxml import etree
+
+from metrics import wire_bytes
+
+PAGE = 'page'
+SITEMAP = 'sitemap'
+
+# عناصری که هر کدام یک URL را توصیف می‌کنند: <url>/<sitemap> نقشه سایت، <item> RSS و <entry> Atom
+_ENTRY_TAGS = {'url': PAGE, 'sitemap': SITEMAP, 'item': PAGE, 'entry': PAGE}
+# ترتیب ترجیح فیلدهای تاریخ (آخرین تغییر بر تاریخ انتشار مقدم است)
+_DATE_TAGS = ('lastmod', 'updated', 'publication_date', 'published', 'pubDate', 'date')
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def robots_sitemaps(robots_text: str) -> List[str]:
+    """آدرس‌های خطوط `Sitemap:` در robots.txt (مستقل از گروه user-agent)"""
+    sitemaps = []
+    for line in robots_text.splitlines():
+        key, _, value = line.split('#', 1)[0].partition(':')
+        value = value.strip()
+        if key.strip().lower() == 'sitemap' and value and value not in sitemaps:
+            sitemaps.append(value)
+    return sitemaps
+
+
+def parse_date(text: Optional[str]) -> Optional[datetime]:
+    """تاریخ W3C (نقشه سایت و Atom) یا RFC 822 (RSS) به datetime محلی بدون منطقه زمانی"""
+    text = (text or '').strip()
+    if not text:
+        return None
+    try:
+        value = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            value = parsedate_to_datetime(text)
+        except (TypeError, ValueError):
+            return None
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _local(tag) -> Optional[str]:
+    """نام عنصر بدون namespace (None برای comment و processing instruction)"""
+    if not isinstance(tag, str):
+        return None
+    return tag.rsplit('}', 1)[-1]
+
+
+def _entry(kind: str, element) -> Optional[Dict]:
+    fields: Dict[str, str] = {}
+    url = None
+    for child in element:
+        name = _local(child.tag)
+        if name is None:
+            continue
+        text = (child.text or '').strip()
+        if name == 'news':
+            # <news:news> نقشه‌های Google News: عنوان و تاریخ انتشار
+            for item in child:
+                item_name = _local(item.tag)
+                if item_name in ('title', 'publication_date') and item.text:
+                    fields.setdefault(item_name, item.text.strip())
+        elif name == 'loc':
+            url = url or text
+        elif name == 'link':
+            # Atom: <link rel="alternate" href="..."/>؛ RSS: <link>...</link>
+            href = child.get('href')
+            if href is None:
+                url = url or text
+            elif child.get('rel', 'alternate') == 'alternate':
+                url = url or href.strip()
+        elif name == 'guid' and child.get('isPermaLink', 'true') == 'true':
+            fields.setdefault('guid', text)
+        elif name in _DATE_TAGS or name == 'title':
+            fields.setdefault(name, text)
+
+    url = url or fields.get('guid')
+    if not url or not url.startswith(('http://', 'https://', '/')):
+        return None
+    lastmod = None
+    for name in _DATE_TAGS:
+        lastmod = parse_date(fields.get(name))
+        if lastmod is not None:
+            break
+    return {'kind': kind, 'url': url, 'lastmod': lastmod, 'title': fields.get('title', '')}
+
+
+def iter_entries(stream) -> Iterator[Dict]:
+    """URL های یک نقشه سایت، sitemap index، فید RSS یا Atom به صورت stream
+
+    هر مورد یک dict با `kind` (page یا sitemap)، `url`، `lastmod` و `title` است.
+    entity های خارجی و دسترسی شبکه parser غیرفعال‌اند.
+    """
+    parser = etree.iterparse(stream, events=('end',), resolve_entities=False, no_network=True,
+                             recover=True, huge_tree=False)
+    for _, element in parser:
+        kind = _ENTRY_TAGS.get(_local(element.tag))
+        if kind is None:
+            continue
+        entry = _entry(kind, element)
+        # آزاد کردن عنصر و عناصر قبلی برای حافظه ثابت
+        element.clear(keep_tail=False)
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+        if entry is not None:
+            yield entry
+
+
+def open_document(response):
+    """stream بدنه پاسخ؛ فایل‌های gzip (مثل sitemap.xml.gz) به صورت stream باز می‌شوند"""
+    response.raw.decode_content = True
+    # بدون بستن خودکار در انتهای بدنه تا io.BufferedReader بتواند آن را بخواند
+    response.raw.auto_close = False
+    stream = io.BufferedReader(response.raw)
+    if stream.peek(2)[:2] == _GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def _bare_host(url: str) -> str:
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def same_site(url: str, base_url: str) -> bool:
+    """آیا url روی همان میزبان base_url است (با یا بدون www.)"""
+    return _bare_host(url) == _bare_host(base_url)
+
+
+def is_article(entry: Dict, base_url: str, article_paths: List[str], keywords: List[str]) -> bool:
+    """آیا URL کشف شده مقاله‌ای مرتبط با سایت است
+
+    URL باید روی همان سایت و زیر یکی از مسیرهای article_paths باشد، یا یکی از
+    کلمات کلیدی در عنوان یا slug آن آمده باشد.
+    """
+    if not same_site(entry['url'], base_url):
+        return False
+    path = unquote(urlparse(entry['url']).path)
+    for prefix in article_paths:
+        prefix = prefix.rstrip('/') + '/'
+        if path.startswith(prefix) and path != prefix:
+            return True
+    text = f"{entry['title']} {path}".lower()
+    return any(keyword.lower() in text for keyword in keywords)
+
+
+class SitemapDiscovery:
+    """خواندن نقشه‌های سایت و فیدهای یک سایت با session اسکرپر
+
+    max_documents تعداد سندهای خوانده شده و max_urls تعداد URL های هر سایت را
+    محدود می‌کند. با crawl_state و skip_unchanged، نقشه‌های فرزندی که `lastmod`
+    آن‌ها در sitemap index از آخرین خواندنشان جدیدتر نیست دوباره دریافت نمی‌شوند.
+    """
+
+    def __init__(self, session, rate_limiter=None, metrics=None, crawl_state=None, timeout: int = 30,
+                 max_documents: int = 100, max_urls: int = 100000):
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.crawl_state = crawl_state
+        self.timeout = timeout
+        self.max_documents = max_documents
+        self.max_urls = max_urls
+
+        self.documents = 0
+        self.skipped_sitemaps = 0
+        self.urls = 0
+
+    def discover(self, base_url: str, documents: List[str],
+                 skip_unchanged: bool = False) -> Tuple[List[Dict], int]:
+        """URL صفحات همه سندها (نقشه‌های فرزند هم خوانده می‌شوند)، جدیدترین اول
+
+        علاوه بر صفحات، تعداد نقشه‌های فرزند بدون تغییر که خوانده نشدند برگردانده می‌شود.
+        """
+        site = urlparse(base_url).netloc
+        queue = deque(urljoin(base_url, url) for url in documents)
+        seen = set(queue)
+        pages: Dict[str, Dict] = {}
+        read = 0
+        skipped = 0
+
+        while queue and read < self.max_documents and len(pages) < self.max_urls:
+            url = queue.popleft()
+            read += 1
+            for entry in self._read(site, url):
+                entry['url'] = urljoin(url, entry['url'])
+                if entry['kind'] == SITEMAP:
+                    child = entry['url']
+                    if child in seen or not same_site(child, base_url):
+                        continue
+                    seen.add(child)
+                    if (skip_unchanged and self.crawl_state is not None
+                            and self.crawl_state.sitemap_unchanged(child, entry['lastmod'])):
+                        skipped += 1
+                        continue
+                    queue.append(child)
+                    continue
+
+                previous = pages.get(entry['url'])
+                if previous is None and len(pages) >= self.max_urls:
+                    # سند تا انتها خوانده می‌شود تا خواندن آن در crawl_state ثبت شود
+                    continue
+                if previous is None or (entry['lastmod'] or datetime.min) > (previous['lastmod'] or datetime.min):
+                    pages[entry['url']] = entry
+
+        self.urls += len(pages)
+        self.skipped_sitemaps += skipped
+        pages = sorted(pages.values(), key=lambda entry: entry['lastmod'] or datetime.min, reverse=True)
+        return pages, skipped
+
+    def _read(self, site: str, url: str) -> Iterator[Dict]:
+        """URL های یک سند (سند ناموجود یا نامعتبر: هیچ)؛ خواندن کامل سند در crawl_state ثبت می‌شود"""
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.acquire(url)
+            if self.metrics is not None:
+                self.metrics.observe('throttle', wait)
+        try:
+            response = self.session.get(url, timeout=self.timeout, stream=True)
+        except Exception as e:
+            print(f"⚠️  خطا در دریافت {url}: {e}")
+            return
+        try:
+            if response.status_code != 200:
+                return
+            self.documents += 1
+            started = time.perf_counter()
+            try:
+                yield from iter_entries(open_document(response))
+                if self.crawl_state is not None:
+                    self.crawl_state.sitemap_read(site, url)
+            except (etree.XMLSyntaxError, OSError, EOFError) as e:
+                print(f"⚠️  سند نامعتبر {url}: {e}")
+            finally:
+                if self.metrics is not None:
+                    self.metrics.observe('discover', time.perf_counter() - started)
+                    self.metrics.count(url, 'bytes', wire_bytes(response, 0))
+        finally:
+            response.close()
+
+    def stats(self) -> Dict:
+        return {
+            'documents': self.documents,
+            'skipped_sitemaps': self.skipped_sitemaps,
+            'urls': self.urls,
+        }
@@ -5,7 +5,7 @@
 """
 
 from content_scraper import ContentScraper
-import json
+from records_io import iter_records, write_records
 
 def example_basic_usage():
     """مثال استفاده پایه"""
@@ -49,9 +49,9 @@ def example_custom_site():
     scraper.scrape_site(custom_site)
     
     # ذخیره نتایج
-    if scraper.scraped_content:
-        scraper.save_to_json("custom_content.json")
-        print(f"\n✓ {len(scraper.scraped_content)} محتوا جمع‌آوری شد")
+    if scraper.scraped_count:
+        scraper.save_to_json("custom_content.jsonl")
+        print(f"\n✓ {scraper.scraped_count} محتوا جمع‌آوری شد")
 
 
 def example_filter_content():
@@ -60,9 +60,8 @@ def example_filter_content():
     print("مثال 3: فیلتر کردن محتوا")
     print("=" * 60)
     
-    # خواندن محتوای جمع‌آوری شده
-    with open('scraped_content/data/scraped_content.json', 'r', encoding='utf-8') as f:
-        contents = json.load(f)
+    # خواندن محتوای جمع‌آوری شده (stream، رکورد به رکورد)
+    contents = iter_records('scraped_content/data/scraped_content.jsonl')
     
     # فیلتر بر اساس کلمات کلیدی
     keywords = ['نژاد', 'تربیت', 'بیماری']
@@ -85,22 +84,20 @@ def example_import_preparation():
     
     from validate_content import ContentValidator
     
-    # خواندن محتوا
-    with open('scraped_content/data/scraped_content.json', 'r', encoding='utf-8') as f:
-        contents = json.load(f)
+    # خواندن محتوا (stream)
+    contents = iter_records('scraped_content/data/scraped_content.jsonl')
     
-    # اعتبارسنجی
+    # اعتبارسنجی و ذخیره محتواهای معتبر بدون بارگذاری کل فایل در حافظه
     validator = ContentValidator()
-    valid_contents, invalid_contents = validator.validate_batch(contents)
+    invalid_contents = []
+    valid_count = write_records(
+        'scraped_content/data/validated_content.jsonl',
+        validator.iter_valid(contents, on_invalid=invalid_contents.append)
+    )
     
-    print(f"\n✓ محتواهای معتبر: {len(valid_contents)}")
+    print(f"\n✓ محتواهای معتبر: {valid_count}")
     print(f"❌ محتواهای نامعتبر: {len(invalid_contents)}")
-    
-    # ذخیره محتواهای معتبر
-    if valid_contents:
-        with open('scraped_content/data/validated_content.json', 'w', encoding='utf-8') as f:
-            json.dump(valid_contents, f, ensure_ascii=False, indent=2)
-        print("✓ محتواهای معتبر ذخیره شدند")
+    print("✓ محتواهای معتبر ذخیره شدند")
 
 
 if __name__ == "__main__":
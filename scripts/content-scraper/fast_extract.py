@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+استخراج سریع محتوا با lxml در یک پیمایش درخت
+
+خروجی دقیقاً همان ساختار `extract_meta_tags` و `extract_content` در
+ContentScraper است (headings / paragraphs / images / links / confidence و meta)،
+اما به جای ساخت درخت BeautifulSoup با html.parser و چندین بار `find_all`، درخت
+lxml فقط یک بار پیمایش می‌شود. محتوا فقط از بدنه اصلی مقاله (main_content.py)
+استخراج می‌شود.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+import lxml.html
+
+from main_content import find_main_content, is_tiny_image, iter_lxml, lxml_nodes, lxml_text
+
+HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+
+# (نوع صفت، مقدار) -> کلید در meta_data
+META_FIELDS = {
+    ('name', 'description'): 'description',
+    ('name', 'keywords'): 'keywords',
+    ('property', 'og:title'): 'og_title',
+    ('property', 'og:description'): 'og_description',
+    ('property', 'og:image'): 'og_image',
+}
+
+
+def parse_html(html: str):
+    """ساخت درخت lxml از HTML"""
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # رشته‌های unicode با اعلان encoding در XML پذیرفته نمی‌شوند
+        return lxml.html.document_fromstring(html.encode('utf-8'))
+
+
+class FastExtractor:
+    """استخراج meta و محتوا با یک پیمایش روی درخت lxml"""
+
+    def __init__(self, clean_text: Callable[[str], str],
+                 clean_batch: Optional[Callable[[List[str]], List[str]]] = None,
+                 min_paragraph_length: int = 20, main_content: bool = True):
+        self.clean_text = clean_text
+        self.clean_batch = clean_batch or (lambda texts: [clean_text(text) for text in texts])
+        self.min_paragraph_length = min_paragraph_length
+        # False: محتوای کل صفحه (شامل منو، فوتر و ستون‌های کناری)
+        self.main_content = main_content
+
+    def extract(self, html: str) -> Tuple[Dict, Dict]:
+        """بازگرداندن (meta_data, content) برای یک صفحه"""
+        return self.extract_tree(parse_html(html))
+
+    def extract_tree(self, root) -> Tuple[Dict, Dict]:
+        # متن‌های خام در یک لیست جمع می‌شوند و در پایان یک‌جا پاکسازی می‌شوند
+        raw: List[str] = []
+
+        def defer(text: str) -> int:
+            raw.append(text or '')
+            return len(raw) - 1
+
+        meta_refs: Dict[str, int] = {}
+        og_image = ''
+        heading_refs: List[List[int]] = [[] for _ in range(6)]
+        paragraph_refs: List[int] = []
+        image_refs: List[Tuple[str, int, int]] = []
+        link_refs: List[Tuple[str, int]] = []
+
+        for el in root.iter('meta', 'title'):
+            if el.tag == 'meta':
+                for attr in ('name', 'property'):
+                    key = META_FIELDS.get((attr, el.get(attr)))
+                    if key == 'og_image':
+                        if 'og_image' not in meta_refs:
+                            meta_refs['og_image'] = -1
+                            og_image = el.get('content', '')
+                    elif key and key not in meta_refs:
+                        meta_refs[key] = defer(el.get('content', ''))
+
+            elif 'title' not in meta_refs:
+                meta_refs['title'] = defer(el.text_content())
+
+        confidence = None
+        if self.main_content:
+            nodes = lxml_nodes(root)
+            body, pruned, confidence = find_main_content(nodes, lxml_text)
+            elements = iter_lxml(body, pruned)
+        else:
+            elements = root.iter()
+
+        for el in elements:
+            tag = el.tag
+            if not isinstance(tag, str):
+                # comment / processing instruction
+                continue
+
+            if tag == 'p':
+                paragraph_refs.append(defer(el.text_content()))
+
+            elif tag == 'a':
+                href = el.get('href')
+                if href:
+                    link_refs.append((href, defer(el.text_content())))
+
+            elif tag == 'img':
+                src = el.get('src') or el.get('data-src') or el.get('data-lazy-src')
+                if src and not is_tiny_image(el.get('width'), el.get('height')):
+                    image_refs.append((src, defer(el.get('alt', '')), defer(el.get('title', ''))))
+
+            elif tag in HEADING_LEVELS:
+                heading_refs[HEADING_LEVELS[tag] - 1].append(defer(el.text_content()))
+
+        cleaned = self.clean_batch(raw)
+
+        meta_data = {
+            'title': '',
+            'description': '',
+            'keywords': '',
+            'og_title': '',
+            'og_description': '',
+            'og_image': og_image,
+        }
+        for key, ref in meta_refs.items():
+            if key != 'og_image':
+                meta_data[key] = cleaned[ref]
+
+        # ترتیب مانند extract_content: همه h1 ها، سپس h2 ها و ...
+        headings = [
+            {'level': level, 'text': cleaned[ref]}
+            for level, refs in enumerate(heading_refs, start=1)
+            for ref in refs
+            if cleaned[ref]
+        ]
+        paragraphs = [
+            cleaned[ref] for ref in paragraph_refs
+            if cleaned[ref] and len(cleaned[ref]) > self.min_paragraph_length
+        ]
+        images = [
+            {'url': src, 'alt': cleaned[alt], 'title': cleaned[title]}
+            for src, alt, title in image_refs
+        ]
+        links = [
+            {'url': href, 'text': cleaned[ref]}
+            for href, ref in link_refs
+            if cleaned[ref]
+        ]
+
+        content = {
+            'headings': headings,
+            'paragraphs': paragraphs,
+            'images': images,
+            'links': links,
+            'confidence': confidence,
+        }
+        return meta_data, content
+
+    def listing_links(self, html: str) -> List[Tuple[str, str]]:
+        """(href, متن با حروف کوچک) همه لینک‌های یک صفحه فهرست"""
+        root = parse_html(html)
+        return [(a.get('href'), a.text_content().lower()) for a in root.iter('a') if a.get('href') is not None]
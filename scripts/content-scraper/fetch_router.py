@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مسیریابی دریافت صفحات: ابتدا requests، مرورگر فقط در صورت نیاز
+
+هر صفحه ابتدا با session سبک دریافت می‌شود. اگر HTML فقط پوسته یک برنامه
+JavaScript باشد (متن قابل مشاهده بسیار کم، بدون پاراگراف `<p>` یا هشدار
+noscript درباره JavaScript همراه با محتوای ضعیف) همان URL با pool مرورگرها
+(browser_pool.py) رندر می‌شود. تصمیم برای هر میزبان در SQLite ذخیره می‌شود تا
+صفحات بعدی همان سایت مستقیماً با موتور مناسب دریافت شوند؛ اگر رندر هم محتوای
+بهتری ندهد، میزبان با requests ادامه می‌دهد.
+
+در تنظیمات سایت، `use_selenium: true` همیشه مرورگر و `use_selenium: false`
+همیشه requests را انتخاب می‌کند؛ بدون این کلید تشخیص خودکار انجام می‌شود.
+`lean_render` و `block_domains` سایت هنگام رندر به pool مرورگرها داده می‌شوند.
+"""
+
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+HTTP = 'http'
+BROWSER = 'browser'
+
+# حداقل متن قابل مشاهده (نویسه) برای یک صفحه محتوایی
+MIN_TEXT = 500
+
+_HIDDEN_RE = re.compile(r'<(script|style|noscript|template|svg)\b.*?</\1\s*>', re.S | re.I)
+_TAG_RE = re.compile(r'<[^>]+>')
+_PARAGRAPH_RE = re.compile(r'<p[\s>]', re.I)
+_NOSCRIPT_RE = re.compile(r'<noscript\b[^>]*>(.*?)</noscript\s*>', re.S | re.I)
+_JS_WARNING_WORDS = ('javascript', 'جاوا اسکریپت', 'جاوااسکریپت')
+
+
+def visible_text_length(html: str) -> int:
+    """طول تقریبی متن قابل مشاهده صفحه (بدون script/style/noscript)"""
+    return len(' '.join(_TAG_RE.sub(' ', _HIDDEN_RE.sub(' ', html)).split()))
+
+
+def js_shell_reason(html: str, min_text: int = MIN_TEXT) -> Optional[str]:
+    """دلیل پوسته JavaScript بودن صفحه، یا None برای صفحه محتوایی"""
+    length = visible_text_length(html)
+    if length < min_text:
+        return f'متن صفحه فقط {length} نویسه است'
+    if not _PARAGRAPH_RE.search(html):
+        return 'صفحه هیچ پاراگرافی ندارد'
+    if length < min_text * 4:
+        for match in _NOSCRIPT_RE.finditer(html):
+            text = match.group(1).lower()
+            if any(word in text for word in _JS_WARNING_WORDS):
+                return 'هشدار noscript درباره JavaScript و محتوای کم'
+    return None
+
+
+class FetchRouter:
+    """انتخاب موتور دریافت (requests یا مرورگر) برای هر میزبان"""
+
+    def __init__(self, db_path: Path, browsers: int = 2, ttl: timedelta = timedelta(days=7),
+                 rate_limiter=None, metrics=None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        # pool مرورگرها فقط در اولین نیاز ساخته می‌شود (Selenium و Chrome اختیاری‌اند)
+        self.browsers = browsers
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self._pool = None
+        self._pool_failed = False
+        self._pool_lock = threading.Lock()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS host_engines (
+                host TEXT PRIMARY KEY,
+                engine TEXT NOT NULL,
+                reason TEXT,
+                decided_at TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        # تنظیم اجباری سایت‌ها (use_selenium) و تصمیم‌های کش شده در حافظه
+        self._forced: Dict[str, str] = {}
+        self._render_options: Dict[str, Tuple[Optional[bool], Tuple[str, ...]]] = {}
+        self._engines: Dict[str, Tuple[str, datetime]] = {}
+        cutoff = datetime.now() - self.ttl
+        for host, engine, decided_at in self._conn.execute("SELECT host, engine, decided_at FROM host_engines"):
+            decided = datetime.fromisoformat(decided_at)
+            if decided >= cutoff:
+                self._engines[host] = (engine, decided)
+
+        self.http_pages = 0
+        self.browser_pages = 0
+        self.escalations = 0
+
+    def configure_site(self, site: Dict):
+        """اعمال `use_selenium`، `lean_render` و `block_domains` تنظیمات سایت"""
+        host = urlparse(site['base_url']).netloc
+        self._render_options[host] = (site.get('lean_render'), tuple(site.get('block_domains', ())))
+        if 'use_selenium' in site:
+            self._forced[host] = BROWSER if site['use_selenium'] else HTTP
+
+    def engine_for(self, url: str) -> Optional[str]:
+        """موتور تعیین شده برای میزبان URL (None: هنوز تصمیمی گرفته نشده)"""
+        host = urlparse(url).netloc
+        if host in self._forced:
+            return self._forced[host]
+        with self._lock:
+            decision = self._engines.get(host)
+        if decision is None or datetime.now() - decision[1] > self.ttl:
+            return None
+        return decision[0]
+
+    def use_browser(self, url: str) -> bool:
+        return self.engine_for(url) == BROWSER and self.pool is not None
+
+    def _remember(self, host: str, engine: str, reason: Optional[str] = None):
+        now = datetime.now()
+        with self._lock:
+            previous = self._engines.get(host)
+            self._engines[host] = (engine, now)
+            if previous is not None and previous[0] == engine:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO host_engines (host, engine, reason, decided_at) VALUES (?, ?, ?, ?)",
+                (host, engine, reason, now.isoformat()),
+            )
+            self._conn.commit()
+        if engine == BROWSER:
+            print(f"🌐 {host}: دریافت با مرورگر ({reason})")
+
+    @property
+    def pool(self):
+        """pool مرورگرها (در اولین استفاده راه‌اندازی می‌شود؛ در صورت خطا None)"""
+        with self._pool_lock:
+            if self._pool is None and not self._pool_failed:
+                try:
+                    from browser_pool import BrowserPool
+                    pool = BrowserPool(size=self.browsers, rate_limiter=self.rate_limiter)
+                except ImportError as e:
+                    print(f"⚠️  Selenium در دسترس نیست؛ صفحات JavaScript با requests دریافت می‌شوند ({e})")
+                    pool = None
+                if pool is not None and pool.start():
+                    self._pool = pool
+                else:
+                    self._pool_failed = True
+            return self._pool
+
+    def render(self, url: str, throttle: bool = True) -> str:
+        """رندر صفحه با مرورگر (throttle=False: نوبت میزبان قبلاً گرفته شده است)"""
+        lean, block_domains = self._render_options.get(urlparse(url).netloc, (None, ()))
+        if self.metrics is not None:
+            with self.metrics.span('render'):
+                html = self.pool.render(url, lean, block_domains, throttle)
+        else:
+            html = self.pool.render(url, lean, block_domains, throttle)
+        with self._lock:
+            self.browser_pages += 1
+        return html
+
+    def route(self, url: str, html: str) -> str:
+        """بررسی HTML دریافت شده با requests و در صورت نیاز رندر دوباره با مرورگر"""
+        host = urlparse(url).netloc
+        forced = self._forced.get(host)
+        reason = None if forced == HTTP else js_shell_reason(html)
+        if reason is None:
+            with self._lock:
+                self.http_pages += 1
+            if forced is None and self.engine_for(url) is None:
+                self._remember(host, HTTP)
+            return html
+
+        if self.pool is None:
+            with self._lock:
+                self.http_pages += 1
+            return html
+
+        with self._lock:
+            self.escalations += 1
+        try:
+            rendered = self.render(url)
+        except Exception as e:
+            print(f"⚠️  رندر {url} با مرورگر ناموفق بود: {e}")
+            return html
+        # اگر مرورگر هم محتوای بهتری نداد، میزبان با requests ادامه می‌دهد
+        if js_shell_reason(rendered) is None or visible_text_length(rendered) > visible_text_length(html) * 2:
+            if forced is None:
+                self._remember(host, BROWSER, reason)
+            return rendered
+        if forced is None:
+            self._remember(host, HTTP, 'رندر با مرورگر محتوای بیشتری نداد')
+        return html
+
+    def stats(self) -> Dict:
+        with self._lock:
+            browser_hosts = sum(1 for engine, _ in self._engines.values() if engine == BROWSER)
+            return {
+                'http_pages': self.http_pages,
+                'browser_pages': self.browser_pages,
+                'escalations': self.escalations,
+                'browser_hosts': browser_hosts + sum(1 for e in self._forced.values() if e == BROWSER),
+            }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        with self._lock:
+            self._conn.close()
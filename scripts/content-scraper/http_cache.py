@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+کش HTTP پایدار (SQLite) برای درخواست‌های شرطی در اجراهای بعدی
+
+برای هر URL مقدار ETag، Last-Modified و hash بدنه پاسخ ذخیره می‌شود. در اجرای
+بعدی هدرهای `If-None-Match` / `If-Modified-Since` ارسال می‌شوند تا صفحات
+تغییر نکرده با 304 برگردند و دوباره پردازش نشوند. برای سرورهایی که درخواست
+شرطی را پشتیبانی نمی‌کنند، مقایسه hash بدنه همین کار را انجام می‌دهد.
+
+بدنه صفحات فهرست (keep_body) هم ذخیره می‌شود تا پاسخ 304 آن‌ها با همان بدنه
+پردازش شود و لینک مقالات از دست نرود.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class HttpCache:
+    """ذخیره اطلاعات اعتبارسنجی پاسخ‌ها بر اساس URL"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                digest TEXT,
+                fetched_at TEXT,
+                checked_at TEXT,
+                body BLOB
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(http_cache)")}
+        if 'body' not in columns:
+            self._conn.execute("ALTER TABLE http_cache ADD COLUMN body BLOB")
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.unchanged = 0
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, digest, fetched_at FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'digest': row[2], 'fetched_at': row[3]}
+
+    def cached_body(self, url: str) -> Optional[bytes]:
+        """بدنه ذخیره شده URL (فقط برای پاسخ‌هایی که با keep_body ذخیره شده‌اند)"""
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM http_cache WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """هدرهای درخواست شرطی برای URL در صورت وجود در کش"""
+        entry = self.get(url)
+        if entry is None:
+            self.misses += 1
+            return {}
+
+        self.hits += 1
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def mark_not_modified(self, url: str):
+        """ثبت پاسخ 304"""
+        self.not_modified += 1
+        self._touch(url)
+
+    def store(self, url: str, response, keep_body: bool = False) -> bool:
+        """ذخیره اطلاعات اعتبارسنجی یک پاسخ 200 (و با keep_body خود بدنه)
+
+        اگر بدنه با نسخه قبلی یکسان باشد False برمی‌گرداند (صفحه تغییر نکرده است).
+        """
+        digest = body_digest(response.content)
+        entry = self.get(url)
+        if entry is not None and entry['digest'] == digest:
+            self.unchanged += 1
+            self._touch(url)
+            if keep_body:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE http_cache SET body = ? WHERE url = ? AND body IS NULL", (response.content, url)
+                    )
+                    self._conn.commit()
+            return False
+
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO http_cache (url, etag, last_modified, digest, fetched_at, checked_at, body)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    digest = excluded.digest,
+                    fetched_at = excluded.fetched_at,
+                    checked_at = excluded.checked_at,
+                    body = excluded.body
+                """,
+                (url, response.headers.get('ETag'), response.headers.get('Last-Modified'), digest, now, now,
+                 response.content if keep_body else None),
+            )
+            self._conn.commit()
+        return True
+
+    def forget(self, url: str):
+        """حذف URL از کش (مثلاً وقتی پردازش صفحه شکست خورد)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def _touch(self, url: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET checked_at = ? WHERE url = ?", (datetime.now().isoformat(), url)
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+            'unchanged_body': self.unchanged,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def body_digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
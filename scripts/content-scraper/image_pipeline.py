@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+صف دانلود تصاویر، جدا از مرحله اسکرپ صفحات
+
+اسکرپ صفحه فقط ارجاع تصاویر را در صف می‌گذارد و بلافاصله ادامه می‌دهد؛
+تعداد محدودی worker تصاویر را دانلود می‌کنند. رکوردها ابتدا با ارجاع‌های
+`pending` ساخته می‌شوند و پس از پایان دانلود همه تصاویرشان تکمیل می‌شوند.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# وضعیت‌های یک ارجاع تصویر
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ImageDownloadPipeline:
+    """Pool محدود از threadها برای دانلود تصاویر با صف محدود (backpressure)"""
+
+    def __init__(self, download: Callable[[str, str], Optional[str]], workers: int = 4,
+                 max_queue: int = 200, on_record_done: Optional[Callable[[Dict], None]] = None):
+        self.download = download
+        self.workers = max(1, workers)
+        self.on_record_done = on_record_done
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._remaining: Dict[int, int] = {}
+        self._threads: List[threading.Thread] = []
+
+        self.submitted = 0
+        self.downloaded = 0
+        self.failed = 0
+        self.max_depth = 0
+        self._started_at: Optional[float] = None
+        self._busy_seconds = 0.0
+
+    def start(self):
+        """راه‌اندازی workerها"""
+        if self._threads:
+            return
+        self._started_at = time.monotonic()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'image-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, record: Dict, base_url: str):
+        """قرار دادن تصاویر pending یک رکورد در صف
+
+        اگر صف پر باشد، فراخواننده تا آزاد شدن جا منتظر می‌ماند.
+        """
+        refs = [img for img in record.get('images', []) if img.get('status') == PENDING]
+        if not refs:
+            self._finalize(record)
+            return
+
+        with self._lock:
+            self._remaining[id(record)] = len(refs)
+            self.submitted += len(refs)
+
+        for ref in refs:
+            self._queue.put((record, ref, base_url))
+            depth = self._queue.qsize()
+            if depth > self.max_depth:
+                self.max_depth = depth
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+
+            record, ref, base_url = job
+            started = time.monotonic()
+            try:
+                path = self.download(ref['url'], base_url)
+            except Exception as e:
+                print(f"خطا در دانلود تصویر {ref['url']}: {e}")
+                path = None
+            elapsed = time.monotonic() - started
+
+            with self._lock:
+                self._busy_seconds += elapsed
+                if path:
+                    ref['path'] = path
+                    ref['status'] = DONE
+                    self.downloaded += 1
+                else:
+                    ref['status'] = FAILED
+                    self.failed += 1
+                self._remaining[id(record)] -= 1
+                finished = self._remaining[id(record)] == 0
+                if finished:
+                    del self._remaining[id(record)]
+
+            try:
+                if finished:
+                    self._finalize(record)
+            except Exception as e:
+                print(f"خطا در ثبت رکورد {record.get('url', '')}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _finalize(self, record: Dict):
+        """جایگزینی ارجاع‌های pending با تصاویر دانلود شده"""
+        record['images'] = resolve_images(record.get('images', []))
+        if self.on_record_done:
+            self.on_record_done(record)
+
+    @property
+    def depth(self) -> int:
+        """تعداد تصاویر در انتظار دانلود"""
+        return self._queue.qsize()
+
+    def join(self):
+        """صبر تا پایان همه دانلودها و توقف workerها"""
+        self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def stats(self) -> Dict:
+        """آمار صف دانلود"""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        completed = self.downloaded + self.failed
+        return {
+            'submitted': self.submitted,
+            'downloaded': self.downloaded,
+            'failed': self.failed,
+            'queue_depth': self.depth,
+            'max_queue_depth': self.max_depth,
+            'elapsed_seconds': round(elapsed, 2),
+            'images_per_second': round(completed / elapsed, 2) if elapsed else 0.0,
+            'avg_download_seconds': round(self._busy_seconds / completed, 3) if completed else 0.0,
+        }
+
+
+def pending_refs(images: List[Dict], limit: int = 10) -> List[Dict]:
+    """ساخت ارجاع‌های pending از تصاویر استخراج شده"""
+    return [
+        {
+            'url': img['url'],
+            'alt': img['alt'],
+            'title': img['title'],
+            'status': PENDING,
+        }
+        for img in images[:limit]
+    ]
+
+
+def resolve_images(refs: List[Dict]) -> List[Dict]:
+    """تبدیل ارجاع‌ها به قالب نهایی تصاویر رکورد (فقط تصاویر موفق)"""
+    resolved = []
+    for ref in refs:
+        if 'status' not in ref:
+            resolved.append(ref)
+        elif ref['status'] == DONE:
+            resolved.append({
+                'path': ref['path'],
+                'alt': ref['alt'],
+                'title': ref['title'],
+            })
+    return resolved
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مرحله پردازش تصاویر روی ProcessPoolExecutor
+
+برای هر تصویر دانلود شده چند اندازه (thumb، card، full) در فرمت‌های مدرن
+(WebP و در صورت پشتیبانی Pillow، AVIF) ساخته می‌شود و یک manifest بر اساس
+hash محتوای تصویر ذخیره می‌گردد:
+
+    variants/<hash[:2]>/<hash>/card.webp
+    variants/<hash[:2]>/<hash>/manifest.json
+
+تغییر اندازه CPU-bound است و در پردازه‌های جداگانه اجرا می‌شود تا از GIL
+رد شود و روی همه هسته‌ها مقیاس‌پذیر باشد.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+# نام اندازه -> بیشترین ضلع (پیکسل)
+VARIANT_SIZES = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1920,
+}
+
+QUALITY = {
+    'webp': 80,
+    'avif': 60,
+    'jpeg': 85,
+}
+
+
+def avif_supported() -> bool:
+    """آیا Pillow نصب شده از نوشتن AVIF پشتیبانی می‌کند"""
+    try:
+        return bool(features.check('avif'))
+    except Exception:
+        return False
+
+
+def file_sha256(path: Path) -> str:
+    """hash محتوای فایل (خواندن تکه‌تکه)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def process_image(source: str, variants_dir: str, formats: Tuple[str, ...] = ('webp',)) -> Dict:
+    """ساخت همه اندازه‌ها و فرمت‌های یک تصویر و نوشتن manifest
+
+    این تابع در پردازه worker اجرا می‌شود، پس فقط مسیرها را می‌گیرد و
+    dict قابل serialize برمی‌گرداند. اگر manifest قبلاً ساخته شده باشد،
+    همان بازگردانده می‌شود.
+    """
+    source_path = Path(source)
+    image_hash = file_sha256(source_path)
+    out_dir = Path(variants_dir) / image_hash[:2] / image_hash
+    manifest_path = out_dir / 'manifest.json'
+
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(source_path) as img:
+        largest = max(VARIANT_SIZES.values())
+        if img.format == 'JPEG':
+            img.draft('RGB', (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+
+        manifest = {
+            'hash': image_hash,
+            'source': source_path.name,
+            'width': img.width,
+            'height': img.height,
+            'variants': {},
+        }
+
+        # از بزرگ به کوچک تا هر اندازه از اندازه قبلی ساخته شود
+        current = img
+        for name, size in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+            if current.width > size or current.height > size:
+                current = current.copy()
+                current.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+            entry = {'width': current.width, 'height': current.height, 'files': {}}
+            for fmt in formats:
+                filename = f"{name}.{fmt}"
+                target = out_dir / filename
+                tmp = out_dir / (filename + '.part')
+                current.save(tmp, format=fmt.upper(), quality=QUALITY.get(fmt, 80))
+                os.replace(tmp, target)
+                entry['files'][fmt] = filename
+            manifest['variants'][name] = entry
+
+    tmp_manifest = out_dir / 'manifest.json.part'
+    with open(tmp_manifest, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_manifest, manifest_path)
+
+    return manifest
+
+
+def timed_process_image(source: str, variants_dir: str, formats: Tuple[str, ...] = ('webp',)) -> Tuple[Dict, float]:
+    """process_image به همراه زمان اجرای آن در worker (ثانیه)"""
+    started = time.perf_counter()
+    manifest = process_image(source, variants_dir, formats)
+    return manifest, time.perf_counter() - started
+
+
+class ImageProcessor:
+    """اجرای process_image روی ProcessPoolExecutor و اتصال نتیجه به رکوردها"""
+
+    def __init__(self, output_dir: Path, workers: Optional[int] = None, avif: bool = False,
+                 metrics=None):
+        self.output_dir = Path(output_dir)
+        self.variants_dir = self.output_dir / 'variants'
+        self.variants_dir.mkdir(parents=True, exist_ok=True)
+
+        self.formats: Tuple[str, ...] = ('webp',)
+        if avif:
+            if avif_supported():
+                self.formats = ('webp', 'avif')
+            else:
+                print("⚠️  Pillow از AVIF پشتیبانی نمی‌کند؛ فقط WebP ساخته می‌شود")
+
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._futures: Dict[str, Future] = {}
+        self._outstanding = 0
+        self.processed = 0
+        self.failed = 0
+
+    def submit(self, relative_path: str) -> Future:
+        """ارسال یک تصویر (مسیر نسبی به output_dir) برای پردازش؛ هر فایل یک بار پردازش می‌شود"""
+        with self._lock:
+            future = self._futures.get(relative_path)
+            if future is None:
+                future = self.executor.submit(
+                    timed_process_image, str(self.output_dir / relative_path), str(self.variants_dir),
+                    self.formats,
+                )
+                future.add_done_callback(self._observe)
+                self._futures[relative_path] = future
+            return future
+
+    def submit_record(self, record: Dict, on_done: Optional[Callable[[Dict], None]] = None):
+        """پردازش همه تصاویر یک رکورد و افزودن `variants` به هر تصویر
+
+        وقتی همه تصاویر رکورد پردازش شدند، on_done (در صورت وجود) صدا زده می‌شود.
+        """
+        images = [img for img in record.get('images', []) if img.get('path')]
+        if not images:
+            if on_done:
+                on_done(record)
+            return
+
+        remaining = [len(images)]
+        with self._lock:
+            self._outstanding += len(images)
+
+        def attach(img: Dict, future: Future):
+            try:
+                img['variants'] = self.variant_paths(future.result()[0])
+                with self._lock:
+                    self.processed += 1
+            except Exception as e:
+                print(f"خطا در پردازش تصویر {img['path']}: {e}")
+                with self._lock:
+                    self.failed += 1
+
+            try:
+                with self._lock:
+                    remaining[0] -= 1
+                    finished = remaining[0] == 0
+                if finished and on_done:
+                    on_done(record)
+            except Exception as e:
+                print(f"خطا در ثبت رکورد {record.get('url', '')}: {e}")
+            finally:
+                with self._lock:
+                    self._outstanding -= 1
+                    if self._outstanding == 0:
+                        self._idle.notify_all()
+
+        for img in images:
+            future = self.submit(img['path'])
+            future.add_done_callback(lambda f, img=img: attach(img, f))
+
+    def _observe(self, future: Future):
+        """ثبت زمان پردازش هر تصویر (یک بار برای هر فایل) در metrics"""
+        if self.metrics is not None and not future.cancelled() and future.exception() is None:
+            self.metrics.observe('image_resize', future.result()[1])
+
+    def variant_paths(self, manifest: Dict) -> Dict[str, str]:
+        """مسیر نسبی بهترین فرمت هر اندازه (مثلاً {'card': 'variants/ab/<hash>/card.webp'})"""
+        base = self.variants_dir.relative_to(self.output_dir) / manifest['hash'][:2] / manifest['hash']
+        return {
+            name: str(base / entry['files'][self.formats[0]])
+            for name, entry in manifest['variants'].items()
+        }
+
+    def join(self):
+        """صبر تا پایان همه پردازش‌ها و بستن pool"""
+        with self._idle:
+            while self._outstanding:
+                self._idle.wait()
+        self.executor.shutdown(wait=True)
+
+    def stats(self) -> Dict:
+        return {
+            'processed': self.processed,
+            'failed': self.failed,
+            'unique_images': len(self._futures),
+            'formats': list(self.formats),
+        }
+
+
+def featured_image(item: Dict) -> Optional[str]:
+    """تصویر شاخص رکورد: نسخه card در صورت وجود، در غیر این صورت فایل اصلی"""
+    if not item.get('images'):
+        return None
+    image = item['images'][0]
+    return image.get('variants', {}).get('card') or image['path']
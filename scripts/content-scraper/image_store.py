@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مخزن تصاویر بر اساس محتوا (content-addressed)
+
+هر تصویر با SHA-256 بایت‌های دریافت شده شناسایی و در مسیر
+`images/<sha[:2]>/<sha><ext>` ذخیره می‌شود؛ پس یک عکس که از چند URL یا با
+query string های مختلف CDN سرو می‌شود فقط یک بار ذخیره می‌شود. برای نسخه‌های
+re-encode یا تغییر اندازه داده شده از یک عکس، اثر انگشت ادراکی dHash در
+NearDuplicateIndex نگه‌داری می‌شود.
+
+نگاشت URL به hash، مشخصات تصاویر و آمار در SQLite ذخیره می‌شود؛ آمار از
+همین index خوانده می‌شود و نیازی به پیمایش پوشه تصاویر نیست.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from PIL import Image
+
+from near_duplicates import NearDuplicateIndex
+
+# پسوند فایل بر اساس فرمت تشخیص داده شده توسط Pillow
+FORMAT_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'WEBP': '.webp',
+    'GIF': '.gif',
+    'BMP': '.bmp',
+    'TIFF': '.tif',
+}
+
+DHASH_SIZE = 8
+
+
+def dhash(image_path: Path) -> Optional[int]:
+    """اثر انگشت ادراکی 64 بیتی (difference hash) یک تصویر"""
+    try:
+        with Image.open(image_path) as img:
+            if img.format == 'JPEG':
+                # decode در مقیاس کوچک؛ برای 9x8 پیکسل رزولوشن کامل لازم نیست
+                img.draft('L', (DHASH_SIZE * 8, DHASH_SIZE * 8))
+            small = img.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.LANCZOS)
+            pixels = list(small.getdata())
+    except Exception:
+        return None
+
+    fingerprint = 0
+    width = DHASH_SIZE + 1
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            left = pixels[row * width + col]
+            right = pixels[row * width + col + 1]
+            fingerprint = (fingerprint << 1) | (left > right)
+    return fingerprint
+
+
+class ImageStore:
+    """ذخیره تصاویر با کلید SHA-256 و تشخیص نسخه‌های مشابه با dHash"""
+
+    def __init__(self, images_dir: Path, db_path: Path, max_distance: int = 4):
+        self.images_dir = Path(images_dir)
+        self.images_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS images (
+                sha256 TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                width INTEGER,
+                height INTEGER,
+                bytes INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS image_urls (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                first_seen TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_image_urls_sha ON image_urls (sha256);
+        """)
+        self._conn.commit()
+        self.perceptual = NearDuplicateIndex(self.db_path, max_distance=max_distance, prefix='dhash')
+
+        # تصاویری که در حال افزوده شدن هستند؛ worker دیگری که همان تصویر را
+        # دانلود کرده منتظر می‌ماند تا نسخه دوم ذخیره نشود
+        self._inflight: Dict[str, threading.Event] = {}
+
+        self.url_hits = 0
+        self.exact_duplicates = 0
+        self.perceptual_duplicates = 0
+        self.stored = 0
+
+    def path_for(self, sha256: str, ext: str) -> Path:
+        """مسیر shard شده یک تصویر"""
+        return self.images_dir / sha256[:2] / f"{sha256}{ext}"
+
+    def _relative(self, path: str) -> str:
+        return str(Path(self.images_dir.name) / path)
+
+    def lookup_url(self, url: str) -> Optional[str]:
+        """مسیر (نسبت به پوشه خروجی) تصویر قبلاً ذخیره شده برای یک URL"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT i.path FROM image_urls u JOIN images i ON i.sha256 = u.sha256 WHERE u.url = ?", (url,)
+            ).fetchone()
+        if row is None or not (self.images_dir / row[0]).exists():
+            return None
+        self.url_hits += 1
+        return self._relative(row[0])
+
+    def _map_url(self, url: str, sha256: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO image_urls (url, sha256, first_seen) VALUES (?, ?, ?)",
+            (url, sha256, datetime.now().isoformat()),
+        )
+
+    def _existing(self, sha256: str) -> Optional[str]:
+        row = self._conn.execute("SELECT path FROM images WHERE sha256 = ?", (sha256,)).fetchone()
+        if row is None or not (self.images_dir / row[0]).exists():
+            return None
+        return row[0]
+
+    def add(self, url: str, tmp_path: Path, sha256: str,
+            prepare: Optional[Callable[[Path], None]] = None) -> str:
+        """افزودن فایل دانلود شده به مخزن و بازگرداندن مسیر نسبی نهایی
+
+        اگر همین بایت‌ها یا نسخه ادراکی مشابهی قبلاً ذخیره شده باشد فایل موقت
+        حذف و مسیر تصویر موجود برگردانده می‌شود. `prepare(path)` (مثلاً کوچک
+        کردن تصویر) فقط برای تصاویر جدید و پیش از انتقال به مسیر نهایی اجرا می‌شود.
+        """
+        tmp_path = Path(tmp_path)
+
+        while True:
+            with self._lock:
+                existing = self._existing(sha256)
+                if existing is not None:
+                    self._map_url(url, sha256)
+                    self._conn.commit()
+                    self.exact_duplicates += 1
+                    tmp_path.unlink()
+                    return self._relative(existing)
+                pending = self._inflight.get(sha256)
+                if pending is None:
+                    self._inflight[sha256] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            return self._store(url, tmp_path, sha256, prepare)
+        finally:
+            with self._lock:
+                self._inflight.pop(sha256).set()
+
+    def _store(self, url: str, tmp_path: Path, sha256: str,
+               prepare: Optional[Callable[[Path], None]]) -> str:
+        fingerprint = dhash(tmp_path)
+        similar = self.perceptual.check_and_add_fingerprint(sha256, fingerprint)
+        if similar is not None:
+            with self._lock:
+                pending = self._inflight.get(similar)
+            if pending is not None:
+                pending.wait()
+            with self._lock:
+                existing = self._existing(similar)
+                if existing is not None:
+                    self._map_url(url, similar)
+                    self._conn.commit()
+                    self.perceptual_duplicates += 1
+                    tmp_path.unlink()
+                    return self._relative(existing)
+            # فایل تصویر مشابه ذخیره نشده یا حذف شده است؛ همین نسخه جایگزین آن می‌شود
+            self.perceptual.add_fingerprint(sha256, fingerprint)
+
+        if prepare is not None:
+            try:
+                prepare(tmp_path)
+            except Exception:
+                pass
+
+        width = height = None
+        ext = '.jpg'
+        try:
+            with Image.open(tmp_path) as img:
+                width, height = img.size
+                ext = FORMAT_EXTENSIONS.get(img.format, ext)
+        except Exception:
+            pass
+
+        final_path = self.path_for(sha256, ext)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, final_path)
+        relative = str(final_path.relative_to(self.images_dir))
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO images (sha256, path, width, height, bytes, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (sha256, relative, width, height, final_path.stat().st_size, datetime.now().isoformat()),
+            )
+            self._map_url(url, sha256)
+            self._conn.commit()
+            self.stored += 1
+        return self._relative(relative)
+
+    def stats(self) -> Dict:
+        """آمار مخزن از index (بدون پیمایش پوشه)"""
+        with self._lock:
+            images, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM images").fetchone()
+            urls = self._conn.execute("SELECT COUNT(*) FROM image_urls").fetchone()[0]
+        return {
+            'images': images,
+            'bytes': total_bytes,
+            'urls': urls,
+            'stored': self.stored,
+            'url_hits': self.url_hits,
+            'exact_duplicates': self.exact_duplicates,
+            'perceptual_duplicates': self.perceptual_duplicates,
+        }
+
+    def close(self):
+        self.perceptual.close()
+        with self._lock:
+            self._conn.close()
@@ -2,17 +2,281 @@
 # -*- coding: utf-8 -*-
 """
 اسکریپت import محتوای جمع‌آوری شده به دیتابیس PostgreSQL
+
+دو حالت import وجود دارد:
+- bulk (پیش‌فرض): رکوردها در دسته‌های بزرگ با COPY به جدول موقت منتقل می‌شوند
+  و با یک `INSERT ... ON CONFLICT (slug)` به blog_posts اضافه می‌شوند. تصاویر هم
+  به همین شکل یک‌جا درج می‌شوند.
+- row: درج تک‌تک رکوردها (هر رکورد در savepoint خودش)
+
+در هر دو حالت خطای یک رکورد باعث شکست بقیه رکوردها نمی‌شود و گزارش می‌شود.
 """
 
+import argparse
+import io
 import json
-import psycopg2
-from psycopg2.extras import execute_values
 from pathlib import Path
 import sys
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import psycopg2
+    from psycopg2.extras import execute_values
+except ImportError:
+    # توابع آماده‌سازی رکورد (مثلاً برای benchmarks) بدون psycopg2 هم قابل استفاده‌اند
+    psycopg2 = None
+
+from pg_copy import copy_row
+from records_io import iter_records
+from sql_export import AUTHOR_ID, CATEGORY_ID, POST_COLUMNS, post_values
+
+# ستون‌هایی که در حالت on_conflict='update' بازنویسی می‌شوند
+UPDATE_COLUMNS = ('title', 'excerpt', 'content', 'featured_image', 'meta_description', 'meta_keywords')
+
+
+def image_values(item: Dict) -> List[Tuple]:
+    """(image_url, alt_text, title) تصاویر یک رکورد"""
+    return [
+        (img['path'], img.get('alt', ''), img.get('title', ''))
+        for img in item.get('images') or []
+    ]
+
+
+def conflict_clause(on_conflict: str) -> str:
+    """بخش ON CONFLICT (slug) برای حالت nothing یا update"""
+    if on_conflict == 'update':
+        return "DO UPDATE SET " + ', '.join(f"{col} = EXCLUDED.{col}" for col in UPDATE_COLUMNS) \
+            + ", updated_at = NOW()"
+    return "DO NOTHING"
+
+
+def new_stats() -> Dict:
+    return {'imported': 0, 'updated': 0, 'skipped': 0, 'failed': []}
+
+
+def insert_row(cur, item: Dict, on_conflict: str, stats: Dict):
+    """درج یک رکورد در savepoint خودش تا خطای آن تراکنش را خراب نکند"""
+    try:
+        values = post_values(item)
+    except (KeyError, TypeError, ValueError) as e:
+        stats['failed'].append((item.get('slug') or item.get('url', '?'), str(e)))
+        return
+
+    cur.execute("SAVEPOINT import_row")
+    try:
+        conflict = conflict_clause(on_conflict)
+        cur.execute(f"""
+            INSERT INTO blog_posts (
+                title, slug, excerpt, content, featured_image,
+                meta_description, meta_keywords, author_id, category_id,
+                is_published, published_at, created_at
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
+            ON CONFLICT (slug) {conflict}
+            RETURNING id, (xmax = 0) AS inserted
+        """, values + (AUTHOR_ID, CATEGORY_ID, True))
+
+        row = cur.fetchone()
+        if row is None:
+            print(f"⏭️  محتوا با slug '{item['slug']}' قبلاً وجود دارد")
+            stats['skipped'] += 1
+            cur.execute("RELEASE SAVEPOINT import_row")
+            return
+
+        post_id, inserted = row
+        if not inserted:
+            cur.execute("DELETE FROM blog_post_images WHERE post_id = %s", (post_id,))
+
+        # Insert تصاویر
+        images = image_values(item)
+        if images:
+            execute_values(
+                cur,
+                """
+                INSERT INTO blog_post_images (post_id, image_url, alt_text, title)
+                VALUES %s
+                """,
+                [(post_id,) + img for img in images]
+            )
+
+        cur.execute("RELEASE SAVEPOINT import_row")
+        stats['imported' if inserted else 'updated'] += 1
+        print(f"✓ محتوا import شد: {item['title'][:50]}...")
+
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT import_row")
+        print(f"❌ خطا در import محتوا '{item.get('title', '')}': {e}")
+        stats['failed'].append((item['slug'], str(e)))
+
+
+def create_staging_tables(cur):
+    """جداول موقت برای COPY هر دسته"""
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS staging_posts (
+            row_no INTEGER,
+            title TEXT,
+            slug TEXT,
+            excerpt TEXT,
+            content TEXT,
+            featured_image TEXT,
+            meta_description TEXT,
+            meta_keywords TEXT
+        );
+        CREATE TEMP TABLE IF NOT EXISTS staging_images (
+            row_no INTEGER,
+            slug TEXT,
+            image_url TEXT,
+            alt_text TEXT,
+            title TEXT
+        );
+        CREATE TEMP TABLE IF NOT EXISTS staging_upserted (
+            id INTEGER,
+            slug TEXT,
+            inserted BOOLEAN
+        );
+    """)
+
+
+def import_batch(cur, batch: List[Dict], on_conflict: str, stats: Dict):
+    """import یک دسته با COPY و یک INSERT ... ON CONFLICT"""
+    post_rows = []
+    image_rows = []
+    seen = set()
+
+    for item in batch:
+        try:
+            values = post_values(item)
+        except (KeyError, TypeError, ValueError) as e:
+            stats['failed'].append((item.get('slug') or item.get('url', '?'), str(e)))
+            continue
+
+        slug = values[1]
+        if slug in seen:
+            # دو بار یک slug در یک INSERT ... ON CONFLICT DO UPDATE مجاز نیست
+            print(f"⏭️  slug تکراری در ورودی: '{slug}'")
+            stats['skipped'] += 1
+            continue
+        seen.add(slug)
+
+        row_no = len(post_rows)
+        post_rows.append(copy_row((row_no,) + values))
+        for img in image_values(item):
+            image_rows.append(copy_row((len(image_rows), slug) + img))
+
+    if not post_rows:
+        return
+
+    cur.execute("TRUNCATE staging_posts, staging_images, staging_upserted")
+    cur.copy_expert(
+        f"COPY staging_posts (row_no, {', '.join(POST_COLUMNS)}) FROM STDIN",
+        io.StringIO(''.join(post_rows)),
+    )
+    if image_rows:
+        cur.copy_expert(
+            "COPY staging_images (row_no, slug, image_url, alt_text, title) FROM STDIN",
+            io.StringIO(''.join(image_rows)),
+        )
 
-def import_to_database(json_file: str, db_config: dict):
+    conflict = conflict_clause(on_conflict)
+    cur.execute(f"""
+        WITH upserted AS (
+            INSERT INTO blog_posts (
+                title, slug, excerpt, content, featured_image,
+                meta_description, meta_keywords, author_id, category_id,
+                is_published, published_at, created_at
+            )
+            SELECT {', '.join(POST_COLUMNS)}, %s, %s, true, NOW(), NOW()
+            FROM staging_posts
+            ORDER BY row_no
+            ON CONFLICT (slug) {conflict}
+            RETURNING id, slug, (xmax = 0) AS inserted
+        )
+        INSERT INTO staging_upserted (id, slug, inserted)
+        SELECT id, slug, inserted FROM upserted
+    """, (AUTHOR_ID, CATEGORY_ID))
+
+    # تصاویر قبلی پست‌های به‌روزرسانی شده جایگزین می‌شوند
+    cur.execute("""
+        DELETE FROM blog_post_images
+        WHERE post_id IN (SELECT id FROM staging_upserted WHERE NOT inserted)
+    """)
+    cur.execute("""
+        INSERT INTO blog_post_images (post_id, image_url, alt_text, title)
+        SELECT u.id, i.image_url, i.alt_text, i.title
+        FROM staging_images i
+        JOIN staging_upserted u ON u.slug = i.slug
+        ORDER BY i.row_no
+    """)
+
+    cur.execute("""
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+        FROM staging_upserted
+    """)
+    inserted, updated = cur.fetchone()
+    stats['imported'] += inserted
+    stats['updated'] += updated
+    stats['skipped'] += len(post_rows) - inserted - updated
+
+
+def bulk_import(conn, items: Iterable[Dict], on_conflict: str = 'nothing', batch_size: int = 5000) -> Dict:
+    """import دسته‌ای؛ هر دسته جداگانه commit می‌شود
+
+    اگر دسته‌ای در دیتابیس خطا بدهد، همان دسته با درج تک‌تک رکوردها تکرار
+    می‌شود تا فقط رکوردهای معیوب گزارش شوند.
+    """
+    stats = new_stats()
+    cur = conn.cursor()
+    create_staging_tables(cur)
+    conn.commit()
+
+    def flush(batch: List[Dict]):
+        batch_stats = new_stats()
+        cur.execute("SAVEPOINT import_batch")
+        try:
+            import_batch(cur, batch, on_conflict, batch_stats)
+            cur.execute("RELEASE SAVEPOINT import_batch")
+            for key in ('imported', 'updated', 'skipped'):
+                stats[key] += batch_stats[key]
+            stats['failed'].extend(batch_stats['failed'])
+        except Exception as e:
+            cur.execute("ROLLBACK TO SAVEPOINT import_batch")
+            print(f"⚠️  خطا در import دسته‌ای ({e}); تلاش دوباره به صورت تک‌رکوردی...")
+            for item in batch:
+                insert_row(cur, item, on_conflict, stats)
+        conn.commit()
+        done = stats['imported'] + stats['updated'] + stats['skipped'] + len(stats['failed'])
+        print(f"📦 {done} رکورد پردازش شد")
+
+    batch: List[Dict] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    cur.close()
+    return stats
+
+
+def row_import(conn, items: Iterable[Dict], on_conflict: str = 'nothing') -> Dict:
+    """import تک‌رکوردی (هر رکورد در savepoint خودش)"""
+    stats = new_stats()
+    cur = conn.cursor()
+    for item in items:
+        insert_row(cur, item, on_conflict, stats)
+    conn.commit()
+    cur.close()
+    return stats
+
+
+def import_to_database(json_file: str, db_config: dict, mode: str = 'bulk',
+                       on_conflict: str = 'nothing', batch_size: int = 5000):
     """Import محتوا از JSON به PostgreSQL"""
-    
+    if psycopg2 is None:
+        print("❌ psycopg2 نصب نیست (pip install psycopg2-binary)")
+        return
+
     # اتصال به دیتابیس
     try:
         conn = psycopg2.connect(
@@ -22,92 +286,50 @@ def import_to_database(json_file: str, db_config: dict):
             user=db_config['user'],
             password=db_config['password']
         )
-        cur = conn.cursor()
         print("✓ اتصال به دیتابیس برقرار شد")
     except Exception as e:
         print(f"❌ خطا در اتصال به دیتابیس: {e}")
         return
-    
-    # خواندن فایل JSON
+
+    # رکوردها به صورت stream خوانده می‌شوند (.jsonl خط به خط)
+    content_data = iter_records(json_file)
+
     try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            content_data = json.load(f)
-        print(f"✓ فایل JSON خوانده شد: {len(content_data)} محتوا")
-    except Exception as e:
-        print(f"❌ خطا در خواندن فایل JSON: {e}")
+        if mode == 'bulk':
+            stats = bulk_import(conn, content_data, on_conflict=on_conflict, batch_size=batch_size)
+        else:
+            stats = row_import(conn, content_data, on_conflict=on_conflict)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"❌ خطا در خواندن فایل {json_file}: {e}")
+        conn.close()
         return
-    
-    # Import هر محتوا
-    imported = 0
-    skipped = 0
-    
-    for item in content_data:
-        try:
-            # بررسی وجود slug
-            cur.execute("SELECT id FROM blog_posts WHERE slug = %s", (item['slug'],))
-            if cur.fetchone():
-                print(f"⏭️  محتوا با slug '{item['slug']}' قبلاً وجود دارد")
-                skipped += 1
-                continue
-            
-            # Insert محتوا
-            cur.execute("""
-                INSERT INTO blog_posts (
-                    title, slug, excerpt, content, featured_image,
-                    meta_description, meta_keywords, author_id, category_id,
-                    is_published, published_at, created_at
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
-                RETURNING id
-            """, (
-                item['title'],
-                item['slug'],
-                item['excerpt'],
-                item['content'],
-                item['images'][0]['path'] if item['images'] else None,
-                item['meta_description'],
-                item['meta_keywords'],
-                1,  # author_id - باید تغییر دهید
-                1,  # category_id - باید تغییر دهید
-                True
-            ))
-            
-            post_id = cur.fetchone()[0]
-            
-            # Insert تصاویر
-            if item['images']:
-                image_data = [
-                    (post_id, img['path'], img['alt'], img['title'])
-                    for img in item['images']
-                ]
-                execute_values(
-                    cur,
-                    """
-                    INSERT INTO blog_post_images (post_id, image_url, alt_text, title)
-                    VALUES %s
-                    """,
-                    image_data
-                )
-            
-            imported += 1
-            print(f"✓ محتوا import شد: {item['title'][:50]}...")
-            
-        except Exception as e:
-            print(f"❌ خطا در import محتوا '{item['title']}': {e}")
-            skipped += 1
-    
-    # Commit تغییرات
-    conn.commit()
-    cur.close()
+
     conn.close()
-    
+
     print(f"\n{'='*60}")
     print(f"✅ Import با موفقیت انجام شد!")
-    print(f"📊 تعداد import شده: {imported}")
-    print(f"⏭️  تعداد رد شده: {skipped}")
+    print(f"📊 تعداد import شده: {stats['imported']}")
+    if stats['updated']:
+        print(f"🔄 تعداد به‌روزرسانی شده: {stats['updated']}")
+    print(f"⏭️  تعداد رد شده: {stats['skipped']}")
+    if stats['failed']:
+        print(f"❌ تعداد ناموفق: {len(stats['failed'])}")
+        for slug, error in stats['failed'][:10]:
+            print(f"  - {slug}: {error}")
     print(f"{'='*60}\n")
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Import محتوای جمع‌آوری شده به PostgreSQL')
+    parser.add_argument('json_file', nargs='?', default='scraped_content/data/scraped_content.json',
+                        help='مسیر فایل .json یا .jsonl')
+    parser.add_argument('--mode', choices=['bulk', 'row'], default='bulk',
+                        help='bulk: COPY + INSERT ... ON CONFLICT دسته‌ای، row: درج تک‌تک')
+    parser.add_argument('--on-conflict', choices=['nothing', 'update'], default='nothing',
+                        help='رفتار در صورت وجود slug: رد کردن یا به‌روزرسانی')
+    parser.add_argument('--batch-size', type=int, default=5000, help='اندازه هر دسته در حالت bulk')
+    args = parser.parse_args()
+
     # تنظیمات دیتابیس
     db_config = {
         'host': 'localhost',
@@ -116,17 +338,17 @@ def main():
         'user': 'postgres',
         'password': 'your_password'  # تغییر دهید
     }
-    
+
     # مسیر فایل JSON
-    json_file = 'scraped_content/data/scraped_content.json'
-    
+    json_file = args.json_file
+
     if not Path(json_file).exists():
         print(f"❌ فایل {json_file} یافت نشد!")
         sys.exit(1)
-    
-    import_to_database(json_file, db_config)
+
+    import_to_database(json_file, db_config, mode=args.mode,
+                       on_conflict=args.on_conflict, batch_size=args.batch_size)
 
 
 if __name__ == "__main__":
     main()
-
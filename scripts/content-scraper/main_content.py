@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تشخیص بدنه اصلی مقاله (حذف منو، فوتر، ستون کناری و ویجت‌ها) به سبک readability
+
+هر پاراگراف (`p`، `pre`، `td`، `blockquote`) بر اساس طول متن و تعداد ویرگول‌ها
+امتیاز می‌گیرد و امتیاز به والد و (با نصف مقدار) به والدِ والد آن اضافه می‌شود.
+امتیاز هر نامزد در (1 - چگالی لینک) ضرب می‌شود تا بلوک‌های پر از لینک (منو،
+مطالب مرتبط) کنار بروند؛ عناصر هم‌سطح بهترین نامزد که امتیاز کافی دارند یا
+پاراگراف متنی کم‌لینک هستند هم به بدنه اضافه می‌شوند. تگ‌های nav / footer /
+aside / form و عناصری که class یا id آن‌ها به ویجت، تبلیغ، نظرات و ... اشاره
+دارد از ابتدا کنار گذاشته می‌شوند.
+
+درخت (lxml یا BeautifulSoup) یک بار به لیست گره‌ها به ترتیب سند تبدیل می‌شود؛
+طول متن و متن لینک‌های هر زیردرخت در یک پیمایش معکوس جمع می‌شود، پس هزینه
+متناسب با اندازه صفحه است و هر دو موتور استخراج نتیجه یکسان دارند.
+
+اطمینان (0 تا 1) حاصل‌ضرب سهم بدنه از متن پاراگراف‌های صفحه، (1 - چگالی لینک)
+بدنه و کامل بودن طول آن (تا 500 نویسه) است؛ صفحه بدون هیچ پاراگراف معنادار
+اطمینان 0 می‌گیرد و کل body برای آن استفاده می‌شود.
+"""
+
+import re
+from typing import Callable, Iterator, List, NamedTuple, Set, Tuple
+
+from bs4 import Tag
+from bs4.element import NavigableString, PreformattedString
+
+# عناصری که هرگز بخشی از متن مقاله نیستند
+BOILERPLATE_TAGS = {
+    'nav', 'footer', 'aside', 'form', 'script', 'style', 'noscript', 'iframe', 'button', 'select',
+    'template', 'svg', 'canvas', 'dialog',
+}
+# عناصری که بر اساس class/id حذف نمی‌شوند
+_NEVER_UNLIKELY = {'html', 'body', 'article', 'main'}
+_UNLIKELY_RE = re.compile(
+    r'-ad-|\bads?\b|advert|banner|breadcrumb|combx|comment|community|cookie|disqus|footer|gdpr|menu|'
+    r'modal|newsletter|pager|pagination|popup|promo|related|remark|replies|share|shoutbox|sidebar|'
+    r'skyscraper|social|sponsor|subscribe|tag-?cloud|widget',
+    re.I,
+)
+_MAYBE_CANDIDATE_RE = re.compile(r'and|article|body|column|content|main|shadow|entry|post|story|text', re.I)
+_POSITIVE_RE = re.compile(r'article|body|content|entry|main|page|post|story|text|blog', re.I)
+_NEGATIVE_RE = re.compile(
+    r'-ad-|hidden|banner|combx|comment|contact|foot|footer|footnote|masthead|media|meta|outbrain|promo|'
+    r'related|scroll|share|shoutbox|sidebar|skyscraper|sponsor|shopping|tags|tool|widget',
+    re.I,
+)
+
+SCORED_TAGS = {'p', 'pre', 'td', 'blockquote'}
+# وزن اولیه نامزدها بر اساس تگ
+_TAG_WEIGHTS = {
+    'article': 10, 'main': 8, 'section': 5, 'div': 5,
+    'pre': 3, 'td': 3, 'blockquote': 3,
+    'address': -3, 'ol': -3, 'ul': -3, 'dl': -3, 'dd': -3, 'dt': -3, 'li': -3, 'form': -3,
+    'h1': -5, 'h2': -5, 'h3': -5, 'h4': -5, 'h5': -5, 'h6': -5, 'th': -5,
+}
+MIN_PARAGRAPH = 25
+_COMMAS = (',', '،')
+# حداقل ابعاد تصویر (صفت width/height) برای اینکه آیکون یا پیکسل ردیابی نباشد
+MIN_IMAGE_SIZE = 50
+
+
+class Node(NamedTuple):
+    element: object
+    tag: str
+    parent: int       # اندیس والد در لیست گره‌ها (-1 برای ریشه)
+    own_text: int     # تعداد نویسه‌های متن مستقیم عنصر (بدون فرزندان)
+    attrs: str        # class و id
+
+
+def lxml_nodes(root) -> List[Node]:
+    """گره‌های درخت lxml به ترتیب سند"""
+    nodes: List[Node] = []
+    index = {}
+    for el in root.iter():
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue
+        own = len((el.text or '').strip()) + sum(len((child.tail or '').strip()) for child in el)
+        parent = index.get(id(el.getparent()), -1)
+        index[id(el)] = len(nodes)
+        nodes.append(Node(el, tag, parent, own, f"{el.get('class', '')} {el.get('id', '')}"))
+    return nodes
+
+
+def soup_nodes(soup) -> List[Node]:
+    """گره‌های درخت BeautifulSoup به ترتیب سند"""
+    nodes: List[Node] = []
+    index = {}
+    for el in soup.find_all(True):
+        own = sum(len(child.strip()) for child in el.children
+                  if isinstance(child, NavigableString) and not isinstance(child, PreformattedString))
+        classes = el.get('class', '')
+        if isinstance(classes, list):
+            classes = ' '.join(classes)
+        parent = index.get(id(el.parent), -1)
+        index[id(el)] = len(nodes)
+        nodes.append(Node(el, el.name, parent, own, f"{classes} {el.get('id', '')}"))
+    return nodes
+
+
+def lxml_text(element) -> str:
+    return element.text_content()
+
+
+def soup_text(element) -> str:
+    return element.get_text()
+
+
+def _unlikely(node: Node) -> bool:
+    if node.tag in BOILERPLATE_TAGS:
+        return True
+    if node.tag in _NEVER_UNLIKELY or not node.attrs.strip():
+        return False
+    return bool(_UNLIKELY_RE.search(node.attrs)) and not _MAYBE_CANDIDATE_RE.search(node.attrs)
+
+
+def _initial_score(node: Node) -> float:
+    score = _TAG_WEIGHTS.get(node.tag, 0)
+    if node.attrs.strip():
+        if _NEGATIVE_RE.search(node.attrs):
+            score -= 25
+        if _POSITIVE_RE.search(node.attrs):
+            score += 25
+    return score
+
+
+def find_main_content(nodes: List[Node], text_of: Callable[[object], str]) -> Tuple[List[object], Set[int], float]:
+    """(عناصر بدنه اصلی به ترتیب سند، id عناصر حذف شده، اطمینان)
+
+    لیست nodes باید تا پایان پیمایش با iter_lxml زنده بماند تا proxy عناصر lxml
+    (و در نتیجه id آن‌ها) ثابت بمانند.
+    """
+    count = len(nodes)
+    excluded = [False] * count
+    pruned: Set[int] = set()
+    for i, node in enumerate(nodes):
+        if node.parent >= 0 and excluded[node.parent]:
+            excluded[i] = True
+        elif _unlikely(node):
+            excluded[i] = True
+            pruned.add(id(node.element))
+
+    # طول متن و متن لینک‌های هر زیردرخت (فرزندان پس از والد در ترتیب سند می‌آیند)
+    text = [0] * count
+    links = [0] * count
+    for i in range(count - 1, -1, -1):
+        if excluded[i]:
+            continue
+        node = nodes[i]
+        text[i] += node.own_text
+        if node.tag == 'a':
+            links[i] = text[i]
+        if node.parent >= 0:
+            text[node.parent] += text[i]
+            links[node.parent] += links[i]
+
+    scores = {}
+    paragraphs = []
+    for i, node in enumerate(nodes):
+        if excluded[i] or node.tag not in SCORED_TAGS or text[i] < MIN_PARAGRAPH:
+            continue
+        paragraphs.append(i)
+        content = text_of(node.element)
+        score = 1 + sum(content.count(comma) for comma in _COMMAS) + min(text[i] / 100, 3)
+        ancestor = node.parent
+        for divider in (1, 2):
+            if ancestor < 0:
+                break
+            if ancestor not in scores:
+                scores[ancestor] = _initial_score(nodes[ancestor])
+            scores[ancestor] += score / divider
+            ancestor = nodes[ancestor].parent
+
+    for i in scores:
+        scores[i] *= 1 - links[i] / text[i] if text[i] else 0
+
+    if not scores:
+        body = next((node.element for node in nodes if node.tag == 'body'), nodes[0].element if nodes else None)
+        return ([body] if body is not None else []), pruned, 0.0
+
+    best = max(scores, key=scores.get)
+    chosen = [best]
+    parent = nodes[best].parent
+    if parent >= 0:
+        # عناصر هم‌سطح که بخشی از همان مقاله‌اند (مثلاً بدنه در چند div پشت سر هم)
+        threshold = max(10.0, scores[best] * 0.2)
+        chosen = []
+        for i in range(parent + 1, count):
+            if nodes[i].parent != parent or excluded[i]:
+                continue
+            density = links[i] / text[i] if text[i] else 1.0
+            if (i == best or scores.get(i, 0) >= threshold
+                    or (nodes[i].tag == 'p' and text[i] > 80 and density < 0.25)):
+                chosen.append(i)
+
+    chosen_set = set(chosen)
+    inside = 0
+    for i in paragraphs:
+        ancestor = i
+        while ancestor >= 0 and ancestor not in chosen_set:
+            ancestor = nodes[ancestor].parent
+        if ancestor >= 0:
+            inside += text[i]
+    total = sum(text[i] for i in paragraphs)
+    chosen_text = sum(text[i] for i in chosen)
+    density = sum(links[i] for i in chosen) / chosen_text if chosen_text else 1.0
+    confidence = (inside / total) * (1 - density) * min(1.0, inside / 500) if total else 0.0
+    return [nodes[i].element for i in chosen], pruned, round(confidence, 2)
+
+
+def iter_lxml(elements: List[object], pruned: Set[int]) -> Iterator[object]:
+    """عناصر زیردرخت‌های elements به ترتیب سند، بدون زیردرخت‌های حذف شده"""
+    for element in elements:
+        stack = [element]
+        while stack:
+            el = stack.pop()
+            if id(el) in pruned or not isinstance(el.tag, str):
+                continue
+            yield el
+            stack.extend(reversed(el))
+
+
+def iter_soup(elements: List[object], pruned: Set[int]) -> Iterator[object]:
+    """معادل iter_lxml برای BeautifulSoup"""
+    for element in elements:
+        stack = [element]
+        while stack:
+            el = stack.pop()
+            if id(el) in pruned:
+                continue
+            yield el
+            stack.extend(reversed([child for child in el.children if isinstance(child, Tag)]))
+
+
+def is_tiny_image(width, height) -> bool:
+    """آیکون، لوگوی کوچک یا پیکسل ردیابی بر اساس صفت‌های width/height"""
+    for value in (width, height):
+        try:
+            if value is not None and int(str(value).strip().rstrip('px')) < MIN_IMAGE_SIZE:
+                return True
+        except ValueError:
+            continue
+    return False
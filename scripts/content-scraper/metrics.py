@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+معیارهای اجرای اسکرپر: زمان مراحل، شمارنده‌های هر میزبان و profiling اختیاری
+
+- `span(stage)` زمان هر اجرای یک مرحله را ثبت می‌کند (تعداد، مجموع، p50/p99 و
+  بیشینه). مجموع زمان یک مرحله در همه thread ها جمع می‌شود، پس با موازی‌سازی
+  می‌تواند از زمان کل اجرا بیشتر باشد؛ مقایسه مراحل با هم نشان می‌دهد اجرا
+  محدود به شبکه، parser یا تصاویر است.
+- شمارنده‌های هر میزبان: درخواست، اتصال، بایت (فشرده روی شبکه در صورت امکان)،
+  کدهای وضعیت، retry و cache hit.
+- گزارش JSON اجرا و در صورت نیاز فایل متنی Prometheus (textfile collector).
+- برای مراحل انتخاب شده cProfile در هر thread فعال می‌شود و در پایان نتیجه هر
+  مرحله در `<stage>.prof` ذخیره می‌شود (قابل مشاهده با `python -m pstats` یا
+  snakeviz). مراحلی که در پردازه‌های worker اجرا می‌شوند profile نمی‌شوند.
+"""
+
+import cProfile
+import json
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+STAGES = (
+    'throttle',        # صبر برای نوبت میزبان (rate limiter)
+    'connect',         # DNS + TCP + TLS اتصال‌های جدید
+    'discover',        # دریافت و خواندن stream نقشه‌های سایت و فیدها
+    'fetch',           # درخواست و دریافت بدنه صفحه
+    'render',          # رندر با مرورگر
+    'decode',          # تشخیص encoding
+    'parse',           # ساخت درخت HTML
+    'extract',         # استخراج متا، متن و تصاویر
+    'dedup',           # SimHash و جستجوی محتوای تکراری
+    'image_download',
+    'image_resize',
+    'write',           # نوشتن رکوردها و خروجی‌ها
+)
+
+HOST_COUNTERS = ('requests', 'connections', 'bytes', 'retries', 'cache_hits', 'errors')
+
+# حداکثر تعداد نمونه نگه‌داشته شده برای صدک‌های هر مرحله (reservoir sampling)
+SAMPLE_SIZE = 10000
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc
+
+
+def wire_bytes(response, decoded: int) -> int:
+    """بایت‌های دریافتی روی شبکه (قبل از باز کردن gzip/br) یا decoded اگر در دسترس نباشد"""
+    tell = getattr(response.raw, 'tell', None)
+    if tell is None:
+        return decoded
+    try:
+        return tell() or decoded
+    except Exception:
+        return decoded
+
+
+class StageStats:
+    """آمار زمان یک مرحله؛ زیر قفل Metrics به‌روز می‌شود"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(seconds)
+        else:
+            index = random.randrange(self.count)
+            if index < SAMPLE_SIZE:
+                self.samples[index] = seconds
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 6),
+            'mean_seconds': round(self.total / self.count, 6) if self.count else 0.0,
+            'p50_seconds': round(self.percentile(0.50), 6),
+            'p99_seconds': round(self.percentile(0.99), 6),
+            'max_seconds': round(self.max, 6),
+        }
+
+
+class Metrics:
+    """جمع‌آوری thread-safe معیارهای یک اجرا"""
+
+    def __init__(self, profile_stages: Iterable[str] = ()):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+        self._hosts: Dict[str, Dict] = {}
+        self.profile_stages = set(profile_stages)
+        self._profiles: Dict[str, List[cProfile.Profile]] = {}
+        self._local = threading.local()
+
+    def observe(self, stage: str, seconds: float):
+        """ثبت یک اجرای مرحله با زمان اندازه‌گیری شده"""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.add(seconds)
+
+    def _profiler(self, stage: str) -> Optional[cProfile.Profile]:
+        """profiler مرحله برای thread جاری (None اگر profiler دیگری فعال است)"""
+        if getattr(self._local, 'profiling', False):
+            return None
+        profilers = getattr(self._local, 'profilers', None)
+        if profilers is None:
+            profilers = self._local.profilers = {}
+        profiler = profilers.get(stage)
+        if profiler is None:
+            profiler = profilers[stage] = cProfile.Profile()
+            with self._lock:
+                self._profiles.setdefault(stage, []).append(profiler)
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+: فقط یک profiler در هر لحظه می‌تواند فعال باشد
+            return None
+        self._local.profiling = True
+        return profiler
+
+    @contextmanager
+    def span(self, stage: str):
+        """اندازه‌گیری زمان بلوک به عنوان یک اجرای مرحله stage"""
+        profiler = self._profiler(stage) if stage in self.profile_stages else None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+            if profiler is not None:
+                profiler.disable()
+                self._local.profiling = False
+
+    def count(self, url: str, counter: str, amount: int = 1):
+        """افزایش شمارنده counter میزبان URL"""
+        host = host_of(url)
+        with self._lock:
+            counters = self._host(host)
+            counters[counter] = counters.get(counter, 0) + amount
+
+    def status(self, url: str, code: int, retries: int = 0):
+        """ثبت یک پاسخ HTTP میزبان"""
+        host = host_of(url)
+        with self._lock:
+            counters = self._host(host)
+            counters['requests'] += 1
+            counters['retries'] += retries
+            codes = counters['status_codes']
+            codes[str(code)] = codes.get(str(code), 0) + 1
+
+    def _host(self, host: str) -> Dict:
+        counters = self._hosts.get(host)
+        if counters is None:
+            counters = self._hosts[host] = {name: 0 for name in HOST_COUNTERS}
+            counters['status_codes'] = {}
+        return counters
+
+    def report(self, **extra) -> Dict:
+        """گزارش کامل اجرا (قابل serialize به JSON)"""
+        with self._lock:
+            stages = {stage: stats.summary() for stage, stats in self._stages.items()}
+            hosts = json.loads(json.dumps(self._hosts))
+        ordered = {stage: stages[stage] for stage in STAGES if stage in stages}
+        ordered.update({stage: summary for stage, summary in stages.items() if stage not in ordered})
+        return {
+            'started_at': datetime.fromtimestamp(self.started).isoformat(),
+            'duration_seconds': round(time.time() - self.started, 3),
+            'stages': ordered,
+            'hosts': hosts,
+            **extra,
+        }
+
+    def write_json(self, path: Path, **extra) -> Dict:
+        report = self.report(**extra)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.part')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        tmp.replace(path)
+        return report
+
+    def write_prometheus(self, path: Path, prefix: str = 'content_scraper'):
+        """نوشتن معیارها در قالب متنی Prometheus (برای textfile collector)"""
+        report = self.report()
+        lines = [
+            f'# HELP {prefix}_run_duration_seconds Wall-clock duration of the run.',
+            f'# TYPE {prefix}_run_duration_seconds gauge',
+            f'{prefix}_run_duration_seconds {report["duration_seconds"]}',
+            f'# HELP {prefix}_stage_seconds Time spent in each pipeline stage, summed over threads.',
+            f'# TYPE {prefix}_stage_seconds summary',
+        ]
+        for stage, summary in report['stages'].items():
+            label = f'stage="{_label(stage)}"'
+            lines.append(f'{prefix}_stage_seconds{{{label},quantile="0.5"}} {summary["p50_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds{{{label},quantile="0.99"}} {summary["p99_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds_sum{{{label}}} {summary["total_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{{label}}} {summary["count"]}')
+
+        for counter in HOST_COUNTERS:
+            lines.append(f'# TYPE {prefix}_host_{counter}_total counter')
+            for host, counters in report['hosts'].items():
+                lines.append(f'{prefix}_host_{counter}_total{{host="{_label(host)}"}} {counters[counter]}')
+        lines.append(f'# TYPE {prefix}_host_responses_total counter')
+        for host, counters in report['hosts'].items():
+            for code, count in sorted(counters['status_codes'].items()):
+                lines.append(f'{prefix}_host_responses_total{{host="{_label(host)}",code="{code}"}} {count}')
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.part')
+        tmp.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        tmp.replace(path)
+
+    def dump_profiles(self, directory: Path) -> List[Path]:
+        """ذخیره profile هر مرحله (ترکیب همه thread ها) در directory/<stage>.prof"""
+        with self._lock:
+            profiles = {stage: list(profilers) for stage, profilers in self._profiles.items()}
+        written = []
+        directory = Path(directory)
+        for stage, profilers in profiles.items():
+            stats = None
+            for profiler in profilers:
+                try:
+                    if stats is None:
+                        stats = pstats.Stats(profiler)
+                    else:
+                        stats.add(profiler)
+                except TypeError:
+                    # profiler بدون هیچ داده‌ای
+                    continue
+            if stats is None:
+                continue
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f'{stage}.prof'
+            stats.dump_stats(str(path))
+            written.append(path)
+        return written
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
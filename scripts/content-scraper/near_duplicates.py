@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تشخیص محتوای تقریباً تکراری با SimHash
+
+متن با text_normalizer نرمال می‌شود، به shingle های سه‌کلمه‌ای تقسیم می‌شود و
+یک اثر انگشت 64 بیتی SimHash از آن ساخته می‌شود. دو متن با فاصله همینگ حداکثر
+`max_distance` تکراری در نظر گرفته می‌شوند (مثلاً یک خبر منتشر شده در چند سایت
+یا یک مقاله که از /news و /articles هر دو پیدا شده است). پیش‌فرض 7 برای
+مقاله‌های چندصد کلمه‌ای مناسب است؛ فاصله کمتر سخت‌گیرانه‌تر و جستجوی آن سریع‌تر است.
+
+اثر انگشت‌ها در SQLite ذخیره می‌شوند. هر اثر انگشت به چهار باند 16 بیتی تقسیم
+و هر باند جداگانه index می‌شود؛ طبق اصل لانه کبوتری دو اثر انگشت با فاصله
+حداکثر max_distance دست‌کم در یک باند حداکثر `max_distance // 4` بیت تفاوت
+دارند. جستجو فقط همین مقادیر باند را بررسی می‌کند (برای فاصله 7: مقدار باند و
+16 نسخه یک‌بیتی آن)، پس تعداد نامزدها حدود یک هزارم مجموعه است و جستجو با
+بزرگ شدن index خطی کند نمی‌شود.
+همین index با `prefix` دیگر برای اثر انگشت‌های تصویر (dHash) هم استفاده می‌شود.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from itertools import combinations
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+from text_normalizer import clean_text
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+# تعداد باندهای 16 بیتی index
+BANDS = 4
+
+_SIGN_BIT = 1 << (FINGERPRINT_BITS - 1)
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Iterable[str]:
+    """shingle های کلمه‌ای متن نرمال شده"""
+    words = clean_text(text).lower().split()
+    if len(words) <= size:
+        return [' '.join(words)] if words else []
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def simhash(text: str) -> Optional[int]:
+    """اثر انگشت SimHash 64 بیتی متن (برای متن خالی None)"""
+    features = shingles(text)
+    if not features:
+        return None
+
+    # شمارش بیت‌های هر ستون روی رشته دودویی همه hash ها (slice و count در C انجام می‌شوند)
+    bits = ''.join(
+        format(int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+        for feature in features
+    )
+    half = len(bits) // FINGERPRINT_BITS / 2
+    fingerprint = 0
+    for i in range(FINGERPRINT_BITS):
+        if bits[i::FINGERPRINT_BITS].count('1') > half:
+            fingerprint |= 1 << (FINGERPRINT_BITS - 1 - i)
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _to_signed(value: int) -> int:
+    # INTEGER در SQLite علامت‌دار 64 بیتی است
+    return value - (1 << FINGERPRINT_BITS) if value & _SIGN_BIT else value
+
+
+class NearDuplicateIndex:
+    """index پایدار اثر انگشت‌های 64 بیتی (SimHash متن) با جستجوی باندی"""
+
+    def __init__(self, db_path: Union[str, Path] = ':memory:', max_distance: int = 7,
+                 prefix: str = 'simhash'):
+        if str(db_path) != ':memory:':
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_distance = max_distance
+        # در دست‌کم یک باند حداکثر `tolerance` بیت متفاوت است (اصل لانه کبوتری)
+        self.tolerance = max_distance // BANDS
+        self._band_edges = [band * FINGERPRINT_BITS // BANDS for band in range(BANDS + 1)]
+        width = FINGERPRINT_BITS // BANDS
+        self._flips = [
+            sum(1 << bit for bit in bits)
+            for count in range(self.tolerance + 1)
+            for bits in combinations(range(width), count)
+        ]
+
+        self._docs = f'{prefix}_docs'
+        self._bands = f'{prefix}_bands'
+        meta = f'{prefix}_meta'
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {self._docs} (
+                key TEXT PRIMARY KEY,
+                fingerprint INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS {meta} (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        row = self._conn.execute(f"SELECT value FROM {meta} WHERE name = 'bands'").fetchone()
+        if row is None or row[0] != BANDS:
+            # index های قدیمی (max_distance + 1 باند، بدون اثر انگشت در ردیف باند)
+            # از روی جدول docs بازسازی می‌شوند
+            self._conn.execute(f"DROP TABLE IF EXISTS {self._bands}")
+            self._conn.execute(f"INSERT OR REPLACE INTO {meta} (name, value) VALUES ('bands', ?)", (BANDS,))
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self._bands} (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                fingerprint INTEGER NOT NULL,
+                PRIMARY KEY (band, value, key)
+            ) WITHOUT ROWID
+        """)
+        if row is None or row[0] != BANDS:
+            for key, stored in self._conn.execute(f"SELECT key, fingerprint FROM {self._docs}").fetchall():
+                self._insert_bands(key, stored & _MASK)
+        self._conn.commit()
+
+        self.checked = 0
+        self.duplicates = 0
+
+    def _band_values(self, fingerprint: int) -> List[Tuple[int, int]]:
+        edges = self._band_edges
+        return [
+            (band, (fingerprint >> edges[band]) & ((1 << (edges[band + 1] - edges[band])) - 1))
+            for band in range(BANDS)
+        ]
+
+    def _find(self, fingerprint: int, exclude: Optional[str]) -> Optional[str]:
+        # برای هر باند مقدار خودش و همه مقادیر با حداکثر `tolerance` بیت تفاوت
+        # با پیشوند کلید اصلی (band, value) جستجو می‌شوند؛ اثر انگشت نامزدها از
+        # همان ردیف باند خوانده می‌شود (بدون join)
+        placeholders = ', '.join('?' * len(self._flips))
+        for band, value in self._band_values(fingerprint):
+            rows = self._conn.execute(
+                f"SELECT key, fingerprint FROM {self._bands} WHERE band = ? AND value IN ({placeholders})",
+                [band] + [value ^ flip for flip in self._flips],
+            ).fetchall()
+            for key, stored in rows:
+                if ((fingerprint ^ stored) & _MASK).bit_count() <= self.max_distance and key != exclude:
+                    return key
+        return None
+
+    def _insert_bands(self, key: str, fingerprint: int):
+        signed = _to_signed(fingerprint)
+        self._conn.executemany(
+            f"INSERT INTO {self._bands} (band, value, key, fingerprint) VALUES (?, ?, ?, ?)",
+            [(band, value, key, signed) for band, value in self._band_values(fingerprint)],
+        )
+
+    def _add(self, key: str, fingerprint: int):
+        # حذف باندهای اثر انگشت قبلی همین key با کلید اصلی کامل
+        row = self._conn.execute(f"SELECT fingerprint FROM {self._docs} WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.executemany(
+                f"DELETE FROM {self._bands} WHERE band = ? AND value = ? AND key = ?",
+                [(band, value, key) for band, value in self._band_values(row[0] & _MASK)],
+            )
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {self._docs} (key, fingerprint) VALUES (?, ?)",
+            (key, _to_signed(fingerprint)),
+        )
+        self._insert_bands(key, fingerprint)
+
+    def find(self, text: str, exclude: Optional[str] = None) -> Optional[str]:
+        """کلید اولین سند تقریباً مشابه (به جز exclude) یا None"""
+        fingerprint = simhash(text)
+        if fingerprint is None:
+            return None
+        with self._lock:
+            return self._find(fingerprint, exclude)
+
+    def check_and_add(self, key: str, text: str) -> Optional[str]:
+        """اگر متن تکراری باشد کلید سند مشابه را برمی‌گرداند، وگرنه آن را ثبت می‌کند
+
+        سندی با همان key (مثلاً دریافت دوباره یک URL) تکراری خودش حساب نمی‌شود
+        و اثر انگشت آن به‌روز می‌شود.
+        """
+        return self.check_and_add_fingerprint(key, simhash(text))
+
+    def check_and_add_fingerprint(self, key: str, fingerprint: Optional[int]) -> Optional[str]:
+        """همان check_and_add برای اثر انگشت آماده (مثلاً dHash تصویر)"""
+        if fingerprint is None:
+            return None
+        with self._lock:
+            self.checked += 1
+            duplicate_of = self._find(fingerprint, exclude=key)
+            if duplicate_of is not None:
+                self.duplicates += 1
+                return duplicate_of
+            self._add(key, fingerprint)
+            self._conn.commit()
+            return None
+
+    def add_fingerprint(self, key: str, fingerprint: int):
+        """ثبت (یا به‌روزرسانی) اثر انگشت بدون بررسی تکرار"""
+        with self._lock:
+            self._add(key, fingerprint)
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self._docs}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
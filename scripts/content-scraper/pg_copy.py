@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ابزار قالب متنی دستور COPY در PostgreSQL
+
+هر ردیف یک خط است، ستون‌ها با tab جدا می‌شوند، NULL با `\\N` نمایش داده
+می‌شود و backslash، tab، newline و carriage return escape می‌شوند.
+https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.2
+"""
+
+from typing import Any, Iterable
+
+_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\x00': '',  # PostgreSQL نویسه NUL را در متن نمی‌پذیرد
+})
+
+NULL = '\\N'
+
+
+def copy_escape(value: Any) -> str:
+    """تبدیل یک مقدار پایتون به فیلد قالب متنی COPY"""
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).translate(_ESCAPES)
+
+
+def copy_row(values: Iterable[Any]) -> str:
+    """یک ردیف کامل قالب متنی COPY (با newline پایانی)"""
+    return '\t'.join(copy_escape(value) for value in values) + '\n'
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+محدودکننده نرخ تطبیقی درخواست‌ها برای هر میزبان (token bucket)
+
+هر میزبان یک سطل توکن با فاصله فعلی `interval` ثانیه بین دو درخواست دارد.
+پاسخ‌ها از طریق hook session گزارش می‌شوند و فاصله را تنظیم می‌کنند:
+
+- پاسخ 429/503 (یا retry روی آن‌ها): فاصله دو برابر می‌شود و تا پایان
+  Retry-After هیچ درخواستی به آن میزبان ارسال نمی‌شود؛
+- خطای 5xx دیگر یا افزایش ناگهانی زمان پاسخ (میانگین کوتاه‌مدت بیش از دو
+  برابر میانگین بلندمدت): فاصله 1.5 برابر می‌شود؛
+- پاسخ سالم: فاصله 10٪ کم می‌شود تا سقف سرعت (`min_delay` یا Crawl-delay
+  robots.txt، هر کدام بیشتر باشد).
+
+فاصله هیچ‌گاه از `max_delay` بیشتر نمی‌شود.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from urllib3.util.retry import Retry
+
+THROTTLE_STATUSES = (429, 503)
+
+# ضرایب تغییر فاصله بین درخواست‌ها
+BACKOFF = 2.0
+SLOWDOWN = 1.5
+SPEEDUP = 0.9
+# کمترین فاصله پس از backoff وقتی فاصله فعلی صفر است (ثانیه)
+MIN_BACKOFF = 1.0
+# ضرایب میانگین متحرک نمایی زمان پاسخ
+_FAST_ALPHA = 0.3
+_SLOW_ALPHA = 0.05
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """مقدار هدر Retry-After (ثانیه یا تاریخ HTTP) به ثانیه"""
+    if not value:
+        return None
+    try:
+        return max(0.0, Retry(0).parse_retry_after(value))
+    except Exception:
+        return None
+
+
+class HostBucket:
+    """سطل توکن یک میزبان؛ متدها زیر قفل RateLimiter فراخوانی می‌شوند"""
+
+    def __init__(self, interval: float, floor: float, burst: int):
+        self.interval = interval
+        self.floor = floor
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.latency_fast: Optional[float] = None
+        self.latency_slow: Optional[float] = None
+        self.throttled = 0
+        self.slowdowns = 0
+
+    def reserve(self, now: float) -> float:
+        """برداشتن یک توکن؛ زمان لازم برای صبر تا رسیدن نوبت (ثانیه)"""
+        if self.interval > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+        else:
+            self.tokens = float(self.burst)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens * self.interval if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def observe_latency(self, latency: float) -> bool:
+        """ثبت زمان پاسخ؛ True اگر زمان پاسخ میزبان در حال افزایش است"""
+        if self.latency_fast is None:
+            self.latency_fast = self.latency_slow = latency
+            return False
+        self.latency_fast += _FAST_ALPHA * (latency - self.latency_fast)
+        self.latency_slow += _SLOW_ALPHA * (latency - self.latency_slow)
+        return self.latency_fast > 2 * self.latency_slow and self.latency_fast - self.latency_slow > 0.25
+
+
+class RateLimiter:
+    """token bucket تطبیقی برای هر میزبان
+
+    delay فاصله اولیه بین دو درخواست به یک میزبان است؛ min_delay و max_delay
+    محدوده تغییر آن را تعیین می‌کنند. burst تعداد درخواستی است که پس از
+    بیکاری میزبان می‌تواند بدون صبر ارسال شود.
+    """
+
+    def __init__(self, delay: float = 2.0, min_delay: float = 0.25, max_delay: float = 60.0,
+                 burst: int = 1):
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, HostBucket] = {}
+        self._crawl_delays: Dict[str, float] = {}
+        self.waited = 0.0
+
+    def _bucket(self, host: str) -> HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            floor = min(self.min_delay, self.delay)
+            if host in self._crawl_delays:
+                floor = max(floor, self._crawl_delays[host])
+            bucket = HostBucket(min(max(self.delay, floor), self.max_delay), floor, self.burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def set_crawl_delay(self, url: str, seconds: Optional[float]):
+        """اعمال Crawl-delay robots.txt به عنوان حداقل فاصله درخواست‌های میزبان"""
+        if not seconds or seconds <= 0:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            self._crawl_delays[host] = float(seconds)
+            bucket = self._buckets.get(host)
+            if bucket is not None:
+                bucket.floor = max(bucket.floor, float(seconds))
+                bucket.interval = max(bucket.interval, bucket.floor)
+
+    def reserve(self, url: str) -> float:
+        """رزرو نوبت درخواست به میزبان URL؛ ثانیه‌هایی که باید صبر کرد (برای asyncio)"""
+        with self._lock:
+            wait = self._bucket(urlparse(url).netloc).reserve(time.monotonic())
+            self.waited += wait
+        return wait
+
+    def acquire(self, url: str) -> float:
+        """صبر (blocking) تا رسیدن نوبت درخواست به میزبان URL؛ مدت صبر (ثانیه)"""
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record(self, url: str, status: int, latency: float, retry_after: Optional[float] = None,
+               throttled: bool = False):
+        """تنظیم فاصله میزبان بر اساس وضعیت و زمان پاسخ"""
+        with self._lock:
+            bucket = self._bucket(urlparse(url).netloc)
+            rising = bucket.observe_latency(latency)
+            if throttled or status in THROTTLE_STATUSES:
+                bucket.throttled += 1
+                bucket.interval = max(bucket.interval * BACKOFF, MIN_BACKOFF)
+                if retry_after:
+                    bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + retry_after)
+            elif status >= 500 or rising:
+                bucket.slowdowns += 1
+                bucket.interval = max(bucket.interval * SLOWDOWN, MIN_BACKOFF / 4)
+            elif status < 400:
+                bucket.interval *= SPEEDUP
+            bucket.interval = min(max(bucket.interval, bucket.floor), self.max_delay)
+
+    def on_response(self, response, *args, **kwargs):
+        """hook پاسخ requests.Session (شامل retry های انجام شده در urllib3)"""
+        retries = getattr(response.raw, 'retries', None)
+        history = retries.history if retries is not None else ()
+        throttled = any(entry.status in THROTTLE_STATUSES for entry in history)
+        self.record(response.url, response.status_code, response.elapsed.total_seconds(),
+                    retry_after_seconds(response.headers.get('Retry-After')), throttled)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hosts': len(self._buckets),
+                'throttled': sum(bucket.throttled for bucket in self._buckets.values()),
+                'slowdowns': sum(bucket.slowdowns for bucket in self._buckets.values()),
+                'waited': self.waited,
+                'delays': {host: bucket.interval for host, bucket in self._buckets.items()},
+            }
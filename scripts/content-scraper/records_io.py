@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+خواندن و نوشتن رکوردهای محتوا به صورت stream
+
+فرمت JSON Lines (`.jsonl`): هر رکورد در یک خط. رکوردها به محض آماده شدن
+اضافه و flush می‌شوند، پس اجرای ناتمام هم خروجی قابل استفاده دارد و
+مراحل بعدی (اعتبارسنجی، import) می‌توانند قبل از پایان پیمایش شروع شوند.
+فایل‌های `.json` (آرایه) هم برای سازگاری پشتیبانی می‌شوند.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Union
+
+PathLike = Union[str, Path]
+
+
+def is_jsonl(path: PathLike) -> bool:
+    return Path(path).suffix in ('.jsonl', '.ndjson')
+
+
+def iter_records(path: PathLike) -> Iterator[Dict]:
+    """خواندن رکوردها به صورت generator
+
+    برای `.jsonl` فایل خط به خط خوانده می‌شود و حافظه مصرفی به اندازه یک رکورد است.
+    خطوط ناقص (مثلاً آخرین خط یک اجرای قطع شده) نادیده گرفته می‌شوند.
+    """
+    path = Path(path)
+    if not is_jsonl(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️  خط {line_no} فایل {path.name} ناقص است و نادیده گرفته شد")
+
+
+def dumps_record(record: Dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+class JsonlWriter:
+    """افزودن thread-safe رکوردها به فایل JSON Lines
+
+    با flush=True (پیش‌فرض) هر رکورد بلافاصله روی دیسک نوشته می‌شود؛ برای
+    نوشتن حجم زیاد رکورد در یک پردازش دسته‌ای flush=False سریع‌تر است.
+    """
+
+    def __init__(self, path: PathLike, append: bool = False, flush: bool = True):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush = flush
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, record: Dict):
+        line = dumps_record(record) + '\n'
+        with self._lock:
+            self._file.write(line)
+            if self.flush:
+                self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonArrayWriter:
+    """نوشتن تدریجی آرایه JSON (با indent=2) بدون ساخت کل لیست در حافظه"""
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write('[\n')
+        self.count = 0
+
+    def write(self, record: Dict):
+        text = json.dumps(record, ensure_ascii=False, indent=2)
+        with self._lock:
+            if self.count:
+                self._file.write(',\n')
+            self._file.write(text)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.write('\n]\n' if self.count else ']\n')
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(path: PathLike, flush: bool = True) -> Union[JsonlWriter, JsonArrayWriter]:
+    """writer مناسب پسوند فایل: JSON Lines برای `.jsonl`، آرایه برای `.json`"""
+    if is_jsonl(path):
+        return JsonlWriter(path, flush=flush)
+    return JsonArrayWriter(path)
+
+
+def write_records(path: PathLike, records: Iterable[Dict]) -> int:
+    """نوشتن stream رکوردها در `.jsonl` یا آرایه `.json`؛ تعداد رکوردها را برمی‌گرداند"""
+    with open_writer(path) as writer:
+        for record in records:
+            writer.write(record)
+        return writer.count
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+رعایت robots.txt با قوانین کش شده برای هر میزبان
+
+robots.txt هر میزبان یک بار دریافت و بدنه آن با زمان دریافت در SQLite ذخیره
+می‌شود؛ تا پایان `ttl` اجراهای بعدی از همان نسخه استفاده می‌کنند و robots.txt
+را دوباره دریافت نمی‌کنند.
+
+قوانین طبق RFC 9309 اعمال می‌شوند: گروه user-agent مطابق (یا گروه `*`)، طولانی‌ترین
+قانون منطبق تصمیم می‌گیرد و در تساوی Allow برنده است؛ `*` و `$` پشتیبانی
+می‌شوند. قوانین بدون wildcard در یک trie نویسه‌ای قرار می‌گیرند، پس بررسی هر
+URL با یک پیمایش مسیر آن انجام می‌شود (مستقل از تعداد قوانین).
+
+- پاسخ 4xx: robots.txt وجود ندارد و همه مسیرها مجازند؛
+- پاسخ 5xx یا خطای شبکه: نسخه ذخیره شده قبلی (حتی منقضی) و اگر نباشد هیچ
+  مسیری مجاز نیست (ذخیره نمی‌شود تا اجرای بعدی دوباره تلاش کند).
+
+`Crawl-delay` و خطوط `Sitemap:` هم برای زمان‌بندی درخواست‌ها و کشف مقالات
+در دسترس‌اند.
+"""
+
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlparse
+
+from discovery import robots_sitemaps
+
+# حداکثر اندازه robots.txt که پردازش می‌شود (RFC 9309: حداقل 500 KiB)
+MAX_ROBOTS_BYTES = 512 * 1024
+
+# نویسه‌هایی که هنگام یکسان‌سازی مسیرها encode نمی‌شوند
+_SAFE = "/?=&;:@!,+~*$"
+
+_RULE = 'rule'
+
+
+def normalize_path(path: str) -> str:
+    """یکسان‌سازی percent-encoding مسیر (مثلاً slug فارسی خام یا encode شده)"""
+    return quote(unquote(path), safe=_SAFE)
+
+
+def product_token(user_agent: str) -> str:
+    """product token یک User-Agent (مثلاً `Mozilla/5.0 (...)` -> `mozilla`)"""
+    return user_agent.split('/')[0].strip().lower()
+
+
+def request_path(url: str) -> str:
+    """مسیر و query یک URL برای مقایسه با قوانین"""
+    parsed = urlparse(url)
+    path = parsed.path or '/'
+    if parsed.query:
+        path += '?' + parsed.query
+    return normalize_path(path)
+
+
+def _wildcard(pattern: str) -> 're.Pattern':
+    regex = re.escape(pattern.rstrip('$')).replace(r'\*', '.*')
+    return re.compile(regex + ('$' if pattern.endswith('$') else ''))
+
+
+class RobotsRules:
+    """قوانین Allow/Disallow یک گروه user-agent"""
+
+    def __init__(self, rules: Iterable[Tuple[bool, str]] = (), crawl_delay: Optional[float] = None,
+                 sitemaps: Optional[List[str]] = None):
+        self.crawl_delay = crawl_delay
+        self.sitemaps = sitemaps or []
+        self._trie: Dict = {}
+        self._wildcards: List[Tuple[int, bool, 're.Pattern']] = []
+        self.allows = 0
+        self.disallows = 0
+        for allow, path in rules:
+            self._add(allow, normalize_path(path))
+
+    @classmethod
+    def allow_all(cls) -> 'RobotsRules':
+        return cls()
+
+    @classmethod
+    def disallow_all(cls) -> 'RobotsRules':
+        return cls([(False, '/')])
+
+    @classmethod
+    def parse(cls, text: str, user_agent: str) -> 'RobotsRules':
+        """قوانین و Crawl-delay گروه مربوط به user_agent؛ گروه‌های تکراری یک agent با هم ادغام می‌شوند
+
+        نام گروه با product token (بخش قبل از `/` در User-Agent) بدون حساسیت به حروف
+        بزرگ و کوچک و به صورت کامل مقایسه می‌شود (RFC 9309).
+        """
+        token = product_token(user_agent)
+        groups: Dict[str, List[Tuple[bool, str]]] = {}
+        delays: Dict[str, float] = {}
+        agents: List[str] = []
+        in_rules = False
+        for line in text.splitlines():
+            key, _, value = line.split('#', 1)[0].partition(':')
+            key, value = key.strip().lower(), value.strip()
+            if key == 'user-agent':
+                if in_rules:
+                    agents, in_rules = [], False
+                agent = product_token(value)
+                agents.append(agent)
+                groups.setdefault(agent, [])
+            elif key in ('allow', 'disallow'):
+                in_rules = True
+                if value:
+                    for agent in agents:
+                        groups[agent].append((key == 'allow', value))
+            elif key == 'crawl-delay':
+                # برخلاف urllib.robotparser مقادیر اعشاری مثل `Crawl-delay: 0.5` هم پذیرفته می‌شوند
+                in_rules = True
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for agent in agents:
+                    delays.setdefault(agent, delay)
+            elif key and key != 'sitemap':
+                in_rules = True
+
+        agent = token if token in groups else '*'
+        return cls(groups.get(agent, []), delays.get(agent), robots_sitemaps(text))
+
+    def _add(self, allow: bool, path: str):
+        if allow:
+            self.allows += 1
+        else:
+            self.disallows += 1
+        if '*' in path or path.endswith('$'):
+            self._wildcards.append((len(path), allow, _wildcard(path)))
+            return
+        node = self._trie
+        for char in path:
+            node = node.setdefault(char, {})
+        # در تساوی طول، Allow بر Disallow مقدم است
+        node[_RULE] = node.get(_RULE, False) or allow
+
+    def allowed(self, url: str) -> bool:
+        """آیا دریافت URL مجاز است"""
+        path = request_path(url)
+        if path == '/robots.txt':
+            return True
+        best_length, best_allow = -1, True
+        node = self._trie
+        for length, char in enumerate(path, 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if _RULE in node:
+                best_length, best_allow = length, node[_RULE]
+        for length, allow, pattern in self._wildcards:
+            if length >= best_length and pattern.match(path):
+                if length > best_length or allow:
+                    best_length, best_allow = length, allow
+        return best_allow
+
+    def blocks_site(self) -> bool:
+        """آیا کل سایت ممنوع است (Disallow: / بدون هیچ Allow)"""
+        return not self.allows and not self.allowed('/')
+
+
+class RobotsCache:
+    """دریافت، ذخیره و بررسی robots.txt میزبان‌ها با session اسکرپر"""
+
+    def __init__(self, db_path: Path, session, user_agent: str, ttl: timedelta = timedelta(days=1),
+                 timeout: int = 10):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.session = session
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS robots (
+                origin TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                body TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        self._rules: Dict[str, RobotsRules] = {}
+        self._origin_locks: Dict[str, threading.Lock] = {}
+
+        self.fetched = 0
+        self.cached = 0
+        self.unavailable = 0
+        self.blocked = 0
+
+    def rules(self, url: str) -> RobotsRules:
+        """قوانین میزبان URL (از حافظه، فایل کش یا دریافت robots.txt)"""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        rules = self._rules.get(origin)
+        if rules is not None:
+            return rules
+        with self._lock:
+            origin_lock = self._origin_locks.setdefault(origin, threading.Lock())
+        # فقط یک thread robots.txt هر میزبان را دریافت می‌کند
+        with origin_lock:
+            rules = self._rules.get(origin)
+            if rules is None:
+                rules = self._rules[origin] = self._load(origin)
+        return rules
+
+    def _load(self, origin: str) -> RobotsRules:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, body, fetched_at FROM robots WHERE origin = ?", (origin,)
+            ).fetchone()
+        if row and datetime.now() - datetime.fromisoformat(row[2]) < self.ttl:
+            self.cached += 1
+            return self._parse(row[0], row[1])
+
+        try:
+            response = self.session.get(f"{origin}/robots.txt", timeout=self.timeout)
+            status = response.status_code
+            # محدودیت بر حسب بایت (نه نویسه)؛ robots.txt طبق RFC 9309 با UTF-8 کد شده است
+            body = response.content[:MAX_ROBOTS_BYTES].decode('utf-8', errors='replace') if status < 300 else ''
+        except Exception as e:
+            print(f"⚠️  خطا در دریافت robots.txt {origin}: {e}")
+            status, body = None, ''
+
+        if status is None or status >= 500:
+            self.unavailable += 1
+            if row:
+                print(f"⚠️  robots.txt {origin} در دسترس نیست؛ استفاده از نسخه ذخیره شده قبلی")
+                return self._parse(row[0], row[1])
+            print(f"⚠️  robots.txt {origin} در دسترس نیست؛ در این اجرا هیچ صفحه‌ای دریافت نمی‌شود")
+            return RobotsRules.disallow_all()
+
+        self.fetched += 1
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO robots (origin, status, body, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(origin) DO UPDATE SET status = excluded.status, body = excluded.body, "
+                "fetched_at = excluded.fetched_at",
+                (origin, status, body, datetime.now().isoformat()),
+            )
+            self._conn.commit()
+        return self._parse(status, body)
+
+    def _parse(self, status: int, body: str) -> RobotsRules:
+        if status >= 400:
+            return RobotsRules.allow_all()
+        return RobotsRules.parse(body, self.user_agent)
+
+    def allowed(self, url: str) -> bool:
+        return self.rules(url).allowed(url)
+
+    def filter(self, urls: Iterable[str]) -> List[str]:
+        """URL های مجاز (به همان ترتیب)؛ تعداد URL های ممنوع در آمار ثبت می‌شود"""
+        urls = list(urls)
+        allowed = [url for url in urls if self.allowed(url)]
+        with self._lock:
+            self.blocked += len(urls) - len(allowed)
+        return allowed
+
+    def stats(self) -> Dict:
+        return {
+            'hosts': len(self._rules),
+            'fetched': self.fetched,
+            'cached': self.cached,
+            'unavailable': self.unavailable,
+            'blocked_urls': self.blocked,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تولید فایل SQL قابل اجرا با psql از رکوردهای جمع‌آوری شده
+
+دو قالب خروجی وجود دارد:
+- copy (پیش‌فرض): رکوردها با قالب متنی COPY (pg_copy) به یک جدول موقت منتقل
+  و با یک `INSERT ... SELECT ... ON CONFLICT (slug) DO NOTHING` به blog_posts
+  اضافه می‌شوند. سریع‌ترین روش بارگذاری با `psql -f` است.
+- insert: دستورهای `INSERT ... VALUES (...), (...) ON CONFLICT (slug) DO NOTHING`
+  چند ردیفی با اندازه دسته قابل تنظیم؛ برای ابزارهایی که COPY FROM stdin را
+  اجرا نمی‌کنند.
+
+رکوردها یکی‌یکی خوانده و نوشته می‌شوند و کل مجموعه در حافظه نگه داشته نمی‌شود.
+رشته‌ها با فرض `standard_conforming_strings = on` (که ابتدای فایل تنظیم
+می‌شود) escape می‌شوند؛ پس ' و \\ در هیچ فیلدی فایل را خراب نمی‌کنند.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, TextIO, Tuple
+
+from image_processor import featured_image
+from pg_copy import copy_row
+
+AUTHOR_ID = 1    # باید تغییر دهید
+CATEGORY_ID = 1  # باید تغییر دهید
+
+POST_COLUMNS = (
+    'title', 'slug', 'excerpt', 'content', 'featured_image',
+    'meta_description', 'meta_keywords',
+)
+
+SQL_FORMATS = ('copy', 'insert')
+
+_STAGING_TABLE = 'scraped_posts_import'
+
+
+def post_values(item: Dict) -> Tuple:
+    """مقادیر ستون‌های blog_posts برای یک رکورد (در صورت نقص رکورد ValueError)"""
+    for field in ('title', 'slug', 'content'):
+        if not item.get(field):
+            raise ValueError(f"فیلد '{field}' خالی است")
+    return (
+        item['title'],
+        item['slug'],
+        item.get('excerpt', ''),
+        item['content'],
+        featured_image(item),
+        item.get('meta_description', ''),
+        item.get('meta_keywords', ''),
+    )
+
+
+def sql_literal(value: Any) -> str:
+    """تبدیل یک مقدار پایتون به literal در SQL (با standard_conforming_strings)"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    # PostgreSQL نویسه NUL را در متن نمی‌پذیرد
+    return "'" + str(value).replace('\x00', '').replace("'", "''") + "'"
+
+
+def _write_header(f: TextIO, sql_format: str):
+    f.write("-- محتوای جمع‌آوری شده از سایت‌های فارسی\n")
+    f.write("-- تاریخ تولید: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "\n")
+    f.write(f"-- قالب: {sql_format}؛ اجرا با: psql -v ON_ERROR_STOP=1 -f <فایل>\n\n")
+    f.write("SET client_encoding = 'UTF8';\n")
+    f.write("SET standard_conforming_strings = on;\n\n")
+    f.write("BEGIN;\n\n")
+
+
+def _write_copy(f: TextIO, records: Iterable[Tuple]) -> int:
+    columns = ', '.join(POST_COLUMNS)
+    f.write(f"CREATE TEMP TABLE {_STAGING_TABLE} (\n    row_no bigint,\n")
+    f.write(',\n'.join(f"    {column} text" for column in POST_COLUMNS))
+    f.write("\n) ON COMMIT DROP;\n\n")
+
+    f.write(f"COPY {_STAGING_TABLE} (row_no, {columns}) FROM stdin;\n")
+    count = 0
+    for values in records:
+        f.write(copy_row((count,) + values))
+        count += 1
+    f.write("\\.\n\n")
+
+    # با slug تکراری در خود فایل، اولین رکورد نگه داشته می‌شود
+    f.write(f"""INSERT INTO blog_posts (
+    {columns},
+    author_id, category_id, is_published, published_at, created_at
+)
+SELECT DISTINCT ON (slug) {columns},
+    {AUTHOR_ID}, {CATEGORY_ID}, true, NOW(), NOW()
+FROM {_STAGING_TABLE}
+ORDER BY slug, row_no
+ON CONFLICT (slug) DO NOTHING;
+
+""")
+    return count
+
+
+def _write_insert_batch(f: TextIO, rows: list):
+    f.write(f"""INSERT INTO blog_posts (
+    {', '.join(POST_COLUMNS)},
+    author_id, category_id, is_published, published_at, created_at
+) VALUES
+""")
+    f.write(',\n'.join(
+        '(' + ', '.join(sql_literal(value) for value in values)
+        + f", {AUTHOR_ID}, {CATEGORY_ID}, true, NOW(), NOW())"
+        for values in rows
+    ))
+    f.write("\nON CONFLICT (slug) DO NOTHING;\n\n")
+
+
+def _write_inserts(f: TextIO, records: Iterable[Tuple], batch_size: int) -> int:
+    count = 0
+    batch = []
+    for values in records:
+        batch.append(values)
+        count += 1
+        if len(batch) >= batch_size:
+            _write_insert_batch(f, batch)
+            batch = []
+    if batch:
+        _write_insert_batch(f, batch)
+    return count
+
+
+def write_sql(f: TextIO, items: Iterable[Dict], sql_format: str = 'copy',
+              batch_size: int = 500) -> Dict:
+    """نوشتن رکوردها در فایل SQL و بازگرداندن آمار {'written', 'skipped'}"""
+    if sql_format not in SQL_FORMATS:
+        raise ValueError(f"قالب SQL نامعتبر: {sql_format}")
+    stats = {'written': 0, 'skipped': 0}
+
+    def valid_records() -> Iterable[Tuple]:
+        for item in items:
+            try:
+                yield post_values(item)
+            except (KeyError, TypeError, ValueError) as e:
+                stats['skipped'] += 1
+                print(f"⚠️  رکورد {item.get('url') or item.get('slug', '?')} در SQL نوشته نشد: {e}")
+
+    _write_header(f, sql_format)
+    if sql_format == 'copy':
+        stats['written'] = _write_copy(f, valid_records())
+    else:
+        stats['written'] = _write_inserts(f, valid_records(), max(1, batch_size))
+    f.write("COMMIT;\n")
+    return stats
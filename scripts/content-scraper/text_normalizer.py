@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+نرمال‌سازی متن فارسی و ساخت slug
+
+الگوهای regex یک بار compile می‌شوند و آوانویسی slug با جدول `str.translate`
+در یک گذر انجام می‌شود. `clean_texts` یک لیست از رشته‌ها را با یک فراخوانی
+پاکسازی می‌کند. قواعد نرمال‌سازی:
+
+- ي / ى / ك عربی به ی / ک فارسی
+- ارقام عربی به ارقام فارسی (در slug به ارقام لاتین)
+- حذف کشیده (ـ) و نویسه‌های صفرعرض غیر از نیم‌فاصله
+- نیم‌فاصله (ZWNJ) حفظ می‌شود، اما تکرار آن یا قرار گرفتنش کنار فاصله حذف می‌شود
+"""
+
+import re
+from typing import Dict, List
+
+ZWNJ = '\u200c'
+
+# جداکننده داخلی برای نرمال‌سازی دسته‌ای (Invisible Separator)
+_BATCH_SEPARATOR = '\u2063'
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_ZWNJ_RUN_RE = re.compile(ZWNJ + '{2,}')
+# پس از یکی شدن فاصله‌ها و نیم‌فاصله‌های تکراری، هر دنباله دوتایی یا بیشتر
+# شامل فاصله است و به یک فاصله تبدیل می‌شود
+_SPACE_ZWNJ_RUN_RE = re.compile('[ ' + ZWNJ + ']{2,}')
+_STRIP_CHARS = ' ' + ZWNJ
+_ALLOWED_CHARS = r'\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF' + ZWNJ + r'a-zA-Z0-9\s.,!?;:()\-'
+_DISALLOWED_RE = re.compile('[^' + _ALLOWED_CHARS + ']')
+# فقط در نرمال‌سازی دسته‌ای جداکننده داخلی حفظ می‌شود
+_BATCH_DISALLOWED_RE = re.compile('[^' + _ALLOWED_CHARS + _BATCH_SEPARATOR + ']')
+_SLUG_INVALID_RE = re.compile(r'[^a-z0-9\-]+')
+_SLUG_DASHES_RE = re.compile(r'-{2,}')
+
+_PERSIAN_DIGITS = '۰۱۲۳۴۵۶۷۸۹'
+_ARABIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+
+_CHAR_MAP: Dict[str, str] = {
+    'ي': 'ی',
+    'ى': 'ی',
+    'ك': 'ک',
+    '\u0640': '',     # کشیده
+    '\u200b': '',     # zero width space
+    '\u200d': '',     # zero width joiner
+    '\ufeff': '',     # BOM
+    '\u00a0': ' ',    # no-break space
+}
+_CHAR_MAP.update(zip(_ARABIC_DIGITS, _PERSIAN_DIGITS))
+
+# متن فارسی معمولاً نویسه‌های کمی برای جایگزینی دارد؛ جستجوی regex برای همین
+# نویسه‌ها از str.translate (که برای هر نویسه غیر ASCII یک lookup انجام می‌دهد) سریع‌تر است
+_NORMALIZE_RE = re.compile('[' + ''.join(_CHAR_MAP) + ']')
+
+_SLUG_MAP: Dict[str, str] = {
+    'ا': 'a', 'آ': 'a', 'أ': 'a', 'إ': 'a', 'ب': 'b', 'پ': 'p', 'ت': 't', 'ث': 's',
+    'ج': 'j', 'چ': 'ch', 'ح': 'h', 'خ': 'kh', 'د': 'd',
+    'ذ': 'z', 'ر': 'r', 'ز': 'z', 'ژ': 'zh', 'س': 's',
+    'ش': 'sh', 'ص': 's', 'ض': 'z', 'ط': 't', 'ظ': 'z',
+    'ع': 'a', 'غ': 'gh', 'ف': 'f', 'ق': 'gh', 'ک': 'k', 'ك': 'k',
+    'گ': 'g', 'ل': 'l', 'م': 'm', 'ن': 'n', 'و': 'v', 'ؤ': 'v',
+    'ه': 'h', 'ة': 'h', 'ی': 'y', 'ي': 'y', 'ى': 'y', 'ئ': 'y', 'ء': '',
+    ' ': '-', '\t': '-', '\n': '-', ZWNJ: '',
+}
+_SLUG_MAP.update(zip(_PERSIAN_DIGITS, '0123456789'))
+_SLUG_MAP.update(zip(_ARABIC_DIGITS, '0123456789'))
+
+SLUG_TABLE = str.maketrans(_SLUG_MAP)
+
+
+def normalize_persian(text: str) -> str:
+    """یکسان‌سازی حروف و ارقام عربی/فارسی"""
+    if not text:
+        return ""
+    return _NORMALIZE_RE.sub(_replace_char, text)
+
+
+def _replace_char(match) -> str:
+    return _CHAR_MAP[match.group()]
+
+
+def _clean(text: str, disallowed: 're.Pattern' = _DISALLOWED_RE) -> str:
+    text = normalize_persian(text)
+    # حذف فاصله‌های اضافی
+    text = _WHITESPACE_RE.sub(' ', text)
+    # حذف کاراکترهای خاص
+    text = disallowed.sub('', text)
+    # نیم‌فاصله‌های تکراری و نیم‌فاصله کنار فاصله
+    text = _ZWNJ_RUN_RE.sub(ZWNJ, text)
+    text = _SPACE_ZWNJ_RUN_RE.sub(' ', text)
+    return text
+
+
+def clean_text(text: str) -> str:
+    """پاکسازی و نرمال‌سازی متن فارسی"""
+    if not text:
+        return ""
+    return _clean(text).strip(_STRIP_CHARS)
+
+
+def clean_texts(texts: List[str]) -> List[str]:
+    """نرمال‌سازی دسته‌ای: همه رشته‌ها با یک فراخوانی هر regex پاکسازی می‌شوند"""
+    if not texts:
+        return []
+    if any(_BATCH_SEPARATOR in text for text in texts if text):
+        return [clean_text(text) for text in texts]
+
+    joined = _BATCH_SEPARATOR.join(text or '' for text in texts)
+    return [part.strip(_STRIP_CHARS) for part in _clean(joined, _BATCH_DISALLOWED_RE).split(_BATCH_SEPARATOR)]
+
+
+def create_slug(text: str, max_length: int = 100) -> str:
+    """ایجاد slug لاتین از متن فارسی"""
+    slug = text.lower().translate(SLUG_TABLE)
+
+    # حذف کاراکترهای غیرمجاز
+    slug = _SLUG_INVALID_RE.sub('', slug)
+    slug = _SLUG_DASHES_RE.sub('-', slug)
+    slug = slug.strip('-')
+
+    return slug[:max_length]  # محدود کردن طول
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+لایه انتقال HTTP مشترک اسکرپر (requests.Session با adapter تنظیم شده)
+
+- اندازه pool اتصال هر میزبان صریح است و در صورت پر بودن pool، درخواست منتظر
+  اتصال آزاد می‌ماند (pool_block) تا اتصال اضافه ساخته و دور ریخته نشود؛ برای
+  یک میزبان خاص می‌توان pool جداگانه تعریف کرد (`size_host`).
+- خطاهای اتصال و پاسخ‌های 429/5xx با urllib3.Retry، backoff نمایی و رعایت
+  هدر Retry-After (حداکثر MAX_RETRY_AFTER ثانیه) دوباره تلاش می‌شوند.
+- Accept-Encoding فقط فشرده‌سازی‌هایی را اعلام می‌کند که واقعاً قابل باز کردن
+  هستند (br فقط با نصب بودن brotli).
+- با `http2=True` و نصب بودن `httpx[http2]` درخواست‌ها از HTTP/2 (multiplexing
+  روی یک اتصال برای هر میزبان) استفاده می‌کنند؛ سرورهای بدون HTTP/2 با
+  HTTP/1.1 پاسخ می‌دهند.
+- تعداد درخواست‌ها، اتصال‌های ساخته شده (و در نتیجه میزان استفاده مجدد) و
+  تعداد retry ها در `stats()` گزارش می‌شود؛ با `metrics` زمان هر اتصال (DNS،
+  TCP و TLS) و پاسخ‌های هر میزبان هم در metrics.Metrics ثبت می‌شوند.
+"""
+
+import functools
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def accept_encoding() -> str:
+    """مقدار Accept-Encoding بر اساس decoder های نصب شده (gzip و deflate همیشه)"""
+    encodings = ['gzip', 'deflate']
+    if 'br' in ACCEPT_ENCODING.split(','):
+        encodings.append('br')
+    return ', '.join(encodings)
+
+
+class ScraperRetry(Retry):
+    """Retry با سقف برای Retry-After تا یک سرور نتواند worker را ساعت‌ها متوقف کند"""
+
+    MAX_RETRY_AFTER = 60
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.MAX_RETRY_AFTER)
+
+
+def retry_policy(total: int = 3, backoff_factor: float = 0.5) -> Retry:
+    """سیاست retry درخواست‌های GET/HEAD؛ پس از آخرین تلاش پاسخ خطا برگردانده می‌شود"""
+    return ScraperRetry(
+        total=total,
+        connect=total,
+        read=total,
+        status=total,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+# observer(origin, seconds) برای هر اتصال جدید؛ origin مثل 'https://example.com'
+ConnectObserver = Callable[[str, float], None]
+
+
+class _TimedConnection:
+    """زمان connect (DNS + TCP + TLS) را به pool گزارش می‌کند"""
+
+    on_connect: Optional[Callable[[float], None]] = None
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        if self.on_connect is not None:
+            self.on_connect(time.perf_counter() - started)
+
+
+class _TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+
+class _ConnectCounter:
+    """شمارش اتصال‌های TCP/TLS واقعی pool (شامل اتصال دوباره اتصال‌های قطع شده)"""
+
+    num_connects = 0
+
+    def __init__(self, *args, observer: Optional[ConnectObserver] = None, **kwargs):
+        self.observer = observer
+        super().__init__(*args, **kwargs)
+        default_port = 443 if self.scheme == 'https' else 80
+        port = f':{self.port}' if self.port not in (None, default_port) else ''
+        self.origin = f'{self.scheme}://{self.host}{port}'
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.on_connect = self._connected
+        return conn
+
+    def _connected(self, seconds: float):
+        self.num_connects += 1
+        if self.observer is not None:
+            self.observer(self.origin, seconds)
+
+
+class _CountingHTTPPool(_ConnectCounter, HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _CountingHTTPSPool(_ConnectCounter, HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TransportAdapter(HTTPAdapter):
+    """HTTPAdapter با شمارش درخواست‌ها و اتصال‌های ساخته شده در pool ها"""
+
+    def __init__(self, pool_connections: int, pool_maxsize: int, max_retries: Retry,
+                 on_connect: Optional[ConnectObserver] = None):
+        self.on_connect = on_connect
+        self._lock = threading.Lock()
+        # آمار pool هایی که از LRU پول‌منیجر خارج و بسته شده‌اند
+        self._retired_requests = 0
+        self._retired_connections = 0
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                         max_retries=max_retries, pool_block=True)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': functools.partial(_CountingHTTPPool, observer=self.on_connect),
+            'https': functools.partial(_CountingHTTPSPool, observer=self.on_connect),
+        }
+        self.poolmanager.pools.dispose_func = self._retire_pool
+
+    def _retire_pool(self, pool):
+        with self._lock:
+            self._retired_requests += pool.num_requests
+            self._retired_connections += pool.num_connects
+        pool.close()
+
+    def stats(self) -> Dict:
+        pools = self.poolmanager.pools
+        with pools.lock:
+            active = list(pools._container.values())
+        with self._lock:
+            return {
+                'requests': self._retired_requests + sum(pool.num_requests for pool in active),
+                'connections': self._retired_connections + sum(pool.num_connects for pool in active),
+            }
+
+
+class _HttpxStream:
+    """شیء raw پاسخ requests روی پاسخ stream شده httpx (برای iter_content)"""
+
+    def __init__(self, response):
+        self._response = response
+
+    def stream(self, chunk_size: int = 64 * 1024, decode_content: bool = True):
+        yield from self._response.iter_bytes(chunk_size)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._response.read()
+
+    def close(self):
+        self._response.close()
+
+
+class Http2Adapter(HTTPAdapter):
+    """adapter درخواست‌های requests روی httpx.Client با HTTP/2
+
+    cookie های پاسخ در session ذخیره نمی‌شوند (اسکرپر به آن‌ها نیازی ندارد).
+    """
+
+    def __init__(self, max_connections: int, max_retries: Retry,
+                 on_connect: Optional[ConnectObserver] = None):
+        import httpx  # ImportError: httpx نصب نیست
+
+        self._httpx = httpx
+        # بدون پکیج h2 ساخت client با ImportError متوقف می‌شود
+        self.client = httpx.Client(
+            http2=True,
+            follow_redirects=False,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=max_connections),
+        )
+        self.on_connect = on_connect
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.http2_requests = 0
+        self.retries = 0
+        super().__init__(max_retries=max_retries)
+
+    def _tracer(self, url: str):
+        """callback رویدادهای httpcore برای شمارش و زمان‌سنجی اتصال‌های جدید"""
+        parsed = urlparse(url)
+        origin = f'{parsed.scheme}://{parsed.netloc}'
+        # اتصال HTTPS پس از TLS و اتصال HTTP پس از TCP کامل می‌شود
+        done_event = 'connection.start_tls.complete' if parsed.scheme == 'https' else 'connection.connect_tcp.complete'
+        started = [0.0]
+
+        def trace(event_name: str, info):
+            if event_name == 'connection.connect_tcp.started':
+                started[0] = time.perf_counter()
+            elif event_name == 'connection.connect_tcp.complete':
+                with self._lock:
+                    self.connections += 1
+            if event_name == done_event and self.on_connect is not None:
+                self.on_connect(origin, time.perf_counter() - started[0])
+
+        return trace
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        retry = self.max_retries
+        if response is not None and retry.respect_retry_after_header:
+            value = response.headers.get('Retry-After')
+            if value:
+                try:
+                    return min(retry.parse_retry_after(value), ScraperRetry.MAX_RETRY_AFTER)
+                except Exception:
+                    pass
+        return min(retry.backoff_factor * (2 ** attempt), retry.DEFAULT_BACKOFF_MAX)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        retry = self.max_retries
+        attempts = retry.total or 0
+        attempt = 0
+        while True:
+            hx_request = self.client.build_request(
+                request.method, request.url, headers=dict(request.headers), content=request.body,
+                timeout=self._timeout(timeout), extensions={'trace': self._tracer(request.url)},
+            )
+            try:
+                hx_response = self.client.send(hx_request, stream=True)
+            except self._httpx.TimeoutException as e:
+                error = requests.Timeout(e, request=request)
+            except self._httpx.TransportError as e:
+                error = requests.ConnectionError(e, request=request)
+            else:
+                error = None
+                if hx_response.status_code not in RETRY_STATUSES or attempt >= attempts:
+                    break
+                hx_response.close()
+
+            if error is not None and attempt >= attempts:
+                raise error
+            time.sleep(self._backoff(attempt, None if error is not None else hx_response))
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+
+        with self._lock:
+            self.requests += 1
+            if hx_response.http_version == 'HTTP/2':
+                self.http2_requests += 1
+
+        response = requests.Response()
+        response.status_code = hx_response.status_code
+        response.headers = CaseInsensitiveDict(hx_response.headers.items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = hx_response.reason_phrase
+        response.raw = _HttpxStream(hx_response)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'http2_requests': self.http2_requests,
+                'retries': self.retries,
+            }
+
+    def close(self):
+        self.client.close()
+        super().close()
+
+
+class Transport:
+    """session مشترک اسکرپر و adapter های آن"""
+
+    def __init__(self, headers: Dict[str, str], per_host: int = 8, hosts: int = 32,
+                 retries: int = 3, backoff_factor: float = 0.5, http2: bool = False, metrics=None):
+        self.metrics = metrics
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.headers['Accept-Encoding'] = accept_encoding()
+        self.session.hooks['response'].append(self._on_response)
+
+        self._lock = threading.Lock()
+        # adapter فعلی هر mount ('' برای پیش‌فرض، origin برای میزبان‌ها) و اندازه pool میزبان‌ها
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        self._host_sizes: Dict[str, int] = {}
+        # آمار adapter های جایگزین شده و بسته شده
+        self._retired: Dict[str, int] = {}
+        self.retries = 0
+        self.per_host = per_host
+        self.hosts = hosts
+        self.max_retries = retries
+        self.backoff_factor = backoff_factor
+        self.http2 = http2
+        self.configure()
+
+    def _new_adapter(self, per_host: int) -> HTTPAdapter:
+        if self.http2:
+            try:
+                return Http2Adapter(max_connections=per_host, max_retries=self.retry,
+                                    on_connect=self._on_connect)
+            except ImportError as e:
+                print(f"⚠️  HTTP/2 در دسترس نیست (pip install 'httpx[http2]')؛ از HTTP/1.1 استفاده می‌شود: {e}")
+                self.http2 = False
+        return TransportAdapter(pool_connections=self.hosts, pool_maxsize=per_host, max_retries=self.retry,
+                                on_connect=self._on_connect)
+
+    def configure(self, per_host: Optional[int] = None, hosts: Optional[int] = None,
+                  retries: Optional[int] = None, backoff_factor: Optional[float] = None,
+                  http2: Optional[bool] = None):
+        """mount دوباره adapter پیش‌فرض؛ پارامترهای None مقدار فعلی را نگه می‌دارند"""
+        if per_host is not None:
+            self.per_host = per_host
+        if hosts is not None:
+            self.hosts = hosts
+        if retries is not None:
+            self.max_retries = retries
+        if backoff_factor is not None:
+            self.backoff_factor = backoff_factor
+        if http2 is not None:
+            self.http2 = http2
+        self.per_host = max(1, self.per_host)
+        self.hosts = max(1, self.hosts)
+        self.retry = retry_policy(self.max_retries, self.backoff_factor)
+        self._mount('', ('http://', 'https://'), self._new_adapter(self.per_host))
+
+    def size_host(self, base_url: str, connections: int):
+        """pool جداگانه با `connections` اتصال برای یک میزبان (مثلاً از max_connections سایت)
+
+        اگر اندازه pool میزبان تغییر نکرده باشد adapter فعلی (و اتصال‌های باز آن) استفاده می‌شود.
+        """
+        parsed = urlparse(base_url)
+        origin = f"{parsed.scheme}://{parsed.netloc}/"
+        connections = max(1, connections)
+        if self._host_sizes.get(origin) == connections:
+            return
+        self._host_sizes[origin] = connections
+        self._mount(origin, (origin,), self._new_adapter(connections))
+
+    def _mount(self, key: str, prefixes: Tuple[str, ...], adapter: HTTPAdapter):
+        """mount adapter و بستن adapter قبلی همان mount (آمار آن نگه داشته می‌شود)"""
+        previous = self._adapters.get(key)
+        self._adapters[key] = adapter
+        for prefix in prefixes:
+            self.session.mount(prefix, adapter)
+        if previous is not None:
+            with self._lock:
+                for name, value in previous.stats().items():
+                    self._retired[name] = self._retired.get(name, 0) + value
+            previous.close()
+
+    def _on_connect(self, origin: str, seconds: float):
+        if self.metrics is not None:
+            self.metrics.observe('connect', seconds)
+            self.metrics.count(origin, 'connections')
+
+    def _on_response(self, response, *args, **kwargs):
+        retries = getattr(response.raw, 'retries', None)
+        count = len(retries.history) if retries is not None else 0
+        if count:
+            with self._lock:
+                self.retries += count
+        if self.metrics is not None:
+            self.metrics.status(response.url, response.status_code, count)
+
+    def stats(self) -> Dict:
+        """آمار کل درخواست‌ها، اتصال‌های ساخته شده، retry ها و درخواست‌های HTTP/2"""
+        totals = {'requests': 0, 'connections': 0, 'retries': self.retries, 'http2_requests': 0}
+        with self._lock:
+            retired = dict(self._retired)
+        for stats in [retired] + [adapter.stats() for adapter in self._adapters.values()]:
+            for key, value in stats.items():
+                totals[key] += value
+        totals['reused'] = max(0, totals['requests'] - totals['connections'])
+        return totals
+
+    def close(self):
+        self.session.close()
+        for adapter in self._adapters.values():
+            adapter.close()
@@ -2,33 +2,116 @@
 # -*- coding: utf-8 -*-
 """
 اسکریپت اعتبارسنجی و پاکسازی محتوای جمع‌آوری شده
+
+برای هر رکورد علاوه بر معتبر/نامعتبر بودن، تعداد رخداد هر کلمه کلیدی
+(`keyword_counts`) و امتیاز ارتباط (`relevance`، بین 0 و 1) ثبت می‌شود.
+مجموعه‌های بزرگ را می‌توان روی چند پردازه اعتبارسنجی کرد (`processes`).
+برای مقایسه با روش قبلی: `python benchmarks/bench_validate.py`
 """
 
-import json
+import argparse
+import math
+import os
+import queue
 import re
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from near_duplicates import NearDuplicateIndex, simhash
+from records_io import iter_records, open_writer
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+# فیلد موقت اثر انگشت SimHash که worker ها برای رکوردهای معتبر محاسبه می‌کنند
+_FINGERPRINT_FIELD = '_simhash'
+
+
+class KeywordMatcher:
+    """شمارش رخداد همه کلمات کلیدی در یک متن
+
+    جستجوی `str.count` برای هر کلمه در C انجام می‌شود و روی متن‌های فارسی از
+    یک regex با alternation کلمات (که در هر موقعیت همه شاخه‌ها را امتحان
+    می‌کند) سریع‌تر است؛ حتی با 30 کلمه کلیدی.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(keyword.lower() for keyword in keywords if keyword))
+        # متن فقط وقتی lower می‌شود که کلمه کلیدی حروف بزرگ/کوچک داشته باشد (مثلاً لاتین)
+        self._cased = any(keyword != keyword.upper() for keyword in self.keywords)
+
+    def count(self, text: str) -> Dict[str, int]:
+        """تعداد رخداد هر کلمه کلیدی موجود در متن (کلمات غایب در خروجی نیستند)"""
+        if not text:
+            return {}
+        if self._cased:
+            text = text.lower()
+        counts = {}
+        for keyword in self.keywords:
+            hits = text.count(keyword)
+            if hits:
+                counts[keyword] = hits
+        return counts
+
 
 class ContentValidator:
-    def __init__(self):
+    def __init__(self, near_duplicates: Optional[NearDuplicateIndex] = None):
         self.min_title_length = 10
         self.min_content_length = 200
         self.max_content_length = 50000
         self.required_keywords = ['اسب', 'سوارکاری', 'مسابقات', 'نژاد', 'بیماری', 'تغذیه']
+        self.min_keyword_count = 2  # حداقل تعداد کلمات کلیدی متفاوت در متن
+        
+        # تشخیص محتوای تقریباً تکراری؛ بدون index پایدار، تکرار فقط داخل همان دسته بررسی می‌شود
+        self.check_duplicates = True
+        self.near_duplicates = near_duplicates
+        
+        self._matcher: Optional[KeywordMatcher] = None
+        self._matcher_keywords: Optional[Tuple[str, ...]] = None
     
-    def validate_title(self, title: str) -> bool:
+    @property
+    def matcher(self) -> KeywordMatcher:
+        """matcher کلمات کلیدی (با تغییر required_keywords دوباره ساخته می‌شود)"""
+        keywords = tuple(self.required_keywords)
+        if self._matcher is None or keywords != self._matcher_keywords:
+            self._matcher = KeywordMatcher(keywords)
+            self._matcher_keywords = keywords
+        return self._matcher
+    
+    def settings(self) -> Dict:
+        """تنظیمات قابل ارسال به پردازه‌های worker"""
+        return {
+            'min_title_length': self.min_title_length,
+            'min_content_length': self.min_content_length,
+            'max_content_length': self.max_content_length,
+            'required_keywords': list(self.required_keywords),
+            'min_keyword_count': self.min_keyword_count,
+        }
+    
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'ContentValidator':
+        validator = cls()
+        for name, value in settings.items():
+            setattr(validator, name, value)
+        return validator
+    
+    def validate_title(self, title: str, keyword_counts: Optional[Dict[str, int]] = None) -> bool:
         """اعتبارسنجی عنوان"""
         if not title or len(title) < self.min_title_length:
             return False
         
         # بررسی وجود کلمات کلیدی مرتبط
-        title_lower = title.lower()
-        if not any(keyword in title_lower for keyword in self.required_keywords):
+        if keyword_counts is None:
+            keyword_counts = self.matcher.count(title)
+        if not keyword_counts:
             return False
         
         return True
     
-    def validate_content(self, content: str) -> bool:
+    def validate_content(self, content: str, keyword_counts: Optional[Dict[str, int]] = None) -> bool:
         """اعتبارسنجی محتوا"""
         if not content:
             return False
@@ -40,23 +123,38 @@ class ContentValidator:
             return False
         
         # بررسی وجود کلمات کلیدی
-        content_lower = content.lower()
-        keyword_count = sum(1 for keyword in self.required_keywords if keyword in content_lower)
+        if keyword_counts is None:
+            keyword_counts = self.matcher.count(content)
         
-        if keyword_count < 2:  # حداقل 2 کلمه کلیدی
+        if len(keyword_counts) < self.min_keyword_count:
             return False
         
         return True
     
+    def relevance(self, title_counts: Dict[str, int], content_counts: Dict[str, int], length: int) -> float:
+        """امتیاز ارتباط محتوا با موضوع (0 تا 1)
+
+        ترکیب پوشش (چه کسری از کلمات کلیدی آمده)، تراکم (رخداد در هر 1000
+        نویسه، با اشباع لگاریتمی) و وجود کلمه کلیدی در عنوان.
+        """
+        keywords = self.matcher.keywords
+        if not keywords:
+            return 0.0
+        coverage = len(set(title_counts) | set(content_counts)) / len(keywords)
+        hits = sum(content_counts.values())
+        density = min(1.0, math.log1p(hits * 1000 / length) / math.log1p(20)) if length else 0.0
+        title_bonus = 1.0 if title_counts else 0.0
+        return round(0.5 * coverage + 0.3 * density + 0.2 * title_bonus, 3)
+    
     def clean_content(self, content: Dict) -> Dict:
         """پاکسازی و اعتبارسنجی محتوا"""
-        # حذف HTML tags باقی‌مانده
-        content['content'] = re.sub(r'<[^>]+>', '', content.get('content', ''))
-        content['excerpt'] = re.sub(r'<[^>]+>', '', content.get('excerpt', ''))
-        
-        # حذف فاصله‌های اضافی
-        content['content'] = re.sub(r'\s+', ' ', content['content']).strip()
-        content['excerpt'] = re.sub(r'\s+', ' ', content['excerpt']).strip()
+        for field in ('content', 'excerpt'):
+            text = content.get(field) or ''
+            # حذف HTML tags باقی‌مانده
+            if '<' in text:
+                text = _TAG_RE.sub('', text)
+            # حذف فاصله‌های اضافی (معادل \s+ -> ' ' و strip، بدون regex)
+            content[field] = ' '.join(text.split())
         
         # محدود کردن طول excerpt
         if len(content['excerpt']) > 300:
@@ -64,14 +162,19 @@ class ContentValidator:
         
         return content
     
-    def validate(self, content: Dict) -> Tuple[bool, List[str]]:
-        """اعتبارسنجی کامل محتوا"""
+    def evaluate(self, content: Dict) -> Tuple[List[str], Dict[str, int], float]:
+        """(خطاها، تعداد رخداد کلمات کلیدی در عنوان و متن، امتیاز ارتباط)"""
+        title = content.get('title') or ''
+        text = content.get('content') or ''
+        title_counts = self.matcher.count(title)
+        content_counts = self.matcher.count(text)
+        
         errors = []
         
-        if not self.validate_title(content.get('title', '')):
+        if not self.validate_title(title, title_counts):
             errors.append('عنوان نامعتبر یا کوتاه است')
         
-        if not self.validate_content(content.get('content', '')):
+        if not self.validate_content(text, content_counts):
             errors.append('محتوا نامعتبر یا کوتاه است')
         
         if not content.get('slug'):
@@ -80,64 +183,267 @@ class ContentValidator:
         if not content.get('url'):
             errors.append('URL وجود ندارد')
         
+        keyword_counts = dict(content_counts)
+        for keyword, hits in title_counts.items():
+            keyword_counts[keyword] = keyword_counts.get(keyword, 0) + hits
+        return errors, keyword_counts, self.relevance(title_counts, content_counts, len(text))
+    
+    def validate(self, content: Dict) -> Tuple[bool, List[str]]:
+        """اعتبارسنجی کامل محتوا"""
+        errors, _, _ = self.evaluate(content)
         return len(errors) == 0, errors
     
-    def validate_batch(self, contents: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
-        """اعتبارسنجی دسته‌ای محتواها"""
-        valid_contents = []
-        invalid_contents = []
+    def check(self, content: Dict) -> Dict:
+        """پاکسازی و اعتبارسنجی یک رکورد؛ نتیجه در خود رکورد ثبت می‌شود
+
+        فیلدهای keyword_counts و relevance همیشه و validation_errors فقط برای
+        رکورد نامعتبر اضافه می‌شوند.
+        """
+        content = self.clean_content(content)
+        errors, keyword_counts, relevance = self.evaluate(content)
+        content['keyword_counts'] = keyword_counts
+        content['relevance'] = relevance
+        if errors:
+            content['validation_errors'] = errors
+        else:
+            content.pop('validation_errors', None)
+        return content
+    
+    def check_batch(self, contents: List[Dict]) -> List[Dict]:
+        return [self.check(content) for content in contents]
+    
+    def iter_checked(self, contents: Iterable[Dict], processes: Optional[int] = None,
+                     chunk_size: int = 1000, ordered: bool = True,
+                     fingerprints: bool = False) -> Iterator[Dict]:
+        """check روی همه رکوردها؛ با processes > 1 دسته‌ها روی process pool اجرا می‌شوند
+
+        در هر لحظه حداکثر دو دسته برای هر پردازه در جریان است، پس ورودی به
+        اندازه سرعت پردازش خوانده می‌شود و حافظه مصرفی ثابت می‌ماند. با
+        ordered=False هر دسته به محض آماده شدن برگردانده می‌شود. با
+        fingerprints=True اثر انگشت SimHash رکوردهای معتبر هم (در worker ها)
+        محاسبه و در فیلد موقت `_simhash` قرار می‌گیرد.
+        """
+        if not processes or processes < 2:
+            for content in contents:
+                content = self.check(content)
+                if fingerprints:
+                    _add_fingerprint(content)
+                yield content
+            return
         
-        for content in contents:
-            # پاکسازی
-            content = self.clean_content(content)
+        max_pending = processes * 2
+        with Pool(processes, initializer=_init_worker, initargs=(self.settings(), fingerprints)) as pool:
+            if ordered:
+                pending = deque()
+                for chunk in chunks(contents, chunk_size):
+                    pending.append(pool.apply_async(_check_chunk, (chunk,)))
+                    if len(pending) >= max_pending:
+                        yield from pending.popleft().get()
+                while pending:
+                    yield from pending.popleft().get()
+                return
             
-            # اعتبارسنجی
-            is_valid, errors = self.validate(content)
-            
-            if is_valid:
-                valid_contents.append(content)
-            else:
-                content['validation_errors'] = errors
-                invalid_contents.append(content)
+            done: queue.Queue = queue.Queue()
+            in_flight = 0
+            for chunk in chunks(contents, chunk_size):
+                pool.apply_async(_check_chunk, (chunk,), callback=done.put, error_callback=done.put)
+                in_flight += 1
+                if in_flight >= max_pending:
+                    in_flight -= 1
+                    yield from _chunk_result(done.get())
+            while in_flight:
+                in_flight -= 1
+                yield from _chunk_result(done.get())
+    
+    def iter_valid(self, contents: Iterable[Dict],
+                   on_invalid: Optional[Callable[[Dict], None]] = None,
+                   processes: Optional[int] = None, chunk_size: int = 1000,
+                   ordered: bool = True) -> Iterator[Dict]:
+        """اعتبارسنجی stream: محتواهای معتبر yield و نامعتبرها به on_invalid داده می‌شوند"""
+        index = None
+        if self.check_duplicates:
+            index = self.near_duplicates if self.near_duplicates is not None else NearDuplicateIndex()
         
+        checked = self.iter_checked(contents, processes=processes, chunk_size=chunk_size, ordered=ordered,
+                                    fingerprints=index is not None)
+        for content in checked:
+            fingerprint = content.pop(_FINGERPRINT_FIELD, None)
+            # فقط محتوای معتبر در index ثبت می‌شود (به ترتیب رسیدن نتایج و در همین پردازه)؛
+            # SimHash قبلاً در worker ها محاسبه شده و اینجا فقط جستجوی index انجام می‌شود
+            if 'validation_errors' not in content and index is not None:
+                duplicate_of = index.check_and_add_fingerprint(content.get('url') or content.get('slug'), fingerprint)
+                if duplicate_of:
+                    content['validation_errors'] = [f'محتوای تکراری (مشابه {duplicate_of})']
+            
+            if 'validation_errors' not in content:
+                yield content
+            elif on_invalid:
+                on_invalid(content)
+    
+    def validate_batch(self, contents: Iterable[Dict],
+                       processes: Optional[int] = None) -> Tuple[List[Dict], List[Dict]]:
+        """اعتبارسنجی دسته‌ای محتواها"""
+        invalid_contents = []
+        valid_contents = list(self.iter_valid(contents, on_invalid=invalid_contents.append,
+                                              processes=processes))
         return valid_contents, invalid_contents
 
 
+def chunks(items: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    """تقسیم یک iterable به لیست‌های حداکثر size عضوی"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _add_fingerprint(content: Dict) -> Dict:
+    if 'validation_errors' not in content:
+        content[_FINGERPRINT_FIELD] = simhash(content['content'])
+    return content
+
+
+_worker_validator: Optional[ContentValidator] = None
+_worker_fingerprints = False
+
+
+def _init_worker(settings: Dict, fingerprints: bool = False):
+    global _worker_validator, _worker_fingerprints
+    _worker_validator = ContentValidator.from_settings(settings)
+    _worker_fingerprints = fingerprints
+
+
+def _check_chunk(contents: List[Dict]) -> List[Dict]:
+    checked = _worker_validator.check_batch(contents)
+    if _worker_fingerprints:
+        for content in checked:
+            _add_fingerprint(content)
+    return checked
+
+
+def _chunk_result(result) -> List[Dict]:
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+class Progress:
+    """گزارش دوره‌ای تعداد رکوردهای پردازش شده و سرعت"""
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self.count = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+
+    def tick(self):
+        self.count += 1
+        now = time.monotonic()
+        if self.interval and now - self._last_report >= self.interval:
+            self._last_report = now
+            print(f"⏳ {self.count} رکورد، {self.rate:.0f} رکورد در ثانیه")
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed else 0.0
+
+
+def default_input() -> Path:
+    """خروجی JSON Lines اسکرپر در صورت وجود، وگرنه فایل JSON"""
+    data_dir = Path('scraped_content/data')
+    jsonl_file = data_dir / 'scraped_content.jsonl'
+    return jsonl_file if jsonl_file.exists() else data_dir / 'scraped_content.json'
+
+
 def main():
-    json_file = Path('scraped_content/data/scraped_content.json')
+    parser = argparse.ArgumentParser(description='اعتبارسنجی و پاکسازی محتوای جمع‌آوری شده')
+    parser.add_argument('input', nargs='?', default=None,
+                        help='فایل ورودی .json یا .jsonl (پیش‌فرض: خروجی اسکرپر)')
+    parser.add_argument('--output', default=None,
+                        help='فایل خروجی محتواهای معتبر (پیش‌فرض: scraped_content_validated با پسوند ورودی)')
+    parser.add_argument('--invalid-output', default=None,
+                        help='فایل خروجی محتواهای نامعتبر همراه خطاها (پیش‌فرض: ذخیره نمی‌شود)')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='غیرفعال کردن تشخیص محتوای تقریباً تکراری')
+    parser.add_argument('--dedup-index', default=None,
+                        help='فایل SQLite index اثر انگشت‌ها برای تشخیص تکرار بین اجراها')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='تعداد پردازه‌های اعتبارسنجی (پیش‌فرض: تعداد هسته‌ها)')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='تعداد رکورد در هر دسته ارسالی به پردازه‌ها')
+    parser.add_argument('--unordered', action='store_true',
+                        help='نوشتن نتایج به ترتیب آماده شدن (سریع‌تر، بدون حفظ ترتیب ورودی)')
+    parser.add_argument('--progress-interval', type=float, default=5.0,
+                        help='فاصله گزارش پیشرفت (ثانیه، 0 برای غیرفعال)')
+    args = parser.parse_args()
+    
+    json_file = Path(args.input) if args.input else default_input()
     
     if not json_file.exists():
         print(f"❌ فایل {json_file} یافت نشد!")
         return
     
-    # خواندن محتوا
-    with open(json_file, 'r', encoding='utf-8') as f:
-        contents = json.load(f)
+    output_file = Path(args.output) if args.output else \
+        json_file.parent / ('scraped_content_validated' + json_file.suffix)
     
-    print(f"📊 تعداد کل محتواها: {len(contents)}")
+    validator = ContentValidator(NearDuplicateIndex(args.dedup_index) if args.dedup_index else None)
+    validator.check_duplicates = not args.no_dedup
     
-    # اعتبارسنجی
-    validator = ContentValidator()
-    valid_contents, invalid_contents = validator.validate_batch(contents)
+    # ورودی، پردازه‌ها و هر دو خروجی stream هستند؛ از نامعتبرها فقط چند نمونه در حافظه می‌ماند
+    progress = Progress(args.progress_interval)
+    valid_writer = open_writer(output_file, flush=False)
+    invalid_writer = open_writer(args.invalid_output, flush=False) if args.invalid_output else None
+    invalid_count = 0
+    invalid_samples = []
     
-    print(f"\n✅ محتواهای معتبر: {len(valid_contents)}")
-    print(f"❌ محتواهای نامعتبر: {len(invalid_contents)}")
+    def on_invalid(content: Dict):
+        nonlocal invalid_count
+        invalid_count += 1
+        if len(invalid_samples) < 5:
+            invalid_samples.append(content)
+        if invalid_writer:
+            invalid_writer.write(content)
+        progress.tick()
     
-    # ذخیره محتواهای معتبر
-    if valid_contents:
-        output_file = json_file.parent / 'scraped_content_validated.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(valid_contents, f, ensure_ascii=False, indent=2)
+    print(f"🔍 اعتبارسنجی {json_file} با {args.processes} پردازه...")
+    try:
+        for content in validator.iter_valid(iter_records(json_file), on_invalid,
+                                            processes=args.processes, chunk_size=args.chunk_size,
+                                            ordered=not args.unordered):
+            valid_writer.write(content)
+            progress.tick()
+    finally:
+        valid_writer.close()
+        if invalid_writer:
+            invalid_writer.close()
+    
+    valid_count = valid_writer.count
+    print(f"📊 تعداد کل محتواها: {progress.count} "
+          f"({progress.elapsed:.1f} ثانیه، {progress.rate:.0f} رکورد در ثانیه)")
+    print(f"\n✅ محتواهای معتبر: {valid_count}")
+    print(f"❌ محتواهای نامعتبر: {invalid_count}")
+    
+    if valid_count:
         print(f"\n✓ محتواهای معتبر در {output_file} ذخیره شدند")
+    else:
+        output_file.unlink()
+    if invalid_writer and invalid_count:
+        print(f"✓ محتواهای نامعتبر در {args.invalid_output} ذخیره شدند")
     
     # نمایش خطاها
-    if invalid_contents:
+    if invalid_samples:
         print("\n⚠️  محتواهای نامعتبر:")
-        for content in invalid_contents[:5]:  # نمایش 5 مورد اول
+        for content in invalid_samples:  # نمایش 5 مورد اول
             print(f"  - {content.get('title', 'بدون عنوان')[:50]}")
             print(f"    خطاها: {', '.join(content.get('validation_errors', []))}")
 
 
 if __name__ == "__main__":
     main()
-